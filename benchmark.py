@@ -0,0 +1,196 @@
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+# Imported up front so the first Faker-backed stage is not charged for the one-time import
+import faker  # noqa: F401
+
+import data_generator as dg
+from config import PRESETS, table_sizes
+from instrumentation import PeakRssMonitor, max_rss_bytes
+from pipeline import topological_order
+from sinks import make_sink
+
+# Baseline compared against by default
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks', 'baseline.json')
+
+# Slowdowns smaller than this are timer noise, whatever the ratio (seconds)
+MIN_SLOWDOWN_SECONDS = 0.05
+
+
+def _call(fn, args, params, seed, sink):
+    # Silence the per-table "Generated ..." lines so the report stays readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        return fn(*args, seed=seed, sink=sink, **params)
+
+
+def run_preset(preset, seed=42, repeat=1, sink_format='null', output_dir=None, stages=None,
+               allocations=True):
+    """Benchmark every stage of one preset; returns {table: measurements}
+
+    Each stage runs repeat times on the same upstream tables and the fastest
+    run is kept. Allocation tracing slows code down, so it runs as an extra
+    pass that is not timed.
+    """
+    sink = make_sink(sink_format, output_dir or tempfile.mkdtemp(prefix='sop-bench-'))
+    tables, results = {}, {}
+    for stage in topological_order(dg.pipeline_stages(sink, table_sizes(PRESETS[preset]))):
+        table, fn = stage.table, stage.fn
+        args = [tables[name] for name in stage.inputs]
+        params = stage.resolve_params(tables)
+
+        seconds = []
+        for _ in range(repeat):
+            with PeakRssMonitor() as rss:
+                start = time.perf_counter()
+                df = _call(fn, args, params, seed, sink)
+                seconds.append(time.perf_counter() - start)
+        if stage.on_complete is not None:
+            stage.on_complete(df)
+        tables[table] = df
+        if stages is not None and table not in stages:
+            continue
+
+        rows = len(df)
+        best = min(seconds)
+        result = {
+            'seconds': round(best, 6),
+            'rows': rows,
+            'rows_per_sec': round(rows / best, 1) if best > 0 else None,
+            'peak_rss_mb': round(rss.peak / 2 ** 20, 1)
+        }
+        if allocations:
+            tracemalloc.start()
+            _call(fn, args, params, seed, sink)
+            _, traced_peak = tracemalloc.get_traced_memory()
+            snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+            result['traced_peak_mb'] = round(traced_peak / 2 ** 20, 2)
+            # Blocks the stage allocated that outlive it once its table is dropped; not an allocation count
+            result['live_blocks'] = len(snapshot.traces)
+        results[table] = result
+        print(f"  {table:<18} {best:9.3f}s {rows:>10} rows {result['rows_per_sec'] or 0:>14,.0f} rows/s "
+              f"{result['peak_rss_mb']:>9.1f} MB RSS")
+    return results
+
+
+def run_benchmarks(presets=('small', 'medium'), **kwargs):
+    """Benchmark presets and return a JSON-serialisable report"""
+    report = {
+        'created': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'host': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__
+        },
+        'settings': {key: value for key, value in kwargs.items() if key != 'output_dir'},
+        'presets': {}
+    }
+    for preset in presets:
+        print(f"Preset {preset}: {PRESETS[preset]}")
+        start = time.perf_counter()
+        stages = run_preset(preset, **kwargs)
+        report['presets'][preset] = {
+            'sizes': PRESETS[preset],
+            'total_seconds': round(time.perf_counter() - start, 3),
+            'stages': stages
+        }
+    report['max_rss_mb'] = round(max_rss_bytes() / 2 ** 20, 1)
+    return report
+
+
+def compare(report, baseline, tolerance=0.25):
+    """Stages whose time or peak RSS grew by more than tolerance over the baseline
+
+    Returns a list of (preset, table, metric, baseline value, new value). A
+    stage missing from the baseline, or one that produced a different number
+    of rows, is reported under the 'rows' metric instead: its timings measure
+    a different amount of work and are not compared.
+    """
+    regressions = []
+    for preset, current in report['presets'].items():
+        reference = baseline.get('presets', {}).get(preset, {}).get('stages', {})
+        for table, result in current['stages'].items():
+            before = reference.get(table)
+            if before is None or before['rows'] != result['rows']:
+                regressions.append((preset, table, 'rows', before and before['rows'], result['rows']))
+                continue
+            for metric in ('seconds', 'peak_rss_mb'):
+                if metric == 'seconds' and result[metric] - before[metric] < MIN_SLOWDOWN_SECONDS:
+                    continue
+                if result[metric] > before[metric] * (1 + tolerance):
+                    regressions.append((preset, table, metric, before[metric], result[metric]))
+    return regressions
+
+
+def print_scaling(report):
+    """Seconds per stage across presets, to show how each stage scales"""
+    presets = list(report['presets'])
+    print(f"\n{'stage':<18}" + ''.join(f'{preset:>12}' for preset in presets))
+    tables = dict.fromkeys(table for preset in presets for table in report['presets'][preset]['stages'])
+    for table in tables:
+        cells = [report['presets'][preset]['stages'].get(table, {}).get('seconds') for preset in presets]
+        print(f'{table:<18}' + ''.join(f'{cell:>11.3f}s' if cell is not None else f"{'-':>12}" for cell in cells))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark every generation stage at the README presets")
+    parser.add_argument('--presets', nargs='+', choices=list(PRESETS), default=['small', 'medium'])
+    parser.add_argument('--stages', nargs='+', help="report only these tables (upstream stages still run)")
+    parser.add_argument('--repeat', type=int, default=1, help="runs per stage; the fastest is kept")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--sink', default='null', choices=['null', 'csv', 'parquet', 'arrow'],
+                        help="output backend; null measures generation alone")
+    parser.add_argument('--output-dir', help="where csv/parquet/arrow output goes (default: a temp dir)")
+    parser.add_argument('--no-allocations', action='store_true', help="skip the tracemalloc pass")
+    parser.add_argument('--output', default='benchmark_results.json', help="results file")
+    parser.add_argument('--baseline', default=BASELINE_PATH, help="results to compare against")
+    parser.add_argument('--save-baseline', action='store_true', help="store these results as the baseline")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="allowed relative slowdown")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(
+        args.presets, seed=args.seed, repeat=args.repeat, sink_format=args.sink,
+        output_dir=args.output_dir, stages=args.stages, allocations=not args.no_allocations
+    )
+    print_scaling(report)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {os.path.abspath(args.output)}")
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to {os.path.abspath(args.baseline)}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("No baseline to compare against")
+        return 0
+    with open(args.baseline) as f:
+        regressions = compare(report, json.load(f), args.tolerance)
+    for preset, table, metric, before, after in regressions:
+        if metric == 'rows':
+            print(f"MISMATCH {preset}/{table} rows: {before} in the baseline, {after} now; refresh the baseline")
+        else:
+            print(f"REGRESSION {preset}/{table} {metric}: {before} -> {after}")
+    if not regressions:
+        print(f"No regressions beyond {args.tolerance:.0%} of the baseline")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
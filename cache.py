@@ -0,0 +1,130 @@
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+
+import pandas as pd
+
+# Bump to invalidate every cached artifact after an incompatible change to the format
+CACHE_FORMAT_VERSION = 1
+
+# Default size budget for cached artifacts (bytes)
+DEFAULT_CACHE_MAX_BYTES = 10 * 1024 ** 3
+
+
+def _source_digest(fn):
+    """Hash of every module next to the one defining fn, so code changes invalidate its outputs
+
+    Generators call helpers across the flat top-level modules (kpi, timeline,
+    compact, ...), so hashing only fn's own file would miss their edits.
+    """
+    path = getattr(sys.modules.get(fn.__module__), '__file__', None)
+    if path is None:
+        return fn.__qualname__
+    directory = os.path.dirname(os.path.abspath(path))
+    digest = hashlib.sha256()
+    for name in sorted(os.listdir(directory)):
+        if name.endswith('.py'):
+            digest.update(name.encode('utf-8'))
+            with open(os.path.join(directory, name), 'rb') as f:
+                digest.update(f.read())
+    return digest.hexdigest()
+
+
+class TableCache:
+    """Content-addressed store of generated tables with LRU, size-bounded eviction
+
+    A table's key hashes the generator's source modules, its parameters,
+    the seed and the keys of the upstream tables it reads. Keys therefore
+    chain through the pipeline: changing one input only invalidates the
+    tables downstream of it. Runs without a seed are never cached because they are not
+    reproducible.
+    """
+
+    def __init__(self, cache_dir='.sop_cache', max_bytes=DEFAULT_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.index_path = os.path.join(cache_dir, 'index.json')
+        os.makedirs(cache_dir, exist_ok=True)
+        self.index = {}
+        # Stages may run on several threads; the index and its file are shared
+        self._lock = threading.RLock()
+        if os.path.exists(self.index_path):
+            with open(self.index_path) as f:
+                self.index = json.load(f)
+
+    def fingerprint(self, table, fn, params, seed, upstream):
+        """Cache key for one table; upstream maps table names to their keys"""
+        if seed is None or any(key is None for key in upstream.values()):
+            return None
+        payload = json.dumps({
+            'version': CACHE_FORMAT_VERSION,
+            'table': table,
+            'generator': f'{fn.__module__}.{fn.__qualname__}',
+            'source': _source_digest(fn),
+            'params': params,
+            'seed': seed,
+            'upstream': upstream
+        }, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _artifact_path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f'{key}.pkl')
+
+    def _save_index(self):
+        tmp_path = self.index_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.index, f, indent=2)
+        os.replace(tmp_path, self.index_path)
+
+    def load(self, key):
+        """Cached DataFrame for key, or None on a miss"""
+        path = self._artifact_path(key)
+        with self._lock:
+            if key not in self.index or not os.path.exists(path):
+                self.index.pop(key, None)
+                return None
+            self.index[key]['last_used'] = time.time()
+            self._save_index()
+        return pd.read_pickle(path)
+
+    def store(self, key, table, df):
+        path = self._artifact_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        df.to_pickle(path)
+        with self._lock:
+            self.index[key] = {'table': table, 'bytes': os.path.getsize(path), 'last_used': time.time()}
+            self.evict()
+            self._save_index()
+
+    def evict(self):
+        """Remove least recently used artifacts until the cache fits max_bytes"""
+        total = sum(entry['bytes'] for entry in self.index.values())
+        for key in sorted(self.index, key=lambda k: self.index[k]['last_used']):
+            if total <= self.max_bytes:
+                break
+            total -= self.index.pop(key)['bytes']
+            try:
+                os.remove(self._artifact_path(key))
+            except FileNotFoundError:
+                pass
+
+    def run(self, table, fn, args, upstream, seed, sink, **params):
+        """Return (df, key) for table, reusing the cached copy when inputs are unchanged
+
+        On a hit the cached table is still written to the sink so the output
+        directory is complete; on a miss fn(*args, seed=seed, sink=sink,
+        **params) generates it.
+        """
+        key = self.fingerprint(table, fn, params, seed, upstream)
+        df = self.load(key) if key is not None else None
+        if df is not None:
+            print(f"Reusing cached {table} ({key[:12]})\n", end='')
+            sink.write(table, df)
+            return df, key
+        df = fn(*args, seed=seed, sink=sink, **params)
+        if key is not None and df is not None:
+            self.store(key, table, df)
+        return df, key
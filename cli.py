@@ -0,0 +1,127 @@
+import argparse
+import json
+import secrets
+import sys
+
+import data_generator
+import loader
+import scenarios
+import streaming
+from config import GRANULARITIES, PRESETS, TABLE_SIZE_KEYS, main_arguments, resolve_config
+
+# Subcommands; a command line starting with anything else is treated as generate
+COMMANDS = ('generate', 'load', 'scenarios', 'stream')
+
+
+def _row_count(value):
+    """Parse a TABLE=ROWS argument"""
+    table, _, rows = value.partition('=')
+    if table not in TABLE_SIZE_KEYS or not rows.isdigit():
+        raise argparse.ArgumentTypeError(
+            f"expected TABLE=ROWS with TABLE one of {', '.join(TABLE_SIZE_KEYS)}, got {value!r}")
+    return table, int(rows)
+
+
+def add_generate_arguments(parser):
+    parser.add_argument('--config', help="YAML or TOML config file")
+    parser.add_argument('--preset', choices=list(PRESETS), help="scale preset")
+    parser.add_argument('--rows', type=_row_count, action='append', metavar='TABLE=ROWS',
+                        help="row count for one table (repeatable); DemandForecast counts series")
+    parser.add_argument('--start-date', help="first date of the calendar")
+    parser.add_argument('--end-date', help="last date of the calendar (overrides --periods)")
+    parser.add_argument('--periods', type=int, help="number of calendar periods")
+    parser.add_argument('--granularity', choices=GRANULARITIES, help="calendar period length")
+    parser.add_argument('--output-dir', help="where tables are written")
+    parser.add_argument('--format', choices=['csv', 'parquet', 'arrow'], help="output format")
+    parser.add_argument('--compression', help="codec for parquet/arrow output")
+    parser.add_argument('--seed', type=int, help="master random seed")
+    parser.add_argument('--workers', type=int, help="stages run concurrently")
+    parser.add_argument('--processes', type=int,
+                        help="generate DemandForecast, Inventory and ProductionPlan as shards across this many processes")
+    parser.add_argument('--out-of-core', action='store_true', default=None,
+                        help="stream fact tables to disk and aggregate them from there")
+    parser.add_argument('--features', action='store_true', default=None,
+                        help="also write the DemandFeatures ML feature store")
+    parser.add_argument('--materials-table', action='store_true', default=None,
+                        help="also write ProductionPlan's materials as the ProductionMaterial table")
+    parser.add_argument('--cache-dir', help="reuse unchanged tables from this cache")
+    parser.add_argument('--event-log', help="JSON-lines file for stage and progress events")
+    parser.add_argument('--profile-stage', help="profile this table's stage")
+    parser.add_argument('--profiler', choices=['cprofile', 'sampling'], help="profiler for --profile-stage")
+    parser.add_argument('--print-config', action='store_true', help="print the resolved config and exit")
+    return parser
+
+
+def _overrides(args):
+    """Nested config overrides for the options given on the command line"""
+    sections = {
+        'output': {'dir': args.output_dir, 'format': args.format, 'compression': args.compression},
+        'calendar': {'start_date': args.start_date, 'end_date': args.end_date,
+                     'periods': args.periods, 'granularity': args.granularity},
+        'tables': dict(args.rows or []),
+        'cache': {'dir': args.cache_dir},
+        'instrumentation': {'event_log': args.event_log, 'profile_stage': args.profile_stage,
+                            'profiler': args.profiler}
+    }
+    overrides = {section: {key: value for key, value in values.items() if value is not None}
+                 for section, values in sections.items()}
+    options = ('seed', 'workers', 'processes', 'out_of_core', 'features', 'materials_table')
+    overrides.update({key: getattr(args, key) for key in options if getattr(args, key) is not None})
+    return overrides
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Generate synthetic S&OP data and load it into SQL")
+    commands = parser.add_subparsers(dest='command', required=True)
+    add_generate_arguments(commands.add_parser('generate', help="generate the dataset"))
+    scenario_parser = commands.add_parser('scenarios', help="generate the dataset once and run what-if scenarios on it")
+    scenario_parser.add_argument('scenarios', help="YAML or TOML file listing the scenarios")
+    add_generate_arguments(scenario_parser)
+    loader.add_load_arguments(commands.add_parser('load', help="bulk-load generated tables into a database"))
+    streaming.add_stream_arguments(commands.add_parser('stream', help="emit live S&OP events at a target rate"))
+    return parser
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if not argv or argv[0] not in (*COMMANDS, '-h', '--help'):
+        argv = ['generate', *argv]
+    args = build_parser().parse_args(argv)
+
+    if args.command == 'load':
+        loader.run_load(args)
+        return 0
+    if args.command == 'stream':
+        streaming.run_stream(args)
+        return 0
+
+    config = resolve_config(args.config, args.preset, _overrides(args))
+    if args.print_config:
+        print(json.dumps(config, indent=2, default=str))
+        return 0
+
+    arguments = main_arguments(config)
+    if args.command == 'generate':
+        data_generator.main(**arguments)
+        return 0
+
+    if arguments['out_of_core'] or arguments['processes'] is not None:
+        raise SystemExit("scenarios need the base tables in memory; drop --out-of-core and --processes")
+    what_ifs = scenarios.read_scenarios(args.scenarios)
+    if arguments['seed'] is None:
+        # The base and every scenario must share one seed; draw it once and report it
+        arguments['seed'] = secrets.randbits(32)
+        print(f"Using seed {arguments['seed']}")
+    base = data_generator.main(**arguments)
+    engine = scenarios.ScenarioEngine(base, seed=arguments['seed'], sizes=arguments['sizes'],
+                                      features=arguments['features'], materials_table=arguments['materials_table'])
+    sink_options = {'compression': arguments['compression']} if 'compression' in arguments else {}
+    results = engine.run_all(what_ifs, workers=arguments['workers'], output_dir=arguments['output_dir'],
+                             output_format=arguments['output_format'], **sink_options)
+    for scenario_id, result in results.items():
+        print(f"Scenario {scenario_id} ({result.scenario.scenario_name}): changed {', '.join(result.changed)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+
+# Narrower column dtypes for the fact tables, where the schema's precision allows:
+# INTEGER columns fit int32, and bounded ratios rounded to at most 4 decimals
+# survive float32 (7 significant digits). Unbounded DECIMAL(10,2) amounts and
+# unrounded draws such as confidence_level stay float64. DemandFeatures inputs
+# are model features, which training libraries consume as float32 anyway.
+COMPACT_DTYPES = {
+    'Inventory': {
+        'quantity_on_hand': 'int32', 'quantity_on_order': 'int32', 'safety_stock_level': 'int32',
+        'reorder_point': 'int32', 'economic_order_quantity': 'int32', 'stockout_probability': 'float32',
+        'fill_rate': 'float32'
+    },
+    'ProductionPlan': {'planned_quantity': 'int32', 'setup_hours': 'float32', 'resource_efficiency': 'float32'},
+    'KPI_Dashboard': {'variance_percentage': 'float32'},
+    'DemandFeatures': {
+        'promo_days': 'int32', 'promo_discount': 'float32', 'gdp_factor': 'float32', 'inflation_factor': 'float32',
+        'seasonal_factor': 'float32', 'market_event_factor': 'float32', 'weather_impact_factor': 'float32',
+        'year': 'int32', 'quarter': 'int32', 'month': 'int32', 'week': 'int32', 'day_of_week': 'int32'
+    }
+}
+
+
+def keys(codes, dictionary):
+    """Surrogate keys: integer codes into dictionary (e.g. product IDs or calendar dates)
+
+    Stored as a pandas Categorical, whose codes take 1-4 bytes depending on
+    the dictionary size; the values themselves are only materialized when a
+    sink writes the column (see decode).
+    """
+    return pd.Categorical.from_codes(codes, categories=dictionary)
+
+
+def positions(index, values):
+    """Position of every value in index (-1 when absent), resolving each category only once"""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        lookup = index.get_indexer(values.cat.categories)
+        codes = values.cat.codes.to_numpy()
+        return np.where(codes >= 0, lookup[codes], -1)
+    return index.get_indexer(values)
+
+
+def decode(values):
+    """Plain values of a column, expanding surrogate keys through their dictionary
+
+    Goes through the categories once; converting a categorical column
+    value by value (e.g. with pd.to_datetime) is orders of magnitude slower.
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return pd.api.extensions.take(values.cat.categories.array, values.cat.codes.to_numpy(), allow_fill=True)
+    return values
+
+
+def narrow(df, table):
+    """Cast the columns of a fact table chunk to their COMPACT_DTYPES"""
+    dtypes = {column: dtype for column, dtype in COMPACT_DTYPES.get(table, {}).items() if column in df.columns}
+    return df.astype(dtypes) if dtypes else df
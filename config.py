@@ -0,0 +1,137 @@
+import copy
+import os
+
+from cache import DEFAULT_CACHE_MAX_BYTES
+from data_generator import DEFAULT_SIZES
+
+# Size parameter behind each configurable table's row count
+TABLE_SIZE_KEYS = {
+    'Product': 'num_products',
+    'Location': 'num_locations',
+    'Customer': 'num_customers',
+    'Supplier': 'num_suppliers',
+    'Resource': 'num_resources',
+    'DemandForecast': 'num_forecasts',
+    'TransportLane': 'num_lanes'
+}
+
+# Scale presets from the README's scaling recommendations (DemandForecast counts forecast series)
+PRESETS = {
+    'small': {'Product': 100, 'Location': 10, 'DemandForecast': 1000},
+    'medium': {'Product': 500, 'Location': 50, 'DemandForecast': 10000},
+    'large': {'Product': 1000, 'Location': 100, 'DemandForecast': 50000},
+}
+
+# Period lengths the time dimension supports
+GRANULARITIES = ('day', 'week', 'month')
+
+DEFAULT_CONFIG = {
+    'preset': None,
+    'seed': None,
+    'workers': 4,
+    'processes': None,
+    'out_of_core': False,
+    'features': False,
+    'materials_table': False,
+    'output': {'dir': 'sample_data', 'format': 'csv', 'compression': 'zstd'},
+    'calendar': {
+        'start_date': DEFAULT_SIZES['start_date'],
+        'end_date': None,
+        'periods': DEFAULT_SIZES['periods'],
+        'granularity': DEFAULT_SIZES['granularity']
+    },
+    'tables': {table: DEFAULT_SIZES[key] for table, key in TABLE_SIZE_KEYS.items()},
+    'cache': {'dir': None, 'max_bytes': DEFAULT_CACHE_MAX_BYTES},
+    'instrumentation': {'event_log': None, 'profile_stage': None, 'profiler': 'cprofile'}
+}
+
+
+def read_config_file(path):
+    """Parse a YAML (.yaml/.yml) or TOML (.toml) config file into a dict"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension in ('.yaml', '.yml'):
+        try:
+            import yaml
+        except ImportError:
+            raise ImportError("YAML config files require PyYAML (pip install pyyaml)") from None
+        with open(path) as f:
+            return yaml.safe_load(f) or {}
+    if extension == '.toml':
+        try:
+            import tomllib
+        except ImportError:  # Python < 3.11
+            import tomli as tomllib
+        with open(path, 'rb') as f:
+            return tomllib.load(f)
+    raise ValueError(f"Unsupported config file type: {path} (use .yaml, .yml or .toml)")
+
+
+def _merge(base, updates, path=''):
+    """Recursively overlay updates on base, rejecting keys the defaults do not know"""
+    for key, value in updates.items():
+        if key not in base:
+            raise ValueError(f"Unknown config key: {path}{key}")
+        if isinstance(base[key], dict) and isinstance(value, dict):
+            _merge(base[key], value, f'{path}{key}.')
+        else:
+            base[key] = value
+    return base
+
+
+def resolve_config(config_path=None, preset=None, overrides=None):
+    """Layer defaults, a preset, a config file and explicit overrides, in that order
+
+    The preset may come from the preset argument or the file's preset key;
+    the argument wins. overrides has the same nested shape as the file.
+    """
+    file_config = read_config_file(config_path) if config_path else {}
+    preset = preset or file_config.get('preset')
+    if preset is not None and preset not in PRESETS:
+        raise ValueError(f"Unknown preset: {preset} (choose from {', '.join(PRESETS)})")
+
+    config = copy.deepcopy(DEFAULT_CONFIG)
+    if preset is not None:
+        config['tables'].update(PRESETS[preset])
+    _merge(config, file_config)
+    _merge(config, overrides or {})
+    config['preset'] = preset
+
+    if config['calendar']['granularity'] not in GRANULARITIES:
+        raise ValueError(f"Unknown granularity: {config['calendar']['granularity']} "
+                         f"(choose from {', '.join(GRANULARITIES)})")
+    for key in ('workers', 'processes'):
+        value = config[key]
+        if (value is not None or key == 'workers') and (not isinstance(value, int) or value < 1):
+            raise ValueError(f"{key} must be a positive integer, got {value!r}")
+    for table, rows in config['tables'].items():
+        if not isinstance(rows, int) or rows < 1:
+            raise ValueError(f"Row count for {table} must be a positive integer, got {rows!r}")
+    return config
+
+
+def table_sizes(tables):
+    """Translate per-table row counts into pipeline_stages size parameters"""
+    return {TABLE_SIZE_KEYS[table]: rows for table, rows in tables.items()}
+
+
+def main_arguments(config):
+    """Keyword arguments of data_generator.main for a resolved config"""
+    calendar = config['calendar']
+    output = config['output']
+    arguments = {
+        'output_dir': output['dir'],
+        'output_format': output['format'],
+        'seed': config['seed'],
+        'workers': config['workers'],
+        'processes': config['processes'],
+        'out_of_core': config['out_of_core'],
+        'features': config['features'],
+        'materials_table': config['materials_table'],
+        'sizes': {**table_sizes(config['tables']), **calendar},
+        'cache_dir': config['cache']['dir'],
+        'cache_max_bytes': config['cache']['max_bytes'],
+        **config['instrumentation']
+    }
+    if output['format'] in ('parquet', 'arrow'):
+        arguments['compression'] = output['compression']
+    return arguments
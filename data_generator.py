@@ -1,159 +1,244 @@
 import os
+import sys
 import pandas as pd
 import numpy as np
-from faker import Faker
 import datetime
 import math
-import random
+from itertools import repeat
+from statistics import NormalDist
 
-# Initialize Faker
-fake = Faker()
+from cache import DEFAULT_CACHE_MAX_BYTES, TableCache
+from event_index import EventIndex
+from features import FEATURE_LAGS, ROLLING_WINDOWS, demand_features
+from instrumentation import Instrumentation
+from compact import keys, narrow, positions
+from kpi import FACT_COLUMNS, KpiCube, kpi_rows
+from pipeline import Stage, critical_path, run_stages
+from propagation import LEAD_TIME_STRETCH, CellFactors, SourcingMap, supplier_severity
+from seeding import table_int_seed, table_rng
+from sharding import run_shards, shard_bounds
+from sinks import CsvSink, DEFAULT_CHUNK_ROWS, NullSink, make_sink
+from sources import TableSource
+from timeline import Calendar, period_dates
+from vocabulary import categorical, company_names, draw, faker_pool, id_strings, pool_size, product_names
 
-# Create output directory if it doesn't exist
-os.makedirs('sample_data', exist_ok=True)
+# Default shard sizes for multi-process generation; fixed so output does not depend on workers
+DEFAULT_SHARD_PRODUCTS = 8
+DEFAULT_SHARD_SERIES = 1000
 
-def generate_product_data(num_products=100):
+# Table sizes and horizon of a full run
+DEFAULT_SIZES = {
+    'num_products': 100,
+    'num_locations': 20,
+    'num_customers': 50,
+    'num_suppliers': 30,
+    'num_resources': 40,
+    'start_date': '2023-01-01',
+    'end_date': None,
+    'periods': 36,
+    'granularity': 'month',
+    'num_forecasts': 1000,
+    'num_lanes': 50
+}
+
+# Fact tables main(out_of_core=True) streams to disk and hands downstream as TableSource
+OUT_OF_CORE_TABLES = ('DemandForecast', 'Inventory', 'ProductionPlan', 'DemandFeatures')
+
+# Fact tables main(processes=N) generates as shards across worker processes
+SHARDED_TABLES = ('DemandForecast', 'Inventory', 'ProductionPlan')
+
+# Upper bound on the suppliers a product is sourced from
+MAX_SOURCES = 3
+
+# SupplyImpact factor columns, as (capacity, lead time) multipliers
+SUPPLY_FACTOR_COLUMNS = ['capacity_factor', 'lead_time_factor']
+
+# Upper bound on the materials listed in a production plan's resource requirements
+MAX_MATERIALS = 3
+
+# External factor columns that multiply into demand
+EXTERNAL_FACTOR_COLUMNS = [
+    'gdp_factor', 'inflation_factor', 'seasonal_factor',
+    'market_event_factor', 'weather_impact_factor'
+]
+
+# TimeDimension attributes copied into the DemandFeatures feature store
+CALENDAR_FEATURES = ['year', 'quarter', 'month', 'week', 'day_of_week', 'is_holiday']
+
+def _resolve_sink(sink):
+    """Fall back to CSV files in sample_data/ when no sink is given"""
+    return CsvSink('sample_data') if sink is None else sink
+
+def _emit(table, chunks, sink, stream):
+    """Stream chunks to the sink, or collect them into one DataFrame
+    
+    In streaming mode only one chunk is alive at a time and nothing is
+    returned; otherwise the concatenated table is written and returned.
+    """
+    sink = _resolve_sink(sink)
+    chunks = sink.track(table, chunks)
+    if stream:
+        sink.write_chunks(table, chunks)
+        return None
+    frames = list(chunks)
+    df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    sink.write(table, df)
+    return df
+
+def _iter_chunks(table, chunk_rows, columns=None):
+    """Chunks of a DataFrame, or of a TableSource scanned lazily from disk
+    
+    Stages that only aggregate a table take either, so fact tables larger
+    than memory can be passed as sources.
+    """
+    if isinstance(table, TableSource):
+        yield from table.chunks(columns, chunk_rows)
+        return
+    for start in range(0, len(table), chunk_rows):
+        yield table.iloc[start:start + chunk_rows]
+
+def _faker(seed, table):
+    """Faker seeded for one table; a fresh instance per call keeps concurrent stages independent"""
+    # Imported here so importing this module stays cheap for callers that never need Faker
+    from faker import Faker
+    fake = Faker()
+    fake.seed_instance(table_int_seed(seed, table))
+    return fake
+
+def _chunk_bounds(num_items, rows_per_item, chunk_rows):
+    """Split num_items into (start, stop) blocks of at most chunk_rows rows"""
+    step = max(1, chunk_rows // max(1, rows_per_item))
+    for start in range(0, num_items, step):
+        yield start, min(start + step, num_items)
+
+def generate_product_data(num_products=100, seed=None, sink=None):
     """Generate synthetic product data"""
-    products = []
+    rng = table_rng(seed, 'Product')
+    fake = _faker(seed, 'Product')
     categories = ['Electronics', 'Clothing', 'Food', 'Furniture', 'Automotive']
     lifecycle_stages = ['New', 'Growth', 'Mature', 'Decline']
     
-    for i in range(num_products):
-        products.append({
-            'product_id': f'P{i:04d}',
-            'product_name': fake.product_name(),
-            'product_category': random.choice(categories),
-            'product_lifecycle_stage': random.choice(lifecycle_stages),
-            'unit_cost': round(random.uniform(10, 1000), 2),
-            'lead_time_days': random.randint(1, 30),
-            'min_order_quantity': random.randint(10, 100),
-            'pack_size': random.choice([1, 6, 12, 24, 48])
-        })
-    
-    df = pd.DataFrame(products)
-    df.to_csv('sample_data/Product.csv', index=False)
-    print(f"Generated {os.path.abspath('sample_data/Product.csv')}")
+    df = pd.DataFrame({
+        'product_id': id_strings('P', num_products),
+        'product_name': product_names(rng, fake, num_products),
+        'product_category': categorical(rng, categories, num_products),
+        'product_lifecycle_stage': categorical(rng, lifecycle_stages, num_products),
+        'unit_cost': np.round(rng.uniform(10, 1000, num_products), 2),
+        'lead_time_days': rng.integers(1, 31, num_products),
+        'min_order_quantity': rng.integers(10, 101, num_products),
+        'pack_size': rng.choice([1, 6, 12, 24, 48], num_products)
+    })
+    _resolve_sink(sink).write('Product', df)
     return df
 
-def generate_location_data(num_locations=20):
+def generate_location_data(num_locations=20, seed=None, sink=None):
     """Generate synthetic location data"""
-    locations = []
+    rng = table_rng(seed, 'Location')
+    fake = _faker(seed, 'Location')
     location_types = ['DC', 'Store', 'Plant', 'Supplier']
+    regions = ['North', 'South', 'East', 'West', 'Central']
     
-    for i in range(num_locations):
-        locations.append({
-            'location_id': f'L{i:04d}',
-            'location_name': fake.city(),
-            'location_type': random.choice(location_types),
-            'storage_capacity': random.randint(1000, 10000),
-            'handling_capacity': random.randint(100, 1000),
-            'operating_cost': round(random.uniform(1000, 5000), 2)
-        })
-    
-    df = pd.DataFrame(locations)
-    df.to_csv('sample_data/Location.csv', index=False)
-    print(f"Generated {os.path.abspath('sample_data/Location.csv')}")
+    df = pd.DataFrame({
+        'location_id': id_strings('L', num_locations),
+        'location_name': draw(rng, faker_pool(fake, 'city', pool_size(num_locations)), num_locations),
+        'location_type': categorical(rng, location_types, num_locations),
+        'storage_capacity': rng.integers(1000, 10001, num_locations),
+        'handling_capacity': rng.integers(100, 1001, num_locations),
+        'operating_cost': np.round(rng.uniform(1000, 5000, num_locations), 2)
+    })
+    # Drawn last so the other columns keep their values
+    df['region'] = categorical(rng, regions, num_locations)
+    _resolve_sink(sink).write('Location', df)
     return df
 
-def generate_customer_data(num_customers=50):
+def generate_customer_data(num_customers=50, seed=None, sink=None):
     """Generate synthetic customer data"""
-    customers = []
+    rng = table_rng(seed, 'Customer')
+    fake = _faker(seed, 'Customer')
     segments = ['Retail', 'Wholesale', 'Online', 'Direct']
     regions = ['North', 'South', 'East', 'West', 'Central']
     
-    for i in range(num_customers):
-        customers.append({
-            'customer_id': f'C{i:04d}',
-            'customer_name': fake.company(),
-            'segment': random.choice(segments),
-            'region': random.choice(regions),
-            'credit_score': round(random.uniform(300, 850), 2),
-            'payment_terms': random.choice([30, 45, 60, 90])
-        })
-    
-    df = pd.DataFrame(customers)
-    df.to_csv('sample_data/Customer.csv', index=False)
-    print(f"Generated {os.path.abspath('sample_data/Customer.csv')}")
+    df = pd.DataFrame({
+        'customer_id': id_strings('C', num_customers),
+        'customer_name': company_names(rng, fake, num_customers),
+        'segment': categorical(rng, segments, num_customers),
+        'region': categorical(rng, regions, num_customers),
+        'credit_score': np.round(rng.uniform(300, 850, num_customers), 2),
+        'payment_terms': rng.choice([30, 45, 60, 90], num_customers)
+    })
+    _resolve_sink(sink).write('Customer', df)
     return df
 
-def generate_supplier_data(num_suppliers=30):
+def generate_supplier_data(num_suppliers=30, seed=None, sink=None):
     """Generate synthetic supplier data"""
-    suppliers = []
-    
-    for i in range(num_suppliers):
-        suppliers.append({
-            'supplier_id': f'S{i:04d}',
-            'supplier_name': fake.company(),
-            'reliability_score': round(random.uniform(0.6, 1.0), 2),
-            'capacity': random.randint(1000, 5000),
-            'lead_time_variability': round(random.uniform(0.1, 0.5), 2)
-        })
+    rng = table_rng(seed, 'Supplier')
+    fake = _faker(seed, 'Supplier')
     
-    df = pd.DataFrame(suppliers)
-    df.to_csv('sample_data/Supplier.csv', index=False)
-    print(f"Generated {os.path.abspath('sample_data/Supplier.csv')}")
+    df = pd.DataFrame({
+        'supplier_id': id_strings('S', num_suppliers),
+        'supplier_name': company_names(rng, fake, num_suppliers),
+        'reliability_score': np.round(rng.uniform(0.6, 1.0, num_suppliers), 2),
+        'capacity': rng.integers(1000, 5001, num_suppliers),
+        'lead_time_variability': np.round(rng.uniform(0.1, 0.5, num_suppliers), 2)
+    })
+    _resolve_sink(sink).write('Supplier', df)
     return df
 
-def generate_resource_data(num_resources=40):
+def generate_resource_data(num_resources=40, seed=None, sink=None):
     """Generate synthetic resource data"""
-    resources = []
+    rng = table_rng(seed, 'Resource')
     resource_types = ['Machine', 'Vehicle', 'Worker', 'Tool']
     
-    for i in range(num_resources):
-        resources.append({
-            'resource_id': f'R{i:04d}',
-            'resource_type': random.choice(resource_types),
-            'capacity': random.randint(100, 1000),
-            'efficiency': round(random.uniform(0.7, 1.0), 2),
-            'cost_per_hour': round(random.uniform(50, 200), 2)
-        })
-    
-    df = pd.DataFrame(resources)
-    df.to_csv('sample_data/Resource.csv', index=False)
-    print(f"Generated {os.path.abspath('sample_data/Resource.csv')}")
+    df = pd.DataFrame({
+        'resource_id': id_strings('R', num_resources),
+        'resource_type': categorical(rng, resource_types, num_resources),
+        'capacity': rng.integers(100, 1001, num_resources),
+        'efficiency': np.round(rng.uniform(0.7, 1.0, num_resources), 2),
+        'cost_per_hour': np.round(rng.uniform(50, 200, num_resources), 2)
+    })
+    _resolve_sink(sink).write('Resource', df)
     return df
 
-def generate_time_dimension(start_date='2023-01-01', periods=36):
-    """Generate time dimension data"""
-    dates = pd.date_range(start=start_date, periods=periods, freq='M')
-    time_data = []
-    
-    for date in dates:
-        time_data.append({
-            'date_id': date.strftime('%Y-%m-%d'),
-            'year': date.year,
-            'quarter': date.quarter,
-            'month': date.month,
-            'week': date.weekofyear if hasattr(date, 'weekofyear') else date.isocalendar()[1],
-            'day_of_week': date.dayofweek,
-            'is_holiday': random.random() < 0.1,
-            'is_business_day': date.dayofweek < 5
-        })
+def generate_time_dimension(start_date='2023-01-01', periods=36, granularity='month', end_date=None,
+                            seed=None, sink=None):
+    """Generate time dimension data
     
-    df = pd.DataFrame(time_data)
-    df.to_csv('sample_data/TimeDimension.csv', index=False)
-    print(f"Generated {os.path.abspath('sample_data/TimeDimension.csv')}")
+    One row per day, week (ending Sunday) or month end from start_date;
+    end_date, when given, bounds the range instead of periods. Calendar
+    attributes (weekends, seasons, US federal holidays, business days) are
+    computed as columns, so multi-year daily calendars cost milliseconds.
+    """
+    df = Calendar(period_dates(start_date, periods, granularity, end_date), granularity).table()
+    _resolve_sink(sink).write('TimeDimension', df)
     return df
 
-def generate_external_factors(start_date, periods):
-    """Generate external factors that influence demand"""
-    dates = pd.date_range(start=start_date, periods=periods, freq='D')
+def generate_external_factors(start_date, periods, granularity='day', seed=None, sink=None):
+    """Generate external factors that influence demand
+    
+    One row per period of the given granularity, so the factors line up
+    with a time dimension built from the same start_date and periods.
+    """
+    rng = table_rng(seed, 'ExternalFactors')
+    calendar = Calendar(period_dates(start_date, periods, granularity), granularity)
+    dates = calendar.dates
+    periods = len(calendar)
     
     # Economic indicators
-    gdp_trend = np.linspace(1, 1.2, periods) + np.random.normal(0, 0.02, periods)
-    inflation = np.random.normal(0.02, 0.005, periods).cumsum()
+    gdp_trend = np.linspace(1, 1.2, periods) + rng.normal(0, 0.02, periods)
+    inflation = rng.normal(0.02, 0.005, periods).cumsum()
     
-    # Seasonal factors
-    season_effect = np.sin(np.linspace(0, 4*np.pi, periods)) * 0.15
+    # Seasonal factors follow the day of the year
+    season_effect = np.sin(2 * np.pi * dates.dayofyear.to_numpy() / 365.25) * 0.15
     
     # Market events
     market_events = np.zeros(periods)
-    event_points = np.random.choice(periods, size=int(periods*0.05), replace=False)
-    market_events[event_points] = np.random.uniform(0.1, 0.3, size=len(event_points))
+    event_points = rng.choice(periods, size=int(periods*0.05), replace=False)
+    market_events[event_points] = rng.uniform(0.1, 0.3, size=len(event_points))
     
-    # Weather impact
-    weather_impact = np.random.normal(0, 0.1, periods)
-    weather_impact = pd.Series(weather_impact).rolling(window=7).mean()
+    # Weather impact, smoothed over about a week
+    window = max(1, round(7 / calendar.period_days.mean())) if periods else 1
+    weather_impact = rng.normal(0, 0.1, periods)
+    weather_impact = pd.Series(weather_impact).rolling(window=window, min_periods=1).mean()
     
     factors_df = pd.DataFrame({
         'date': dates,
@@ -164,440 +249,1134 @@ def generate_external_factors(start_date, periods):
         'weather_impact_factor': 1 + weather_impact
     })
     
-    factors_df.to_csv('sample_data/ExternalFactors.csv', index=False)
+    _resolve_sink(sink).write('ExternalFactors', factors_df)
     return factors_df
 
-def generate_promotion_calendar(start_date, periods, num_products):
-    """Generate promotional events calendar"""
+def generate_promotion_calendar(start_date, periods, num_products, seed=None, sink=None):
+    """Generate promotional events calendar over periods days from start_date"""
+    rng = table_rng(seed, 'PromotionCalendar')
     dates = pd.date_range(start=start_date, periods=periods, freq='D')
-    promotions = []
-    
     promotion_types = ['Price Discount', 'BOGO', 'Bundle Deal', 'Flash Sale']
     
     # Generate promotions for random products and dates
-    for _ in range(int(periods * 0.2)):  # 20% of days have promotions
-        promo_date = np.random.choice(dates)
-        product_id = f'P{random.randint(0, num_products-1):04d}'
-        promo_type = random.choice(promotion_types)
-        discount = random.uniform(0.1, 0.5)
-        duration = random.randint(1, 14)
-        
-        promotions.append({
-            'date': promo_date,
-            'product_id': product_id,
-            'promotion_type': promo_type,
-            'discount_factor': discount,
-            'duration_days': duration
-        })
-    
-    promo_df = pd.DataFrame(promotions)
-    promo_df.to_csv('sample_data/PromotionCalendar.csv', index=False)
+    count = int(periods * 0.2)  # 20% of days have promotions
+    promo_df = pd.DataFrame({
+        'date': dates[rng.integers(0, periods, count)],
+        'product_id': id_strings('P', num_products)[rng.integers(0, num_products, count)],
+        'promotion_type': categorical(rng, promotion_types, count),
+        'discount_factor': rng.uniform(0.1, 0.5, count),
+        'duration_days': rng.integers(1, 15, count)
+    })
+    _resolve_sink(sink).write('PromotionCalendar', promo_df)
     return promo_df
 
-def generate_supply_disruptions(start_date, periods, num_suppliers):
-    """Generate supply chain disruption events"""
+def generate_supply_disruptions(start_date, periods, num_suppliers, seed=None, sink=None):
+    """Generate supply chain disruption events over periods days from start_date"""
+    rng = table_rng(seed, 'SupplyDisruptions')
     dates = pd.date_range(start=start_date, periods=periods, freq='D')
-    disruptions = []
-    
     disruption_types = ['Port Delay', 'Production Issue', 'Natural Disaster', 'Labor Strike']
     
     # Generate random disruption events
-    for _ in range(int(periods * 0.05)):  # 5% of days have disruptions
-        disruption_date = np.random.choice(dates)
-        supplier_id = f'S{random.randint(0, num_suppliers-1):04d}'
-        disruption_type = random.choice(disruption_types)
-        severity = random.uniform(0.3, 1.0)
-        duration = random.randint(1, 30)
-        
-        disruptions.append({
-            'date': disruption_date,
-            'supplier_id': supplier_id,
-            'disruption_type': disruption_type,
-            'severity_factor': severity,
-            'duration_days': duration
+    count = int(periods * 0.05)  # 5% of days have disruptions
+    disruption_df = pd.DataFrame({
+        'date': dates[rng.integers(0, periods, count)],
+        'supplier_id': id_strings('S', num_suppliers)[rng.integers(0, num_suppliers, count)],
+        'disruption_type': categorical(rng, disruption_types, count),
+        'severity_factor': rng.uniform(0.3, 1.0, count),
+        'duration_days': rng.integers(1, 31, count)
+    })
+    _resolve_sink(sink).write('SupplyDisruptions', disruption_df)
+    return disruption_df
+
+def _distinct_draws(rng, population, rows, k):
+    """(rows x k) draws from range(population), distinct within each row
+    
+    Draw j picks a rank among the population - j values not yet drawn and
+    skips over the earlier picks in ascending order, so no row is redrawn.
+    """
+    picks = np.empty((rows, k), dtype=np.int64)
+    for j in range(k):
+        values = rng.integers(0, population - j, rows)
+        for earlier in np.sort(picks[:, :j], axis=1).T:
+            values += values >= earlier
+        picks[:, j] = values
+    return picks
+
+def generate_product_sourcing(products_df, locations_df, suppliers_df, max_sources=MAX_SOURCES, seed=None,
+                              sink=None):
+    """Generate the supplier -> product -> location sourcing map
+    
+    Each product is bought from 1 to max_sources distinct suppliers, and
+    every location splits its supply of the product among them with random
+    shares summing to one. Locations sharing a product's suppliers are hit
+    by the same disruptions, which correlates stockouts across the network.
+    """
+    rng = table_rng(seed, 'ProductSourcing')
+    product_ids = products_df['product_id'].to_numpy()
+    location_ids = locations_df['location_id'].to_numpy()
+    supplier_ids = suppliers_df['supplier_id'].to_numpy()
+    num_products, num_locations = len(product_ids), len(location_ids)
+    width = min(max_sources, len(supplier_ids))
+    
+    # Candidate suppliers per product, and how many of them each product uses
+    candidates = _distinct_draws(rng, len(supplier_ids), num_products, width)
+    num_sources = rng.integers(1, width + 1, num_products) if width else np.zeros(num_products, dtype=np.int64)
+    
+    # Shares per (product, location) pair over the product's suppliers
+    pair_product = np.repeat(np.arange(num_products), num_locations)
+    used = np.arange(width)[None, :] < num_sources[pair_product][:, None]
+    weights = rng.uniform(0.2, 1.0, (len(pair_product), width)) * used
+    shares = weights / np.maximum(weights.sum(axis=1, keepdims=True), 1e-12)
+    
+    pair_rows, slots = np.nonzero(used)
+    df = pd.DataFrame({
+        'supplier_id': keys(candidates[pair_product[pair_rows], slots], supplier_ids),
+        'product_id': keys(pair_product[pair_rows], product_ids),
+        'location_id': keys(pair_rows % max(1, num_locations), location_ids),
+        'share': shares[pair_rows, slots].round(4)
+    })
+    _resolve_sink(sink).write('ProductSourcing', df)
+    return df
+
+def _iter_supply_impact_chunks(sourcing, severity, dates, product_ids, location_ids, chunk_rows):
+    """Yield SupplyImpact rows for the disrupted cells of blocks of (product, location) pairs"""
+    num_periods = len(dates)
+    num_locations = len(location_ids)
+    for start, stop in _chunk_bounds(len(product_ids) * num_locations, num_periods, chunk_rows):
+        impact = sourcing.impact(severity, start, stop)
+        pair, period = np.nonzero(impact)
+        pairs = start + pair
+        impact = impact[pair, period]
+        yield pd.DataFrame({
+            'date': keys(period, dates),
+            'product_id': keys(pairs // num_locations, product_ids),
+            'location_id': keys(pairs % num_locations, location_ids),
+            'capacity_factor': (1 - impact).round(4),
+            'lead_time_factor': (1 + LEAD_TIME_STRETCH * impact).round(4)
         })
+
+def generate_supply_impact(sourcing_df, disruptions_df, time_df, products_df, locations_df, suppliers_df,
+                           seed=None, sink=None, stream=False, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Propagate supplier disruptions to (product, location, period) supply factors
     
-    disruption_df = pd.DataFrame(disruptions)
-    disruption_df.to_csv('sample_data/SupplyDisruptions.csv', index=False)
-    return disruption_df
+    A supplier's disruption severity per period (see
+    propagation.supplier_severity) reaches every pair it sources in
+    proportion to its share. Pairs lose that fraction of their replenishment
+    capacity (capacity_factor) and wait longer for orders (lead_time_factor).
+    Only disrupted cells are written; all other cells have factor 1.
+    """
+    calendar = Calendar.from_time_dimension(time_df)
+    product_ids = products_df['product_id'].to_numpy()
+    location_ids = locations_df['location_id'].to_numpy()
+    supplier_ids = suppliers_df['supplier_id'].to_numpy()
+    sourcing = SourcingMap(sourcing_df, product_ids, location_ids, supplier_ids)
+    severity = supplier_severity(disruptions_df, supplier_ids, calendar)
+    chunks = _iter_supply_impact_chunks(sourcing, severity, calendar.dates, product_ids, location_ids, chunk_rows)
+    return _emit('SupplyImpact', chunks, sink, stream)
+
+def _supply_factors(supply_impact, product_ids, location_ids, calendar, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """(capacity, lead time) CellFactors of a SupplyImpact table or source, or None without one"""
+    if supply_impact is None:
+        return None
+    columns = ['date', 'product_id', 'location_id', *SUPPLY_FACTOR_COLUMNS]
+    return tuple(CellFactors.from_chunks(_iter_chunks(supply_impact, chunk_rows, columns), SUPPLY_FACTOR_COLUMNS,
+                                         product_ids, location_ids, calendar))
+
+def _external_impact(external_factors, calendar):
+    """Combined external factor multiplier for each period (1.0 where no factors exist)
+    
+    Factor rows are placed by period offset; several rows in one period
+    (e.g. daily factors against a monthly calendar) are averaged.
+    """
+    positions = calendar.index(external_factors['date'])
+    known = positions >= 0
+    impact = external_factors[EXTERNAL_FACTOR_COLUMNS].prod(axis=1).to_numpy()[known]
+    counts = np.bincount(positions[known], minlength=len(calendar))
+    sums = np.bincount(positions[known], weights=impact, minlength=len(calendar))
+    return np.divide(sums, counts, out=np.ones(len(calendar)), where=counts > 0)
+
+def _promotion_lift(promotions, calendar, product_ids):
+    """Promotion multiplier as a (products x periods) array
+    
+    Discounts are tracked per day and averaged over each period, so a
+    three-day promotion lifts a month by a tenth of what it lifts a day.
+    """
+    if promotions.empty:
+        return np.ones((len(product_ids), len(calendar)))
+    daily = EventIndex.from_promotions(promotions).mean_value_matrix(calendar.days, product_ids)
+    return 1 + calendar.aggregate_days(daily)
 
-def generate_demand_forecast(products_df, locations_df, time_df, num_forecasts=1000):
-    """Generate synthetic demand forecast data with realistic patterns"""
-    forecasts = []
+def _demand_arrays(rng, dates, num_series, num_locations, external_impact, promo_lift):
+    """Build demand for all series at once as (series x periods) arrays
+    
+    Returns the product index sampled for each series, the location index
+    sampled for each series, the demand matrix and the confidence matrix.
+    """
+    num_products, num_periods = promo_lift.shape
+    
+    # Per-series parameters
+    product_idx = rng.integers(0, num_products, num_series)
+    location_idx = rng.integers(0, num_locations, num_series)
+    base_demand = rng.uniform(100, 1000, num_series)[:, None]
+    trend = rng.uniform(-0.2, 0.3, num_series)[:, None]
+    seasonality = rng.uniform(0.1, 0.4, num_series)[:, None]
+    noise_level = rng.uniform(0.05, 0.15, num_series)[:, None]
+    
+    # Per-period drivers
+    time_factor = ((dates - dates.min()).days.to_numpy() / 365)[None, :]
+    day_of_year = dates.dayofyear.to_numpy()[None, :]
+    
+    demand = (
+        base_demand
+        * (1 + trend * time_factor)
+        * (1 + seasonality * np.sin(2 * np.pi * day_of_year / 365))
+        * external_impact[None, :]
+        * promo_lift[product_idx]
+    )
+    demand = np.maximum(0, demand + rng.standard_normal(demand.shape) * noise_level * demand)
+    confidence = rng.uniform(0.6, 0.95, (num_series, num_periods))
+    return product_idx, location_idx, demand, confidence
+
+def _iter_demand_chunks(rng, dates, product_ids, location_ids, num_forecasts,
+                        external_impact, promo_lift, chunk_rows):
+    """Yield DemandForecast rows in blocks of whole series, keyed by calendar, product and location codes"""
+    num_periods = len(dates)
+    period_idx = np.arange(num_periods)
+    for start, stop in _chunk_bounds(num_forecasts, num_periods, chunk_rows):
+        num_series = stop - start
+        product_idx, location_idx, demand, confidence = _demand_arrays(
+            rng, dates, num_series, len(location_ids), external_impact, promo_lift
+        )
+        yield narrow(pd.DataFrame({
+            'date': keys(np.tile(period_idx, num_series), dates),
+            'product_id': keys(np.repeat(product_idx, num_periods), product_ids),
+            'location_id': keys(np.repeat(location_idx, num_periods), location_ids),
+            'forecast_quantity': demand.ravel().round(2),
+            'confidence_level': confidence.ravel()
+        }), 'DemandForecast')
+
+def generate_demand_forecast(products_df, locations_df, time_df, num_forecasts=1000, seed=None,
+                             sink=None, stream=False, chunk_rows=DEFAULT_CHUNK_ROWS,
+                             external_factors=None, promotions=None):
+    """Generate synthetic demand forecast data with realistic patterns
+    
+    Trend, seasonality, external impact, promotion lift and noise are built
+    for every series in one pass as (series x periods) arrays, so the cost is
+    a handful of NumPy operations rather than a Python loop per cell.
+    With stream=True the table is written in chunks of about chunk_rows rows
+    and None is returned. External factors and promotions are generated
+    unless passed in.
+    """
+    rng = table_rng(seed, 'DemandForecast')
+    calendar = Calendar.from_time_dimension(time_df)
     
     # Get external factors
-    external_factors = generate_external_factors(time_df['date'].min(), len(time_df))
-    promotions = generate_promotion_calendar(time_df['date'].min(), len(time_df), len(products_df))
+    if external_factors is None:
+        external_factors = generate_external_factors(seed=seed, sink=sink, **_factor_horizon(calendar))
+    if promotions is None:
+        promotions = generate_promotion_calendar(num_products=len(products_df), seed=seed, sink=sink,
+                                                 **_event_horizon(calendar))
     
-    for _ in range(num_forecasts):
-        product = products_df.sample(n=1).iloc[0]
-        location = locations_df.sample(n=1).iloc[0]
-        
-        # Base demand parameters
-        base_demand = random.uniform(100, 1000)
-        trend = random.uniform(-0.2, 0.3)
-        seasonality = random.uniform(0.1, 0.4)
-        noise_level = random.uniform(0.05, 0.15)
-        
-        for _, time_row in time_df.iterrows():
-            date = time_row['date']
-            
-            # Calculate trend component
-            time_factor = (date - time_df['date'].min()).days / 365
-            trend_component = (1 + trend * time_factor)
-            
-            # Calculate seasonal component
-            day_of_year = date.dayofyear
-            seasonal_component = 1 + seasonality * np.sin(2 * np.pi * day_of_year / 365)
-            
-            # Get external factors for this date
-            date_factors = external_factors[external_factors['date'] == date].iloc[0]
-            external_impact = (
-                date_factors['gdp_factor'] *
-                date_factors['inflation_factor'] *
-                date_factors['seasonal_factor'] *
-                date_factors['market_event_factor'] *
-                date_factors['weather_impact_factor']
-            )
-            
-            # Check for promotions
-            promo_impact = 1.0
-            active_promos = promotions[
-                (promotions['product_id'] == product['product_id']) &
-                (promotions['date'] <= date) &
-                (promotions['date'] + pd.Timedelta(days=promotions['duration_days']) >= date)
-            ]
-            if not active_promos.empty:
-                promo_impact = 1 + active_promos['discount_factor'].mean()
-            
-            # Calculate final demand
-            demand = base_demand * trend_component * seasonal_component * external_impact * promo_impact
-            
-            # Add noise
-            noise = np.random.normal(0, noise_level * demand)
-            demand = max(0, demand + noise)
-            
-            forecasts.append({
-                'date': date,
-                'product_id': product['product_id'],
-                'location_id': location['location_id'],
-                'forecast_quantity': round(demand, 2),
-                'confidence_level': random.uniform(0.6, 0.95)
-            })
-    
-    df = pd.DataFrame(forecasts)
-    df.to_csv('sample_data/DemandForecast.csv', index=False)
-    print(f"Generated {os.path.abspath('sample_data/DemandForecast.csv')}")
-    return df
+    product_ids = products_df['product_id'].to_numpy()
+    chunks = _iter_demand_chunks(
+        rng, calendar.dates, product_ids, locations_df['location_id'].to_numpy(), num_forecasts,
+        _external_impact(external_factors, calendar),
+        _promotion_lift(promotions, calendar, product_ids),
+        chunk_rows
+    )
+    return _emit('DemandForecast', chunks, sink, stream)
+
+def _demand_forecast_stage(products_df, locations_df, time_df, external_factors, promotions, **kwargs):
+    """generate_demand_forecast with external factors and promotions as positional inputs"""
+    return generate_demand_forecast(products_df, locations_df, time_df, external_factors=external_factors,
+                                    promotions=promotions, **kwargs)
 
-def generate_transport_lanes(locations_df, num_lanes=50):
-    """Generate synthetic transport lane data"""
-    lanes = []
+def generate_transport_lanes(locations_df, num_lanes=50, seed=None, sink=None):
+    """Generate synthetic transport lane data
+    
+    Lanes are distinct (origin, destination, transport_mode) triples, as the
+    schema's unique_lane constraint requires: num_lanes codes are drawn
+    without replacement from every possible triple and decoded, so the
+    table stays unique at any size up to the number of possible lanes.
+    """
+    rng = table_rng(seed, 'TransportLane')
     transport_modes = ['Road', 'Rail', 'Air', 'Sea']
+    location_ids = locations_df['location_id'].to_numpy()
+    num_locations = len(location_ids)
+    possible = num_locations * (num_locations - 1) * len(transport_modes)
+    if num_lanes > possible:
+        raise ValueError(f"Cannot generate {num_lanes} unique lanes between {num_locations} locations "
+                         f"(at most {possible})")
     
-    for i in range(num_lanes):
-        # Select random origin and destination
-        origin, destination = locations_df.sample(n=2).iloc
-        
-        lanes.append({
-            'lane_id': f'TL{i:04d}',
-            'origin_id': origin['location_id'],
-            'destination_id': destination['location_id'],
-            'transport_mode': random.choice(transport_modes),
-            'transit_time': random.randint(1, 10),
-            'cost_per_unit': round(random.uniform(5, 50), 2),
-            'capacity': random.randint(1000, 5000),
-            'reliability': round(random.uniform(0.8, 1.0), 2)
-        })
+    # Lane code = (origin * (num_locations - 1) + destination offset) * modes + mode
+    codes = rng.choice(possible, size=num_lanes, replace=False) if num_lanes else np.empty(0, dtype=np.int64)
+    pairs, mode = np.divmod(codes, len(transport_modes))
+    origin, offset = np.divmod(pairs, max(1, num_locations - 1))
+    destination = offset + (offset >= origin)
     
-    df = pd.DataFrame(lanes)
-    df.to_csv('sample_data/TransportLane.csv', index=False)
-    print(f"Generated {os.path.abspath('sample_data/TransportLane.csv')}")
+    df = pd.DataFrame({
+        'lane_id': id_strings('TL', num_lanes),
+        'origin_id': location_ids[origin],
+        'destination_id': location_ids[destination],
+        'transport_mode': pd.Categorical.from_codes(mode, categories=transport_modes),
+        'distance_km': rng.uniform(50, 3000, num_lanes).round(2),
+        'transit_time': rng.integers(1, 11, num_lanes),
+        'cost_per_unit': rng.uniform(5, 50, num_lanes).round(2),
+        'cost_per_km': rng.uniform(0.5, 5, num_lanes).round(2),
+        'capacity': rng.integers(1000, 5001, num_lanes),
+        'capacity_volume_m3': rng.integers(10, 101, num_lanes),
+        'reliability': rng.uniform(0.8, 1.0, num_lanes).round(2)
+    })
+    _resolve_sink(sink).write('TransportLane', df)
     return df
 
-def generate_inventory_data(products_df, locations_df, time_df):
-    """Generate inventory data with optimization metrics"""
-    inventory_records = []
-    
-    for _, product in products_df.iterrows():
-        for _, location in locations_df.iterrows():
-            # Base inventory parameters
-            base_stock = random.randint(50, 500)
-            demand_variability = random.uniform(0.1, 0.4)
-            lead_time = product['lead_time_days']
-            service_level = random.uniform(0.9, 0.99)
-            
-            # Calculate safety stock using statistical method
-            z_score = np.abs(np.random.normal(2, 0.5))  # Approximation for service levels
-            safety_stock = int(z_score * np.sqrt(lead_time) * demand_variability * base_stock)
-            
-            # Calculate reorder point
-            avg_daily_demand = base_stock / 30  # Approximation
-            reorder_point = int(avg_daily_demand * lead_time + safety_stock)
-            
-            # Calculate EOQ (Economic Order Quantity)
-            annual_demand = avg_daily_demand * 365
-            ordering_cost = random.uniform(50, 200)
-            holding_cost_rate = random.uniform(0.1, 0.3)
-            holding_cost = product['unit_cost'] * holding_cost_rate
-            eoq = int(np.sqrt((2 * annual_demand * ordering_cost) / holding_cost))
-            
-            for _, time_row in time_df.iterrows():
-                date = time_row['date']
-                
-                # Generate inventory levels with realistic patterns
-                days_passed = (date - time_df['date'].min()).days
-                cycle_position = days_passed % (eoq / avg_daily_demand)
-                cycle_ratio = cycle_position / (eoq / avg_daily_demand)
-                
-                # Inventory follows a sawtooth pattern with some noise
-                inventory_level = int(max(0, eoq * (1 - cycle_ratio) + np.random.normal(0, safety_stock * 0.1)))
-                
-                # Calculate inventory metrics
-                turns = annual_demand / max(1, inventory_level)
-                days_of_supply = max(1, inventory_level) / avg_daily_demand
-                carrying_cost = inventory_level * product['unit_cost'] * (holding_cost_rate / 365) * 30  # Monthly
-                
-                inventory_records.append({
-                    'date': date,
-                    'product_id': product['product_id'],
-                    'location_id': location['location_id'],
-                    'quantity_on_hand': inventory_level,
-                    'safety_stock_level': safety_stock,
-                    'reorder_point': reorder_point,
-                    'economic_order_quantity': eoq,
-                    'inventory_turns': round(turns, 2),
-                    'days_of_supply': round(days_of_supply, 2),
-                    'carrying_cost': round(carrying_cost, 2),
-                    'stockout_probability': round(1 - service_level, 4),
-                    'fill_rate': round(random.uniform(service_level - 0.05, service_level), 4)
-                })
-    
-    df = pd.DataFrame(inventory_records)
-    df.to_csv('sample_data/Inventory.csv', index=False)
-    print(f"Generated {os.path.abspath('sample_data/Inventory.csv')}")
-    return df
+def _period_days(dates):
+    """Typical length of one period of the time dimension, in days"""
+    if len(dates) < 2:
+        return 1.0
+    return float(np.median(np.diff(dates.to_numpy()).astype('timedelta64[D]').astype(float)))
+
+def _pair_demand(demand_forecast, product_ids, location_ids, calendar, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Sparse demand per (product, location, period) cell, sorted by cell number
+    
+    Cells are numbered (product_idx * num_locations + location_idx) * num_periods
+    + period_idx, so the cells of a block of pairs form one contiguous range.
+    Rows whose product, location or date is outside the given axes are dropped.
+    demand_forecast may be a DataFrame or a TableSource; only the cell
+    numbers and quantities (16 bytes a row) are kept.
+    """
+    product_index = pd.Index(product_ids)
+    location_index = pd.Index(location_ids)
+    cells, quantities = [], []
+    for chunk in _iter_chunks(demand_forecast, chunk_rows, FACT_COLUMNS['DemandForecast']):
+        product_idx = positions(product_index, chunk['product_id'])
+        location_idx = positions(location_index, chunk['location_id'])
+        period_idx = calendar.index(chunk['date'])
+        known = (product_idx >= 0) & (location_idx >= 0) & (period_idx >= 0)
+        cells.append(((product_idx * len(location_ids) + location_idx) * len(calendar) + period_idx)[known])
+        quantities.append(chunk['forecast_quantity'].to_numpy(dtype=float)[known])
+    cells = np.concatenate(cells) if cells else np.empty(0, dtype='int64')
+    quantities = np.concatenate(quantities) if quantities else np.empty(0)
+    order = np.argsort(cells, kind='stable')
+    return cells[order], quantities[order]
 
-def generate_production_plan(products_df, locations_df, time_df, demand_forecast_df):
-    """Generate production plans based on demand forecasts"""
-    production_records = []
+def _slice_pair_demand(pair_demand, pair_start, pair_stop, num_periods):
+    """Cells of pairs [pair_start, pair_stop), renumbered to start at zero"""
+    cells, quantities = pair_demand
+    lo, hi = np.searchsorted(cells, [pair_start * num_periods, pair_stop * num_periods])
+    return cells[lo:hi] - pair_start * num_periods, quantities[lo:hi]
+
+def simulate_inventory(demand, reorder_point, order_quantity, lead_periods, initial_on_hand,
+                       capacity=None, lead_time_factor=None, in_transit=None, return_state=False):
+    """Run a continuous-review (s, Q) policy for many SKU-locations at once
+    
+    demand is a (pairs x periods) array; the other arguments hold one value
+    per pair. Each period, open orders due that period arrive, demand is
+    served from stock (unmet demand is lost), and whenever the inventory
+    position (on hand + on order) is at or below the reorder point enough
+    multiples of Q are ordered to lift it back above, arriving lead_periods
+    later. The loop runs over periods only; every step is a vector operation
+    across all pairs.
+    
+    capacity and lead_time_factor, (pairs x periods) arrays, model supply
+    disruptions: suppliers ship only that fraction of an order placed in a
+    period (the rest is never delivered), and it takes lead_time_factor
+    times as long to arrive.
+    
+    in_transit, a (pairs x n) array, holds orders placed before the first
+    period: column k arrives in period k. Returns on-hand, on-order and
+    lost-sales arrays shaped like demand; with return_state=True also the
+    on-hand stock and the orders in transit after the last period, in the
+    form initial_on_hand and in_transit take, so a later call continues the
+    simulation where this one stopped.
+    """
+    num_pairs, num_periods = demand.shape
+    demand = np.ascontiguousarray(demand.T)
+    order_quantity = np.maximum(order_quantity, 1).astype(float)
+    if lead_time_factor is not None:
+        lead_periods = np.ceil(lead_periods[:, None] * lead_time_factor).astype(int)
+    lead_periods = np.ascontiguousarray(np.broadcast_to(
+        lead_periods[:, None] if lead_periods.ndim == 1 else lead_periods, (num_pairs, num_periods)).T)
+    if capacity is not None:
+        capacity = np.ascontiguousarray(capacity.T)
+    horizon = int(lead_periods.max()) + 1 if num_pairs and num_periods else 1
+    if in_transit is not None:
+        horizon = max(horizon, in_transit.shape[1])
+    
+    # Orders in transit, indexed by (arrival period mod horizon)
+    pipeline = np.zeros((horizon, num_pairs))
+    rows = np.arange(num_pairs)
+    on_hand = initial_on_hand.astype(float)
+    on_order = np.zeros(num_pairs)
+    if in_transit is not None:
+        pipeline[:in_transit.shape[1]] = in_transit.T
+        on_order += in_transit.sum(axis=1)
+    on_hand_out = np.empty((num_periods, num_pairs))
+    on_order_out = np.empty_like(on_hand_out)
+    lost_out = np.empty_like(on_hand_out)
+    
+    for t in range(num_periods):
+        slot = t % horizon
+        arriving = pipeline[slot]
+        on_hand += arriving
+        on_order -= arriving
+        pipeline[slot] = 0
+        
+        sold = np.minimum(on_hand, demand[t])
+        lost_out[t] = demand[t] - sold
+        on_hand -= sold
+        
+        shortfall = reorder_point - (on_hand + on_order)
+        orders = np.where(shortfall >= 0, (np.floor(shortfall / order_quantity) + 1) * order_quantity, 0)
+        if capacity is not None:
+            orders *= capacity[t]
+        pipeline[(t + lead_periods[t]) % horizon, rows] += orders
+        on_order += orders
+        
+        on_hand_out[t] = on_hand
+        on_order_out[t] = on_order
+    
+    if return_state:
+        remaining = pipeline[(num_periods + np.arange(horizon)) % horizon].T
+        return on_hand_out.T, on_order_out.T, lost_out.T, on_hand, remaining
+    return on_hand_out.T, on_order_out.T, lost_out.T
+
+def replenishment_policy(rng, demand, lead_times, unit_cost, min_order_quantity, pack_size, period_days):
+    """(s, Q) policy of each pair from its (pairs x periods) demand
+    
+    lead_times (in days) and the product attributes hold one value per
+    pair. The service level, ordering cost and holding cost rate are drawn
+    per pair; the reorder point covers mean lead-time demand plus safety
+    stock for that service level, and Q is the EOQ rounded up to the
+    minimum order quantity and pack size. initial_on_hand starts each pair
+    at a random point of its replenishment cycle.
+    """
+    num_pairs = len(demand)
+    mean_demand = demand.mean(axis=1)
+    inverse_normal = np.vectorize(NormalDist().inv_cdf, otypes=[float])
+    
+    # Calculate safety stock and reorder point from the service level target
+    service_level = rng.uniform(0.9, 0.99, num_pairs)
+    lead_periods = np.maximum(1, np.ceil(lead_times / period_days)).astype(int)
+    safety_stock = np.ceil(inverse_normal(service_level) * demand.std(axis=1) * np.sqrt(lead_periods))
+    reorder_point = np.ceil(mean_demand * lead_periods + safety_stock)
+    
+    # Calculate EOQ (Economic Order Quantity), respecting MOQ and pack size
+    annual_demand = mean_demand * 365 / period_days
+    ordering_cost = rng.uniform(50, 200, num_pairs)
+    holding_cost_rate = rng.uniform(0.1, 0.3, num_pairs)
+    eoq = np.sqrt((2 * annual_demand * ordering_cost) / (unit_cost * holding_cost_rate))
+    order_quantity = np.ceil(np.maximum(eoq, min_order_quantity) / pack_size) * pack_size
+    
+    return {
+        'service_level': service_level,
+        'lead_periods': lead_periods,
+        'safety_stock': safety_stock,
+        'reorder_point': reorder_point,
+        'annual_demand': annual_demand,
+        'holding_cost_rate': holding_cost_rate,
+        'order_quantity': order_quantity,
+        'initial_on_hand': reorder_point + rng.uniform(0, 1, num_pairs) * order_quantity
+    }
+
+def _iter_inventory_chunks(rng, dates, products_df, location_ids, chunk_rows, pair_demand=None,
+                           supply_factors=None):
+    """Yield Inventory rows in blocks of whole (product, location) pairs
+    
+    pair_demand is the output of _pair_demand for these products and
+    locations; without it each pair gets a synthetic demand stream.
+    supply_factors, from _supply_factors, limits replenishment during
+    supply disruptions.
+    """
+    num_periods = len(dates)
+    num_locations = len(location_ids)
+    product_ids = products_df['product_id'].to_numpy()
+    lead_times = products_df['lead_time_days'].to_numpy()
+    unit_costs = products_df['unit_cost'].to_numpy()
+    min_order_quantities = products_df['min_order_quantity'].to_numpy()
+    pack_sizes = products_df['pack_size'].to_numpy()
+    period_days = _period_days(dates)
+    period_idx = np.arange(num_periods)
+    
+    def per_pair(values):
+        return np.repeat(values, num_periods)
+    
+    for start, stop in _chunk_bounds(len(product_ids) * num_locations, num_periods, chunk_rows):
+        # Pairs are numbered product-major, matching the original nested loops
+        pairs = np.arange(start, stop)
+        product_idx, location_idx = np.divmod(pairs, num_locations)
+        num_pairs = len(pairs)
+        unit_cost = unit_costs[product_idx]
+        
+        # Demand per pair and period: from the forecast, or a synthetic stream
+        if pair_demand is not None:
+            cells, quantities = _slice_pair_demand(pair_demand, start, stop, num_periods)
+            demand = np.bincount(cells, weights=quantities, minlength=num_pairs * num_periods)
+            demand = demand.reshape(num_pairs, num_periods)
+        else:
+            base_rate = rng.integers(50, 501, num_pairs) / 30 * period_days
+            demand_variability = rng.uniform(0.1, 0.4, num_pairs)
+            noise = rng.standard_normal((num_pairs, num_periods))
+            demand = np.maximum(0, base_rate[:, None] * (1 + demand_variability[:, None] * noise))
+        mean_demand = demand.mean(axis=1)
+        policy = replenishment_policy(rng, demand, lead_times[product_idx], unit_cost,
+                                      min_order_quantities[product_idx], pack_sizes[product_idx], period_days)
+        service_level = policy['service_level']
+        safety_stock = policy['safety_stock']
+        reorder_point = policy['reorder_point']
+        order_quantity = policy['order_quantity']
+        annual_demand = policy['annual_demand']
+        holding_cost_rate = policy['holding_cost_rate']
+        
+        capacity = lead_time_factor = None
+        if supply_factors is not None:
+            capacity, lead_time_factor = (factors.dense(start, stop) for factors in supply_factors)
+        on_hand, on_order, lost = simulate_inventory(
+            demand, reorder_point, order_quantity, policy['lead_periods'], policy['initial_on_hand'], capacity,
+            lead_time_factor
+        )
+        
+        # Calculate inventory metrics
+        quantity_on_hand = np.floor(on_hand).astype(int)
+        turns = annual_demand[:, None] / np.maximum(1, quantity_on_hand)
+        # Coverage is undefined (NULL) for pairs without demand
+        daily_demand = np.where(mean_demand > 0, mean_demand / period_days, np.nan)[:, None]
+        days_of_supply = np.maximum(1, quantity_on_hand) / daily_demand
+        carrying_cost = quantity_on_hand * (unit_cost * holding_cost_rate / 365 * period_days)[:, None]
+        fill_rate = np.divide(demand - lost, demand, out=np.ones_like(demand), where=demand > 0)
+        
+        yield narrow(pd.DataFrame({
+            'date': keys(np.tile(period_idx, num_pairs), dates),
+            'product_id': keys(per_pair(product_idx), product_ids),
+            'location_id': keys(per_pair(location_idx), location_ids),
+            'quantity_on_hand': quantity_on_hand.ravel(),
+            'quantity_on_order': np.round(on_order).astype(int).ravel(),
+            'stockout_quantity': lost.ravel().round(2),
+            'safety_stock_level': per_pair(safety_stock.astype(int)),
+            'reorder_point': per_pair(reorder_point.astype(int)),
+            'economic_order_quantity': per_pair(order_quantity.astype(int)),
+            'inventory_turns': turns.ravel().round(2),
+            'days_of_supply': days_of_supply.ravel().round(2),
+            'carrying_cost': carrying_cost.ravel().round(2),
+            'stockout_probability': per_pair((1 - service_level).round(4)),
+            'fill_rate': fill_rate.ravel().round(4)
+        }), 'Inventory')
+
+def generate_inventory_data(products_df, locations_df, time_df, demand_forecast_df=None, supply_impact=None,
+                            seed=None, sink=None, stream=False, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Generate inventory data by simulating replenishment against demand
     
-    # Filter locations that are manufacturing plants
+    Each (product, location) pair consumes its DemandForecast quantities under
+    an (s, Q) reorder-point/EOQ policy with the product's lead time, so stock
+    levels, open orders and stockouts follow the demand that was generated.
+    Without demand_forecast_df a synthetic demand stream is used. With a
+    SupplyImpact table, disrupted suppliers ship less and later, so pairs
+    sharing a supplier run short together. Rows are produced for blocks of
+    pairs at a time, so with stream=True peak memory follows chunk_rows
+    rather than the table size, and None is returned.
+    """
+    rng = table_rng(seed, 'Inventory')
+    calendar = Calendar.from_time_dimension(time_df)
+    location_ids = locations_df['location_id'].to_numpy()
+    pair_demand = None
+    if demand_forecast_df is not None:
+        pair_demand = _pair_demand(demand_forecast_df, products_df['product_id'].to_numpy(), location_ids, calendar,
+                                   chunk_rows)
+    supply_factors = _supply_factors(supply_impact, products_df['product_id'].to_numpy(), location_ids, calendar,
+                                     chunk_rows)
+    chunks = _iter_inventory_chunks(rng, calendar.dates, products_df, location_ids, chunk_rows, pair_demand,
+                                    supply_factors)
+    return _emit('Inventory', chunks, sink, stream)
+
+def _plant_locations(locations_df):
+    """Locations that act as manufacturing plants"""
     plant_locations = locations_df[locations_df['location_type'] == 'Plant']
     
     if len(plant_locations) == 0:
         # If no plants exist, use a subset of locations as plants
-        plant_locations = locations_df.sample(min(3, len(locations_df)))
+        plant_locations = locations_df.iloc[:min(3, len(locations_df))]
+    return plant_locations
+
+def _group_demand(demand_forecast, chunk_rows=DEFAULT_CHUNK_ROWS, merge_every=16):
+    """Total demand and mean confidence per product and date
+    
+    Each chunk is reduced to partial sums and row counts per (product, date),
+    which merge by addition, so demand_forecast may be a TableSource larger
+    than memory: only partial states (folded together every merge_every
+    chunks) and the grouped result are held.
+    """
+    columns = ['product_id', 'date', 'forecast_quantity', 'confidence_level']
+    partials = []
+    for chunk in _iter_chunks(demand_forecast, chunk_rows, columns):
+        date = chunk['date']
+        if not isinstance(date.dtype, pd.CategoricalDtype):
+            # Surrogate date keys group as they are; scanned dates are parsed
+            date = pd.to_datetime(date)
+        chunk = chunk[columns].assign(date=date, rows=1)
+        partials.append(chunk.groupby(['product_id', 'date'], observed=True).sum())
+        if len(partials) >= merge_every:
+            partials = [pd.concat(partials).groupby(level=[0, 1]).sum()]
+    if not partials:
+        return pd.DataFrame(columns=columns)
+    totals = pd.concat(partials).groupby(level=[0, 1]).sum()
+    totals['confidence_level'] /= totals.pop('rows')
+    return totals.reset_index()
+
+# JSON fractional parts '.00' to '.99' for two-decimal numbers
+_CENTS = np.array([f'.{cents:02d}' for cents in range(100)], dtype=object)
+
+# Opening of a materials_required entry for every material number
+_MATERIAL_PREFIXES = np.array([f'{{"material_id": "M{i}", "quantity": ' for i in range(10000)], dtype=object)
+
+def _json_numbers(values):
+    """Format non-negative floats as two-decimal JSON numbers (object array of str)"""
+    whole, cents = np.divmod(np.rint(values * 100).astype(np.int64), 100)
+    return np.array(list(map(str, whole.tolist())), dtype=object) + _CENTS[cents]
+
+def _resource_requirements_json(labor_hours, machine_hours, setup_hours, material_ids, material_quantities,
+                                num_materials):
+    """Serialize per-plan resource requirements as JSON strings
+    
+    material_ids and material_quantities are (plans x MAX_MATERIALS) arrays of
+    which the first num_materials entries of each row are used. Each document
+    is assembled from column-wise string pieces with one join per plan rather
+    than building and dumping a dict per plan.
+    """
+    parts = [
+        '{"labor_hours": ', _json_numbers(labor_hours),
+        ', "machine_hours": ', _json_numbers(machine_hours),
+        ', "setup_hours": ', _json_numbers(setup_hours),
+        ', "materials_required": ['
+    ]
+    for k in range(MAX_MATERIALS):
+        used = num_materials > k
+        parts += [
+            np.where(used, '' if k == 0 else ', ', ''),
+            np.where(used, _MATERIAL_PREFIXES[material_ids[:, k]], ''),
+            np.where(used, _json_numbers(material_quantities[:, k]), ''),
+            np.where(used, '}', '')
+        ]
+    parts.append(']}')
+    
+    columns = [repeat(part) if isinstance(part, str) else part.tolist() for part in parts]
+    return list(map(''.join, zip(*columns)))
+
+def _iter_production_chunks(rng, products_df, plant_locations, grouped_demand, chunk_rows,
+                            materials_writer=None, plant_capacity=None):
+    """Yield ProductionPlan rows for blocks of products
+    
+    Demand is joined to the products once by hash lookup and sorted by
+    product position, so each block is a contiguous slice and every cost
+    is computed as a column. If materials_writer is given, the normalized
+    ProductionMaterial rows (one per material of each plan) are appended to
+    it alongside. plant_capacity, supply capacity factors over these
+    products and plant_locations, scales down plans whose inputs are
+    disrupted.
+    """
+    product_ids = products_df['product_id'].to_numpy()
+    unit_costs = products_df['unit_cost'].to_numpy()
+    plant_ids = plant_locations['location_id'].to_numpy()
+    num_products = len(product_ids)
     
-    # Group demand forecasts by product, location, and date
-    grouped_demand = demand_forecast_df.groupby(['product_id', 'date']).agg({
-        'forecast_quantity': 'sum',
-        'confidence_level': 'mean'
-    }).reset_index()
+    # Production parameters per product, including its assigned plant
+    plant_idx = rng.integers(0, len(plant_ids), num_products)
+    setup_time_hours = rng.uniform(1, 8, num_products)
+    production_rate_per_hour = rng.uniform(5, 50, num_products)
+    resource_efficiency = rng.uniform(0.7, 0.95, num_products)
     
-    for _, product in products_df.iterrows():
-        # Assign this product to a random plant
-        plant = plant_locations.sample(1).iloc[0]
+    # Join demand to products once, ordered by product position
+    product_idx = positions(pd.Index(product_ids), grouped_demand['product_id'])
+    order = np.argsort(product_idx, kind='stable')
+    order = order[product_idx[order] >= 0]
+    product_idx = product_idx[order]
+    dates = grouped_demand['date'].array[order]
+    forecast_qty = grouped_demand['forecast_quantity'].to_numpy()[order]
+    confidence = grouped_demand['confidence_level'].to_numpy()[order]
+    product_bounds = np.searchsorted(product_idx, np.arange(num_products + 1))
+    
+    rows_per_product = max(1, len(order) // max(1, num_products))
+    for start, stop in _chunk_bounds(num_products, rows_per_product, chunk_rows):
+        lo, hi = product_bounds[start], product_bounds[stop]
+        idx = product_idx[lo:hi]
+        num_rows = hi - lo
+        
+        # Calculate production quantities with some buffering
+        buffer_factor = 1 + (1 - confidence[lo:hi]) * 0.5
+        planned_qty = forecast_qty[lo:hi] * buffer_factor
+        if plant_capacity is not None:
+            planned_qty = planned_qty * plant_capacity.lookup(idx, plant_idx[idx], dates[lo:hi])
+        planned_qty = planned_qty.astype(int)
+        
+        # Calculate production metrics
+        production_hours = (planned_qty / production_rate_per_hour[idx]) / resource_efficiency[idx]
+        total_hours = production_hours + setup_time_hours[idx]
+        production_cost = total_hours * rng.uniform(50, 200, num_rows)  # Cost per hour
+        material_cost = planned_qty * unit_costs[idx] * rng.uniform(0.6, 0.8, num_rows)  # Material is % of unit cost
         
-        # Production parameters
-        setup_time_hours = random.uniform(1, 8)
-        production_rate_per_hour = random.uniform(5, 50)
-        resource_efficiency = random.uniform(0.7, 0.95)
+        # Resource requirements: hours plus 1-3 materials per plan
+        labor_hours = (total_hours * rng.uniform(0.3, 0.5, num_rows)).round(2)
+        machine_hours = (total_hours * rng.uniform(0.5, 0.8, num_rows)).round(2)
+        num_materials = rng.integers(1, MAX_MATERIALS + 1, num_rows)
+        material_ids = rng.integers(1000, 10000, (num_rows, MAX_MATERIALS))
+        material_quantities = (planned_qty[:, None] * rng.uniform(0.5, 2.0, (num_rows, MAX_MATERIALS))).round(2)
+        
+        plan = narrow(pd.DataFrame({
+            'date': dates[lo:hi],
+            'product_id': keys(idx, product_ids),
+            'location_id': keys(plant_idx[idx], plant_ids),
+            'planned_quantity': planned_qty,
+            'production_hours': production_hours.round(2),
+            'setup_hours': setup_time_hours[idx].round(2),
+            'resource_efficiency': resource_efficiency[idx].round(2),
+            'production_cost': production_cost.round(2),
+            'material_cost': material_cost.round(2),
+            'total_cost': (production_cost + material_cost).round(2),
+            'resource_requirements': _resource_requirements_json(
+                labor_hours, machine_hours, setup_time_hours[idx].round(2),
+                material_ids, material_quantities, num_materials
+            )
+        }), 'ProductionPlan')
         
-        # Get demand for this product
-        product_demand = grouped_demand[grouped_demand['product_id'] == product['product_id']]
+        if materials_writer is not None:
+            used = np.arange(MAX_MATERIALS)[None, :] < num_materials[:, None]
+            plan_rows = np.nonzero(used)[0]
+            materials_writer.append(pd.DataFrame({
+                'date': plan['date'].array[plan_rows],
+                'product_id': plan['product_id'].array[plan_rows],
+                'location_id': plan['location_id'].array[plan_rows],
+                'material_id': np.char.add('M', material_ids[used].astype(str)),
+                'quantity': material_quantities[used]
+            }))
         
-        for _, demand_row in product_demand.iterrows():
-            date = demand_row['date']
-            forecast_qty = demand_row['forecast_quantity']
-            
-            # Calculate production quantities with some buffering
-            confidence = demand_row['confidence_level']
-            buffer_factor = 1 + (1 - confidence) * 0.5
-            planned_qty = int(forecast_qty * buffer_factor)
-            
-            # Calculate production metrics
-            production_hours = (planned_qty / production_rate_per_hour) / resource_efficiency
-            total_hours = production_hours + setup_time_hours
-            production_cost = total_hours * random.uniform(50, 200)  # Cost per hour
-            material_cost = planned_qty * product['unit_cost'] * random.uniform(0.6, 0.8)  # Material is % of unit cost
-            
-            # Resource requirements as JSON
-            resources = {
-                'labor_hours': round(total_hours * random.uniform(0.3, 0.5), 2),
-                'machine_hours': round(total_hours * random.uniform(0.5, 0.8), 2),
-                'setup_hours': round(setup_time_hours, 2),
-                'materials_required': [
-                    {
-                        'material_id': f"M{random.randint(1000, 9999)}",
-                        'quantity': round(planned_qty * random.uniform(0.5, 2.0), 2)
-                    }
-                    for _ in range(random.randint(1, 3))
-                ]
-            }
-            
-            production_records.append({
-                'date': date,
-                'product_id': product['product_id'],
-                'location_id': plant['location_id'],
-                'planned_quantity': planned_qty,
-                'production_hours': round(production_hours, 2),
-                'setup_hours': round(setup_time_hours, 2),
-                'resource_efficiency': round(resource_efficiency, 2),
-                'production_cost': round(production_cost, 2),
-                'material_cost': round(material_cost, 2),
-                'total_cost': round(production_cost + material_cost, 2),
-                'resource_requirements': str(resources)  # Convert to string for CSV
-            })
-    
-    df = pd.DataFrame(production_records)
-    df.to_csv('sample_data/ProductionPlan.csv', index=False)
-    print(f"Generated {os.path.abspath('sample_data/ProductionPlan.csv')}")
+        yield plan
+
+def _plant_capacity(supply_impact, products_df, plant_locations, time_df, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Supply capacity factors over products and plants, or None without a SupplyImpact table"""
+    factors = _supply_factors(supply_impact, products_df['product_id'].to_numpy(),
+                              plant_locations['location_id'].to_numpy(), Calendar.from_time_dimension(time_df),
+                              chunk_rows)
+    return None if factors is None else factors[0]
+
+def generate_production_plan(products_df, locations_df, time_df, demand_forecast_df, supply_impact=None, seed=None,
+                             sink=None, stream=False, chunk_rows=DEFAULT_CHUNK_ROWS, materials_table=False):
+    """Generate production plans based on demand forecasts
+    
+    resource_requirements holds a JSON document per plan. With
+    materials_table=True the materials are also written as a normalized
+    ProductionMaterial child table keyed by (date, product_id, location_id).
+    With a SupplyImpact table, plans shrink by the plant's supply capacity
+    factor. With stream=True the plan is written in chunks of about
+    chunk_rows rows and None is returned.
+    """
+    sink = _resolve_sink(sink)
+    rng = table_rng(seed, 'ProductionPlan')
+    plant_locations = _plant_locations(locations_df)
+    grouped_demand = _group_demand(demand_forecast_df, chunk_rows)
+    plant_capacity = _plant_capacity(supply_impact, products_df, plant_locations, time_df, chunk_rows)
+    if not materials_table:
+        chunks = _iter_production_chunks(rng, products_df, plant_locations, grouped_demand, chunk_rows,
+                                         plant_capacity=plant_capacity)
+        return _emit('ProductionPlan', chunks, sink, stream)
+    
+    with sink.open('ProductionMaterial') as materials_writer:
+        chunks = _iter_production_chunks(rng, products_df, plant_locations, grouped_demand, chunk_rows,
+                                         materials_writer, plant_capacity)
+        return _emit('ProductionPlan', chunks, sink, stream)
+
+def _period_factors(external_factors, calendar):
+    """Each external factor column's mean per period, as a dict of arrays (1.0 where no factors exist)"""
+    period_idx = calendar.index(external_factors['date'])
+    known = period_idx >= 0
+    counts = np.bincount(period_idx[known], minlength=len(calendar))
+    factors = {}
+    for column in EXTERNAL_FACTOR_COLUMNS:
+        sums = np.bincount(period_idx[known], weights=external_factors[column].to_numpy(dtype=float)[known],
+                           minlength=len(calendar))
+        factors[column] = np.divide(sums, counts, out=np.ones(len(calendar)), where=counts > 0)
+    return factors
+
+def _iter_feature_chunks(pair_demand, pairs, num_locations, calendar, product_ids, location_ids, per_period,
+                         per_product, lags, windows, chunk_rows):
+    """Yield DemandFeatures rows in blocks of whole (product, location) series
+    
+    Each block's demand cells are scattered into a dense (series x periods)
+    array, whose rows are the sorted time series the window features run
+    along; per_period and per_product columns are gathered by position.
+    """
+    num_periods = len(calendar)
+    period_idx = np.arange(num_periods)
+    cells, quantities = pair_demand
+    for start, stop in _chunk_bounds(len(pairs), num_periods, chunk_rows):
+        block = pairs[start:stop]
+        lo, hi = np.searchsorted(cells, [block[0] * num_periods, (block[-1] + 1) * num_periods])
+        series = np.searchsorted(block, cells[lo:hi] // num_periods)
+        demand = np.bincount(series * num_periods + cells[lo:hi] % num_periods, weights=quantities[lo:hi],
+                             minlength=len(block) * num_periods).reshape(len(block), num_periods)
+        product_idx = block // num_locations
+        columns = {
+            'date': keys(np.tile(period_idx, len(block)), calendar.dates),
+            'product_id': keys(np.repeat(product_idx, num_periods), product_ids),
+            'location_id': keys(np.repeat(block % num_locations, num_periods), location_ids),
+            'forecast_quantity': demand.ravel().round(2)
+        }
+        columns.update({name: values.ravel() for name, values in demand_features(demand, lags, windows).items()})
+        columns.update({name: values[product_idx].ravel() for name, values in per_product.items()})
+        columns.update({name: np.tile(values, len(block)) for name, values in per_period.items()})
+        yield narrow(pd.DataFrame(columns), 'DemandFeatures')
+
+def generate_demand_features(demand_forecast_df, time_df, products_df, locations_df, external_factors, promotions,
+                             lags=FEATURE_LAGS, windows=ROLLING_WINDOWS, seed=None, sink=None, stream=False,
+                             chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Generate an ML feature store with one row per (product, location, date) series cell
+    
+    Rows carry the forecast quantity (summed over the pair's series) as the
+    target, its lags and trailing rolling means and standard deviations
+    (features.py), the product's promotion days, activity and mean discount
+    in the period, the period's external factors and calendar attributes.
+    Demand is taken as sorted per-pair cell arrays and the window features
+    run along each series, so the cost follows the number of rows with no
+    joins. Only pairs with demand get rows. With stream=True the table is
+    written in chunks of about chunk_rows rows and None is returned.
+    """
+    calendar = Calendar.from_time_dimension(time_df)
+    product_ids = products_df['product_id'].to_numpy()
+    location_ids = locations_df['location_id'].to_numpy()
+    pair_demand = _pair_demand(demand_forecast_df, product_ids, location_ids, calendar, chunk_rows)
+    pairs = np.unique(pair_demand[0] // len(calendar)) if len(calendar) else np.empty(0, dtype='int64')
+    
+    # Promotion activity per (product, period)
+    if promotions.empty:
+        promo_days = np.zeros((len(product_ids), len(calendar)), dtype='int64')
+    else:
+        active = EventIndex.from_promotions(promotions).activity_matrix(calendar.days, product_ids) > 0
+        promo_days = calendar.aggregate_days(active.astype('int64'), 'sum').astype('int64')
+    per_product = {
+        'promo_active': promo_days > 0,
+        'promo_days': promo_days,
+        'promo_discount': (_promotion_lift(promotions, calendar, product_ids) - 1).round(4)
+    }
+    
+    # External factors and calendar attributes per period
+    calendar_table = calendar.table()
+    per_period = {
+        **_period_factors(external_factors, calendar),
+        **{column: calendar_table[column].to_numpy() for column in CALENDAR_FEATURES}
+    }
+    
+    chunks = _iter_feature_chunks(pair_demand, pairs, len(location_ids), calendar, product_ids, location_ids,
+                                  per_period, per_product, lags, windows, chunk_rows)
+    return _emit('DemandFeatures', chunks, sink, stream)
+
+def generate_demand_forecast_sharded(products_df, locations_df, time_df, num_forecasts=1000, seed=0,
+                                     workers=1, sink=None, series_per_shard=DEFAULT_SHARD_SERIES,
+                                     chunk_rows=DEFAULT_CHUNK_ROWS, shards=None,
+                                     external_factors=None, promotions=None):
+    """Generate DemandForecast as independent shards of series across worker processes
+    
+    Each shard draws from its own stream derived from seed, so the files are
+    the same for any worker count and a list of shard numbers can be passed
+    as shards to regenerate just those. Returns the shard manifest.
+    """
+    sink = _resolve_sink(sink)
+    calendar = Calendar.from_time_dimension(time_df)
+    if external_factors is None:
+        external_factors = generate_external_factors(seed=seed, sink=sink, **_factor_horizon(calendar))
+    if promotions is None:
+        promotions = generate_promotion_calendar(num_products=len(products_df), seed=seed, sink=sink,
+                                                 **_event_horizon(calendar))
+    
+    product_ids = products_df['product_id'].to_numpy()
+    location_ids = locations_df['location_id'].to_numpy()
+    external_impact = _external_impact(external_factors, calendar)
+    promo_lift = _promotion_lift(promotions, calendar, product_ids)
+    shard_args = [
+        (calendar.dates, product_ids, location_ids, stop - start, external_impact, promo_lift, chunk_rows)
+        for start, stop in shard_bounds(num_forecasts, series_per_shard)
+    ]
+    return run_shards('DemandForecast', _iter_demand_chunks, shard_args, seed, sink, workers,
+                      metadata={'shard_by': 'series', 'series_per_shard': series_per_shard}, shards=shards)
+
+def generate_inventory_data_sharded(products_df, locations_df, time_df, demand_forecast_df=None, supply_impact=None,
+                                    seed=0, workers=1, sink=None, products_per_shard=DEFAULT_SHARD_PRODUCTS,
+                                    chunk_rows=DEFAULT_CHUNK_ROWS, shards=None):
+    """Generate Inventory as independent shards of products (all locations each)
+    
+    Each shard only receives the demand cells and supply factors of its own
+    products. Returns the shard manifest; see generate_demand_forecast_sharded.
+    """
+    calendar = Calendar.from_time_dimension(time_df)
+    dates = calendar.dates
+    location_ids = locations_df['location_id'].to_numpy()
+    pair_demand = None
+    if demand_forecast_df is not None:
+        pair_demand = _pair_demand(demand_forecast_df, products_df['product_id'].to_numpy(), location_ids, calendar,
+                                   chunk_rows)
+    supply_factors = _supply_factors(supply_impact, products_df['product_id'].to_numpy(), location_ids, calendar,
+                                     chunk_rows)
+    
+    shard_args = []
+    for start, stop in shard_bounds(len(products_df), products_per_shard):
+        shard_demand = None
+        if pair_demand is not None:
+            shard_demand = _slice_pair_demand(pair_demand, start * len(location_ids),
+                                              stop * len(location_ids), len(dates))
+        shard_factors = None
+        if supply_factors is not None:
+            shard_factors = tuple(factors.slice(start * len(location_ids), stop * len(location_ids))
+                                  for factors in supply_factors)
+        shard_args.append((dates, products_df.iloc[start:stop], location_ids, chunk_rows, shard_demand, shard_factors))
+    return run_shards('Inventory', _iter_inventory_chunks, shard_args, seed, _resolve_sink(sink), workers,
+                      metadata={'shard_by': 'product_id', 'products_per_shard': products_per_shard}, shards=shards)
+
+def generate_production_plan_sharded(products_df, locations_df, time_df, demand_forecast_df, supply_impact=None,
+                                     seed=0, workers=1, sink=None, products_per_shard=DEFAULT_SHARD_PRODUCTS,
+                                     chunk_rows=DEFAULT_CHUNK_ROWS, shards=None):
+    """Generate ProductionPlan as independent shards of products
+    
+    Demand is grouped once and split by shard, so each worker only sees the
+    rows of its own products. Returns the shard manifest.
+    """
+    plant_locations = _plant_locations(locations_df)
+    grouped_demand = _group_demand(demand_forecast_df, chunk_rows)
+    plant_capacity = _plant_capacity(supply_impact, products_df, plant_locations, time_df, chunk_rows)
+    bounds = shard_bounds(len(products_df), products_per_shard)
+    
+    # Shard number of every demand row, from the product's position in products_df
+    product_shard = pd.Series(np.arange(len(products_df)) // products_per_shard,
+                              index=products_df['product_id'])
+    demand_by_shard = dict(tuple(grouped_demand.groupby(grouped_demand['product_id'].map(product_shard))))
+    shard_args = [
+        (products_df.iloc[start:stop], plant_locations,
+         demand_by_shard.get(shard, grouped_demand.iloc[:0]), chunk_rows, None,
+         None if plant_capacity is None else plant_capacity.slice(start * len(plant_locations),
+                                                                  stop * len(plant_locations)))
+        for shard, (start, stop) in enumerate(bounds)
+    ]
+    return run_shards('ProductionPlan', _iter_production_chunks, shard_args, seed, _resolve_sink(sink), workers,
+                      metadata={'shard_by': 'product_id', 'products_per_shard': products_per_shard}, shards=shards)
+
+def generate_kpi_dashboard(inventory_df, production_df, demand_forecast_df, time_df, products_df, locations_df,
+                           seed=None, sink=None, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Generate KPI dashboard metrics for supply chain performance
+    
+    The fact tables are reduced chunk by chunk into a cube of additive
+    measures per (period, product category, location) (see kpi.KpiCube),
+    from which every metric is computed for the Overall, Category,
+    LocationType, Region and Plant rollups at once. Each fact table may be
+    a DataFrame or a TableSource larger than memory.
+    """
+    cube = KpiCube(Calendar.from_time_dimension(time_df), products_df, locations_df,
+                   plant_ids=_plant_locations(locations_df)['location_id'])
+    for chunk in _iter_chunks(inventory_df, chunk_rows, FACT_COLUMNS['Inventory']):
+        cube.add_inventory(chunk)
+    for chunk in _iter_chunks(production_df, chunk_rows, FACT_COLUMNS['ProductionPlan']):
+        cube.add_production(chunk)
+    for chunk in _iter_chunks(demand_forecast_df, chunk_rows, FACT_COLUMNS['DemandForecast']):
+        cube.add_demand(chunk)
+    
+    df = kpi_rows(cube)
+    _resolve_sink(sink).write('KPI_Dashboard', df)
     return df
 
-def generate_kpi_dashboard(inventory_df, production_df, demand_forecast_df, time_df):
-    """Generate KPI dashboard metrics for supply chain performance"""
-    kpi_records = []
-    
-    # Calculate inventory KPIs
-    inventory_by_date = inventory_df.groupby('date').agg({
-        'quantity_on_hand': 'sum',
-        'carrying_cost': 'sum'
-    }).reset_index()
-    
-    # Calculate production KPIs
-    production_by_date = production_df.groupby('date').agg({
-        'planned_quantity': 'sum',
-        'total_cost': 'sum',
-        'production_hours': 'sum',
-        'setup_hours': 'sum'
-    }).reset_index()
-    
-    # Calculate demand KPIs
-    demand_by_date = demand_forecast_df.groupby('date').agg({
-        'forecast_quantity': 'sum'
-    }).reset_index()
-    
-    # Generate KPIs for each date
-    for _, time_row in time_df.iterrows():
-        date = time_row['date']
+def _demand_forecast_sharded_stage(products_df, locations_df, time_df, external_factors, promotions, **kwargs):
+    """generate_demand_forecast_sharded with external factors and promotions as positional inputs"""
+    return generate_demand_forecast_sharded(products_df, locations_df, time_df, external_factors=external_factors,
+                                            promotions=promotions, **kwargs)
+
+def _sharded_stage(table, generate, processes):
+    """Stage function writing table as shards across processes
+    
+    The shards stay on disk and downstream stages read them back as a
+    TableSource, so the stage returns no table; its rows are reported to
+    the sink's observer once every shard is written.
+    """
+    def run_sharded(*args, sink=None, **params):
+        manifest = generate(*args, workers=processes, sink=sink, **params)
+        if sink.observer is not None:
+            sink.observer.chunk(table, manifest['rows'])
+    return run_sharded
+
+def _event_horizon(calendar):
+    """start_date/periods (in days) of the daily event calendars covering every period"""
+    days = calendar.days
+    return {'start_date': days.min(), 'periods': len(days)}
+
+def _factor_horizon(calendar):
+    """generate_external_factors parameters giving one row per period of the calendar"""
+    return {'start_date': calendar.dates.min(), 'periods': len(calendar), 'granularity': calendar.granularity}
+
+def pipeline_stages(sink, sizes=None, features=False, processes=None, materials_table=False):
+    """Stage graph of the full dataset with explicit dependencies
+    
+    sizes overrides entries of DEFAULT_SIZES. Only the edges listed here
+    order the stages, so master data, calendars and transport lanes run
+    alongside each other and the fact tables wait only on what they read.
+    features=True adds the DemandFeatures feature store. With processes,
+    DemandForecast, Inventory and ProductionPlan are generated as shards
+    across that many worker processes (see run_shards). materials_table=True
+    also writes ProductionMaterial alongside ProductionPlan.
+    """
+    sizes = {**DEFAULT_SIZES, **(sizes or {})}
+    generators = {
+        'DemandForecast': _demand_forecast_stage,
+        'Inventory': generate_inventory_data,
+        'ProductionPlan': generate_production_plan
+    }
+    if processes is not None:
+        generators = {
+            'DemandForecast': _sharded_stage('DemandForecast', _demand_forecast_sharded_stage, processes),
+            'Inventory': _sharded_stage('Inventory', generate_inventory_data_sharded, processes),
+            'ProductionPlan': _sharded_stage('ProductionPlan', generate_production_plan_sharded, processes)
+        }
+    stages = [
+        # Master data
+        Stage('Product', generate_product_data, params={'num_products': sizes['num_products']},
+              on_complete=lambda df: sink.add_lookup('product_category', df[['product_id', 'product_category']])),
+        Stage('Location', generate_location_data, params={'num_locations': sizes['num_locations']}),
+        Stage('Customer', generate_customer_data, params={'num_customers': sizes['num_customers']}),
+        Stage('Supplier', generate_supplier_data, params={'num_suppliers': sizes['num_suppliers']}),
+        Stage('Resource', generate_resource_data, params={'num_resources': sizes['num_resources']}),
+        Stage('ProductSourcing', generate_product_sourcing, inputs=('Product', 'Location', 'Supplier')),
         
-        # Get metrics for this date
-        try:
-            inv_metrics = inventory_by_date[inventory_by_date['date'] == date].iloc[0]
-            prod_metrics = production_by_date[production_by_date['date'] == date].iloc[0]
-            demand_metrics = demand_by_date[demand_by_date['date'] == date].iloc[0]
-            
-            # Inventory KPIs
-            kpi_records.append({
-                'date': date,
-                'metric_name': 'Inventory Value',
-                'metric_value': round(inv_metrics['quantity_on_hand'] * random.uniform(10, 50), 2),
-                'target_value': round(inv_metrics['quantity_on_hand'] * random.uniform(8, 45), 2),
-                'dimension_type': 'Overall'
-            })
-            
-            kpi_records.append({
-                'date': date,
-                'metric_name': 'Inventory Carrying Cost',
-                'metric_value': round(inv_metrics['carrying_cost'], 2),
-                'target_value': round(inv_metrics['carrying_cost'] * 0.9, 2),
-                'dimension_type': 'Overall'
-            })
-            
-            # Production KPIs
-            kpi_records.append({
-                'date': date,
-                'metric_name': 'Production Cost',
-                'metric_value': round(prod_metrics['total_cost'], 2),
-                'target_value': round(prod_metrics['total_cost'] * 0.95, 2),
-                'dimension_type': 'Overall'
-            })
-            
-            kpi_records.append({
-                'date': date,
-                'metric_name': 'Resource Utilization',
-                'metric_value': round(prod_metrics['production_hours'] / (prod_metrics['production_hours'] + prod_metrics['setup_hours']) * 100, 2),
-                'target_value': 85.0,
-                'dimension_type': 'Overall'
-            })
-            
-            # Supply Chain KPIs
-            forecast_accuracy = random.uniform(0.8, 0.98)
-            kpi_records.append({
-                'date': date,
-                'metric_name': 'Forecast Accuracy',
-                'metric_value': round(forecast_accuracy * 100, 2),
-                'target_value': 95.0,
-                'dimension_type': 'Overall'
-            })
-            
-            on_time_delivery = random.uniform(0.85, 0.99)
-            kpi_records.append({
-                'date': date,
-                'metric_name': 'On-Time Delivery',
-                'metric_value': round(on_time_delivery * 100, 2),
-                'target_value': 98.0,
-                'dimension_type': 'Overall'
-            })
-            
-            perfect_order = random.uniform(0.8, 0.95)
-            kpi_records.append({
-                'date': date,
-                'metric_name': 'Perfect Order Rate',
-                'metric_value': round(perfect_order * 100, 2),
-                'target_value': 95.0,
-                'dimension_type': 'Overall'
-            })
-            
-            # Calculate variance
-            for record in kpi_records[-7:]:
-                record['variance_percentage'] = round((record['metric_value'] - record['target_value']) / record['target_value'] * 100, 2)
-                record['dimension_id'] = 'ALL'
-                
-        except (IndexError, KeyError):
-            # Skip dates with missing data
-            pass
-    
-    df = pd.DataFrame(kpi_records)
-    df.to_csv('sample_data/KPI_Dashboard.csv', index=False)
-    print(f"Generated {os.path.abspath('sample_data/KPI_Dashboard.csv')}")
-    return df
+        # Time dimension and the calendars built on it
+        Stage('TimeDimension', generate_time_dimension,
+              params={key: sizes[key] for key in ('start_date', 'periods', 'granularity', 'end_date')}),
+        Stage('SupplyDisruptions', generate_supply_disruptions, depends=('TimeDimension', 'Supplier'),
+              params=lambda tables: {**_event_horizon(Calendar.from_time_dimension(tables['TimeDimension'])),
+                                     'num_suppliers': len(tables['Supplier'])}),
+        Stage('ExternalFactors', generate_external_factors, depends=('TimeDimension',),
+              params=lambda tables: _factor_horizon(Calendar.from_time_dimension(tables['TimeDimension']))),
+        Stage('PromotionCalendar', generate_promotion_calendar, depends=('TimeDimension', 'Product'),
+              params=lambda tables: {**_event_horizon(Calendar.from_time_dimension(tables['TimeDimension'])),
+                                     'num_products': len(tables['Product'])}),
+        
+        # Demand forecast with external factors and promotions
+        Stage('DemandForecast', generators['DemandForecast'],
+              inputs=('Product', 'Location', 'TimeDimension', 'ExternalFactors', 'PromotionCalendar'),
+              params={'num_forecasts': sizes['num_forecasts']}),
+        
+        # Transport lanes
+        Stage('TransportLane', generate_transport_lanes, inputs=('Location',),
+              params={'num_lanes': sizes['num_lanes']}),
+        
+        # Supplier disruptions propagated to the (product, location) pairs they source
+        Stage('SupplyImpact', generate_supply_impact,
+              inputs=('ProductSourcing', 'SupplyDisruptions', 'TimeDimension', 'Product', 'Location', 'Supplier')),
+        
+        # Inventory and production are driven by the demand forecast, limited by supply
+        Stage('Inventory', generators['Inventory'],
+              inputs=('Product', 'Location', 'TimeDimension', 'DemandForecast', 'SupplyImpact')),
+        Stage('ProductionPlan', generators['ProductionPlan'],
+              inputs=('Product', 'Location', 'TimeDimension', 'DemandForecast', 'SupplyImpact'),
+              params={'materials_table': True} if materials_table else {}, cacheable=not materials_table),
+        
+        # KPI dashboard
+        Stage('KPI_Dashboard', generate_kpi_dashboard,
+              inputs=('Inventory', 'ProductionPlan', 'DemandForecast', 'TimeDimension', 'Product', 'Location')),
+    ]
+    if features:
+        stages.append(Stage('DemandFeatures', generate_demand_features,
+                            inputs=('DemandForecast', 'TimeDimension', 'Product', 'Location', 'ExternalFactors',
+                                    'PromotionCalendar')))
+    return stages
 
-def main():
-    """Main function to generate all sample data"""
-    print("Generating S&OP dataset...")
+def main(output_dir='sample_data', output_format='csv', seed=None, cache_dir=None,
+         cache_max_bytes=DEFAULT_CACHE_MAX_BYTES, event_log=None, profile_stage=None,
+         profiler='cprofile', workers=4, sizes=None, out_of_core=False, features=False, processes=None,
+         materials_table=False, **sink_options):
+    """Main function to generate all sample data
     
-    # Generate master data
-    products_df = generate_product_data(num_products=100)
-    locations_df = generate_location_data(num_locations=20)
-    customers_df = generate_customer_data(num_customers=50)
-    suppliers_df = generate_supplier_data(num_suppliers=30)
-    resources_df = generate_resource_data(num_resources=40)
+    output_format selects the backend (csv, parquet or arrow); sink_options
+    such as compression or partition_by are passed to the columnar backends.
+    Every table draws from its own random stream derived from seed, so a run
+    with a fixed seed is reproducible table by table. With a cache_dir, tables
+    whose parameters, seed and upstream tables are unchanged are reused from
+    the cache instead of being regenerated.
     
-    # Generate time dimension
-    time_df = generate_time_dimension(start_date='2023-01-01', periods=36)
+    Stages run as a dependency graph (see pipeline_stages): up to workers
+    independent stages run at once, and each table's chunks are written on a
+    background thread while the next chunk is computed. The output does not
+    depend on workers.
     
-    # Generate supply chain disruptions
-    disruptions_df = generate_supply_disruptions(time_df['date'].min(), len(time_df), len(suppliers_df))
+    Each stage reports its time, rows, rows/sec and peak RSS; event_log
+    names a JSON-lines file receiving stage and progress events. profile_stage
+    captures one table's stage with cProfile or the sampling profiler
+    (profiler='sampling') into output_dir.
     
-    # Generate demand forecast with external factors
-    demand_forecast_df = generate_demand_forecast(products_df, locations_df, time_df, num_forecasts=1000)
+    With out_of_core=True the fact tables (DemandForecast, Inventory and
+    ProductionPlan) are streamed to disk chunk by chunk and never held whole:
+    downstream stages scan them back lazily as TableSource, so peak memory
+    follows chunk size and master data rather than fact table size. These
+    tables are then missing from the returned dict.
     
-    # Generate transport lanes
-    transport_lanes_df = generate_transport_lanes(locations_df, num_lanes=50)
+    features=True also writes the DemandFeatures ML feature store (see
+    generate_demand_features); a columnar output format suits it best.
     
-    # Generate inventory data with optimization metrics
-    inventory_df = generate_inventory_data(products_df, locations_df, time_df)
+    With processes, DemandForecast, Inventory and ProductionPlan are
+    generated as fixed-size shards across that many worker processes (see
+    the *_sharded generators) and, as with out_of_core, handed downstream
+    from disk. Each shard draws from its own stream, so the output is the
+    same for any number of processes, though not the same as an unsharded
+    run.
+    
+    materials_table=True also writes the ProductionMaterial child table of
+    ProductionPlan (see generate_production_plan); it cannot be combined
+    with processes.
+    """
+    print("Generating S&OP dataset...")
+    sink = make_sink(output_format, output_dir, **sink_options)
+    if out_of_core and isinstance(sink, NullSink):
+        raise ValueError("out_of_core needs an output format that writes files (csv, parquet or arrow)")
+    if processes is not None and isinstance(sink, NullSink):
+        raise ValueError("processes needs an output format that writes files (csv, parquet or arrow)")
+    if processes is not None and materials_table:
+        raise ValueError("materials_table is not supported with processes; sharded plans write no ProductionMaterial")
+    sink.write_behind = 2
+    cache = TableCache(cache_dir, cache_max_bytes) if cache_dir else None
+    instrumentation = Instrumentation(event_log, profile_stage=profile_stage, profiler=profiler,
+                                      profile_dir=output_dir)
+    sink.observer = instrumentation
+    tables = {}
+    fingerprints = {}
     
-    # Generate production plans
-    production_df = generate_production_plan(products_df, locations_df, time_df, demand_forecast_df)
+    def run(stage):
+        """Generate one stage's table from its upstream tables, via the cache when enabled"""
+        args = [tables[name] if name in tables else TableSource(output_dir, name) for name in stage.inputs]
+        params = stage.resolve_params(tables)
+        # Shards are always written to disk, whether or not the run is out of core
+        sharded = processes is not None and stage.table in SHARDED_TABLES
+        if out_of_core and stage.table in OUT_OF_CORE_TABLES and not sharded:
+            params['stream'] = True
+        with instrumentation.stage(stage.table) as stats:
+            if cache is None:
+                df = stage.fn(*args, seed=seed, sink=sink, **params)
+            elif not stage.cacheable:
+                df = stage.fn(*args, seed=seed, sink=sink, **params)
+                upstream = {name: fingerprints[name] for name in stage.upstream}
+                fingerprints[stage.table] = cache.fingerprint(stage.table, stage.fn, params, seed, upstream)
+            else:
+                upstream = {name: fingerprints[name] for name in stage.upstream}
+                df, fingerprints[stage.table] = cache.run(stage.table, stage.fn, args, upstream, seed, sink, **params)
+            if df is not None:
+                # Streamed tables were counted chunk by chunk as they were written
+                stats.rows = len(df)
+        if df is None:
+            return
+        if stage.on_complete is not None:
+            stage.on_complete(df)
+        tables[stage.table] = df
     
-    # Generate KPI dashboard
-    kpi_df = generate_kpi_dashboard(inventory_df, production_df, demand_forecast_df, time_df)
+    stages = pipeline_stages(sink, sizes, features, processes, materials_table)
+    run_stages(stages, run, workers)
+    instrumentation.close()
     
+    seconds = {result['stage']: result['seconds'] for result in instrumentation.results}
+    path, path_seconds = critical_path(stages, seconds)
+    print(f"Critical path: {' -> '.join(path)} ({path_seconds:.2f}s of {sum(seconds.values()):.2f}s stage time)")
     print("Dataset generation complete!")
-    print(f"Files saved to: {os.path.abspath('sample_data')}")
+    print(f"Files saved to: {os.path.abspath(output_dir)}")
+    return tables
 
 if __name__ == "__main__":
-    main()
+    import cli
+    sys.exit(cli.main())
@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+
+
+class EventIndex:
+    """Interval index over dated events keyed by product or supplier
+
+    Events are stored CSR-style: sorted by (key, start day), with an offsets
+    array giving each key's slice. Point lookups binary-search that slice and
+    whole-horizon activity matrices are built with difference arrays, so
+    neither scans the full calendar.
+    """
+
+    def __init__(self, keys, starts, durations, values=None):
+        keys = np.asarray(keys)
+        starts = np.asarray(starts, dtype='datetime64[D]')
+        durations = np.asarray(durations, dtype='int64')
+        values = np.ones(len(keys)) if values is None else np.asarray(values, dtype='float64')
+
+        self.key_index = pd.Index(pd.unique(keys))
+        self.key_codes = {key: code for code, key in enumerate(self.key_index)}
+        key_codes = self.key_index.get_indexer(keys)
+        start_days = starts.astype('int64')
+
+        # Sort by key then start so every key owns one contiguous, ordered slice
+        order = np.lexsort((start_days, key_codes))
+        self.event_ids = order
+        self.starts = start_days[order]
+        self.ends = self.starts + durations[order]
+        self.values = values[order]
+        self.offsets = np.searchsorted(key_codes[order], np.arange(len(self.key_index) + 1))
+        self.max_duration = int(durations.max()) if len(durations) else 0
+
+    @classmethod
+    def from_promotions(cls, promotions_df):
+        """Index the output of generate_promotion_calendar by product"""
+        return cls(promotions_df['product_id'], pd.to_datetime(promotions_df['date']),
+                   promotions_df['duration_days'], promotions_df['discount_factor'])
+
+    @classmethod
+    def from_disruptions(cls, disruptions_df):
+        """Index the output of generate_supply_disruptions by supplier"""
+        return cls(disruptions_df['supplier_id'], pd.to_datetime(disruptions_df['date']),
+                   disruptions_df['duration_days'], disruptions_df['severity_factor'])
+
+    def __len__(self):
+        return len(self.starts)
+
+    def active(self, key, date):
+        """Row positions (in the source frame) of events active for key on date
+
+        An event is active from its start date through start + duration days
+        inclusive. Only events starting within max_duration days before the
+        date are inspected.
+        """
+        code = self.key_codes.get(key)
+        if code is None:
+            return np.empty(0, dtype='int64')
+
+        day = np.datetime64(date, 'D').astype('int64')
+        lo, hi = self.offsets[code], self.offsets[code + 1]
+        first = lo + np.searchsorted(self.starts[lo:hi], day - self.max_duration, side='left')
+        last = lo + np.searchsorted(self.starts[lo:hi], day, side='right')
+        window = np.arange(first, last)
+        return self.event_ids[window[self.ends[window] >= day]]
+
+    def _matrices(self, dates, keys):
+        """Active-event counts and value sums as (keys x dates) arrays"""
+        days = np.asarray(pd.DatetimeIndex(dates).values, dtype='datetime64[D]').astype('int64')
+        key_codes = self.key_index.get_indexer(pd.Index(keys))
+
+        # Map each indexed key to its output row; keys not requested are dropped
+        rows = np.full(len(self.key_index), -1)
+        rows[key_codes[key_codes >= 0]] = np.flatnonzero(key_codes >= 0)
+        event_rows = rows[np.repeat(np.arange(len(self.key_index)), np.diff(self.offsets))]
+        keep = event_rows >= 0
+
+        # Difference arrays: +1 at the first covered date, -1 after the last
+        first = np.searchsorted(days, self.starts[keep], side='left')
+        stop = np.searchsorted(days, self.ends[keep], side='right')
+        counts = np.zeros((len(key_codes), len(days) + 1))
+        sums = np.zeros_like(counts)
+        np.add.at(counts, (event_rows[keep], first), 1)
+        np.add.at(counts, (event_rows[keep], stop), -1)
+        np.add.at(sums, (event_rows[keep], first), self.values[keep])
+        np.add.at(sums, (event_rows[keep], stop), -self.values[keep])
+        return counts.cumsum(axis=1)[:, :-1], sums.cumsum(axis=1)[:, :-1]
+
+    def activity_matrix(self, dates, keys):
+        """Number of active events for every (key, date) pair"""
+        counts, _ = self._matrices(dates, keys)
+        return counts.round().astype('int64')
+
+    def mean_value_matrix(self, dates, keys, default=0.0):
+        """Mean value of active events for every (key, date) pair
+
+        Cells with no active event are filled with default.
+        """
+        counts, sums = self._matrices(dates, keys)
+        counts = counts.round()
+        means = np.full(counts.shape, default, dtype='float64')
+        np.divide(sums, counts, out=means, where=counts > 0)
+        return means
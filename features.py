@@ -0,0 +1,50 @@
+import numpy as np
+
+# Demand lags of the feature store, in periods
+FEATURE_LAGS = (1, 2, 3, 6, 12)
+
+# Trailing windows (in periods) of the rolling demand mean and standard deviation
+ROLLING_WINDOWS = (3, 6, 12)
+
+
+def lagged(demand, lag):
+    """(series x periods) demand shifted lag periods later; NaN before a series has lag periods of history"""
+    result = np.full(demand.shape, np.nan)
+    if lag < demand.shape[1]:
+        result[:, lag:] = demand[:, :demand.shape[1] - lag]
+    return result
+
+
+def rolling_stats(demand, window):
+    """Mean and sample standard deviation of the window periods before each period
+
+    Windows end before the current period, so a feature never includes the
+    value it is used to predict, and are NaN until a series has window
+    periods of history. Both come from running sums along the period axis:
+    each window costs a subtraction per cell whatever its length.
+    """
+    num_series, num_periods = demand.shape
+    mean = np.full(demand.shape, np.nan)
+    std = np.full(demand.shape, np.nan)
+    if window >= num_periods:
+        return mean, std
+    zeros = np.zeros((num_series, 1))
+    sums = np.hstack([zeros, demand.cumsum(axis=1)])
+    squares = np.hstack([zeros, (demand ** 2).cumsum(axis=1)])
+    total = sums[:, window:num_periods] - sums[:, :num_periods - window]
+    total_squares = squares[:, window:num_periods] - squares[:, :num_periods - window]
+    mean[:, window:] = total / window
+    if window > 1:
+        # Running sums can leave a tiny negative variance on flat series
+        std[:, window:] = np.sqrt(np.maximum(0, (total_squares - total * total / window) / (window - 1)))
+    return mean, std
+
+
+def demand_features(demand, lags=FEATURE_LAGS, windows=ROLLING_WINDOWS):
+    """Lag and rolling-window features of (series x periods) demand, as float32 arrays by column name"""
+    features = {f'demand_lag_{lag}': lagged(demand, lag) for lag in lags}
+    for window in windows:
+        mean, std = rolling_stats(demand, window)
+        features[f'demand_rolling_mean_{window}'] = mean
+        features[f'demand_rolling_std_{window}'] = std
+    return {name: values.astype('float32') for name, values in features.items()}
@@ -0,0 +1,260 @@
+import cProfile
+import collections
+import contextlib
+import datetime
+import json
+import os
+import resource
+import sys
+import threading
+import time
+
+
+def rss_bytes():
+    """Current resident set size, or None where /proc is unavailable"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return None
+
+
+def max_rss_bytes():
+    """Process-lifetime RSS high-water mark from getrusage"""
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss if sys.platform == 'darwin' else max_rss * 1024
+
+
+class PeakRssMonitor:
+    """Samples RSS on a background thread to find the high-water mark of a block
+
+    Sampling can miss short spikes while the GIL is held, so the peak is a
+    lower bound. Without /proc the process-lifetime maximum is reported.
+    RSS is process-wide: a block running alongside other work measures the
+    peak of all of it, not its own.
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, rss_bytes() or 0)
+
+    def __enter__(self):
+        if rss_bytes() is None:
+            return self
+        self.peak = rss_bytes()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._thread is None:
+            self.peak = max_rss_bytes()
+            return
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, rss_bytes())
+
+
+class StackSampler:
+    """Sampling profiler for one thread, written as collapsed stacks
+
+    Every interval the thread's Python stack is recorded; the output has one
+    "outer;...;inner count" line per distinct stack, the input format of
+    flamegraph.pl and speedscope.
+    """
+
+    def __init__(self, path, thread_id=None, interval=0.01):
+        self.path = path
+        self.thread_id = threading.get_ident() if thread_id is None else thread_id
+        self.interval = interval
+        self.samples = collections.Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})')
+                frame = frame.f_back
+            if stack:
+                self.samples[';'.join(reversed(stack))] += 1
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        self._thread.join()
+        with open(self.path, 'w') as f:
+            for stack, count in self.samples.most_common():
+                f.write(f'{stack} {count}\n')
+
+
+class StageStats:
+    """Counters of one running stage"""
+
+    def __init__(self, name):
+        self.name = name
+        self.rows = 0
+        self.chunks = 0
+        self.start = time.perf_counter()
+        self.last_progress = self.start
+        # Set when another stage ran at any point during this one
+        self.overlapped = False
+
+
+class Instrumentation:
+    """Per-stage timers, row counters, memory high-water marks and profiling
+
+    Every stage emits stage_start/stage_end events (and progress events while
+    chunks are produced) as JSON lines to event_log, a path or an open file.
+    Chunk counts arrive through the sink: set sink.observer to this object
+    and generators report each chunk they emit. profile_stage names a single
+    stage to capture with cProfile (a .prof file) or the built-in sampling
+    profiler (collapsed stacks) into profile_dir.
+
+    Peak RSS is sampled for the whole process, so stages that overlap in
+    time share one high-water mark. Their stage_end events carry
+    peak_rss_shared=True and the printed figure is marked approximate; the
+    run_end event's max_rss_mb is exact at any worker count.
+    """
+
+    def __init__(self, event_log=None, progress_interval=5.0, profile_stage=None, profiler='cprofile',
+                 profile_dir='.', verbose=True):
+        if profiler not in ('cprofile', 'sampling'):
+            raise ValueError(f"Unknown profiler: {profiler}")
+        self.progress_interval = progress_interval
+        self.profile_stage = profile_stage
+        self.profiler = profiler
+        self.profile_dir = profile_dir
+        self.verbose = verbose
+        self.stages = {}
+        self.results = []
+        self._running = {}
+        self._lock = threading.Lock()
+        self._owns_log = isinstance(event_log, (str, os.PathLike))
+        self._log = open(event_log, 'a') if self._owns_log else event_log
+        self._run_start = time.perf_counter()
+
+    def emit(self, event, **fields):
+        """Write one structured event to the log"""
+        if self._log is None:
+            return
+        record = {
+            'ts': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='milliseconds'),
+            'event': event,
+            **fields
+        }
+        with self._lock:
+            self._log.write(json.dumps(record, default=str) + '\n')
+            self._log.flush()
+
+    def chunk(self, table, rows):
+        """Count a chunk emitted by a generator; reports progress at most every progress_interval"""
+        stats = self.stages.get(table)
+        if stats is None:
+            return
+        stats.rows += rows
+        stats.chunks += 1
+        now = time.perf_counter()
+        if now - stats.last_progress >= self.progress_interval:
+            stats.last_progress = now
+            elapsed = now - stats.start
+            rate = stats.rows / elapsed if elapsed > 0 else 0.0
+            self.emit('progress', stage=table, rows=stats.rows, chunks=stats.chunks,
+                      seconds=round(elapsed, 3), rows_per_sec=round(rate, 1), rss_mb=_mb(rss_bytes()))
+            if self.verbose:
+                print(f"  {table}: {stats.rows:,} rows after {elapsed:.1f}s ({rate:,.0f} rows/s)\n", end='')
+
+    def _profiler(self, table):
+        if table != self.profile_stage:
+            return contextlib.nullcontext()
+        os.makedirs(self.profile_dir, exist_ok=True)
+        if self.profiler == 'sampling':
+            return StackSampler(os.path.join(self.profile_dir, f'{table}.stacks'))
+        return _CProfile(os.path.join(self.profile_dir, f'{table}.prof'))
+
+    @contextlib.contextmanager
+    def stage(self, table):
+        """Measure one stage; the yielded StageStats takes the final row count"""
+        stats = StageStats(table)
+        self.stages[table] = stats
+        with self._lock:
+            if self._running:
+                stats.overlapped = True
+                for other in self._running.values():
+                    other.overlapped = True
+            self._running[table] = stats
+        self.emit('stage_start', stage=table, rss_mb=_mb(rss_bytes()))
+        profiler = self._profiler(table)
+        try:
+            with PeakRssMonitor() as rss, profiler:
+                yield stats
+        except BaseException as exc:
+            del self.stages[table]
+            self._finish(table)
+            self.emit('stage_failed', stage=table, rows=stats.rows,
+                      seconds=round(time.perf_counter() - stats.start, 3), error=repr(exc))
+            raise
+        self._finish(table)
+        seconds = time.perf_counter() - stats.start
+        result = {
+            'stage': table,
+            'rows': stats.rows,
+            'chunks': stats.chunks,
+            'seconds': round(seconds, 3),
+            'rows_per_sec': round(stats.rows / seconds, 1) if seconds > 0 else None,
+            'peak_rss_mb': _mb(rss.peak),
+            'peak_rss_shared': stats.overlapped
+        }
+        if table == self.profile_stage:
+            result['profile'] = os.path.abspath(profiler.path)
+        self.results.append(result)
+        del self.stages[table]
+        self.emit('stage_end', **result)
+        if self.verbose:
+            peak = f"~{result['peak_rss_mb']} MB, shared" if stats.overlapped else f"{result['peak_rss_mb']} MB"
+            print(f"  {table}: {stats.rows:,} rows in {seconds:.2f}s "
+                  f"({result['rows_per_sec'] or 0:,.0f} rows/s, peak RSS {peak})\n", end='')
+
+    def _finish(self, table):
+        with self._lock:
+            del self._running[table]
+
+    def close(self):
+        """Emit the run summary and close the event log"""
+        self.emit('run_end', seconds=round(time.perf_counter() - self._run_start, 3),
+                  rows=sum(result['rows'] for result in self.results), max_rss_mb=_mb(max_rss_bytes()))
+        if self._owns_log:
+            self._log.close()
+
+
+class _CProfile:
+    """cProfile capture of a block, dumped to path for pstats or snakeviz"""
+
+    def __init__(self, path):
+        self.path = path
+        self.profile = cProfile.Profile()
+
+    def __enter__(self):
+        self.profile.enable()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.profile.disable()
+        self.profile.dump_stats(self.path)
+
+
+def _mb(value):
+    return None if value is None else round(value / 2 ** 20, 1)
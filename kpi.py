@@ -0,0 +1,164 @@
+import numpy as np
+import pandas as pd
+
+from compact import keys, narrow, positions
+
+# Additive measures summed per cell from each fact table
+MEASURES = {
+    'Inventory': ('inventory_rows', 'inventory_value', 'target_inventory_value', 'carrying_cost',
+                  'stockout_quantity', 'in_stock_rows', 'fill_rate'),
+    'ProductionPlan': ('production_rows', 'total_cost', 'production_hours', 'setup_hours'),
+    'DemandForecast': ('demand_rows', 'forecast_quantity')
+}
+
+# Columns each fact table must provide, so lazily scanned tables read nothing else
+FACT_COLUMNS = {
+    'Inventory': ['date', 'product_id', 'location_id', 'quantity_on_hand', 'safety_stock_level',
+                  'economic_order_quantity', 'carrying_cost', 'stockout_quantity', 'fill_rate'],
+    'ProductionPlan': ['date', 'product_id', 'location_id', 'total_cost', 'production_hours', 'setup_hours'],
+    'DemandForecast': ['date', 'product_id', 'location_id', 'forecast_quantity']
+}
+
+# Location attribute behind each location rollup; Plant rolls up plant locations one by one
+LOCATION_ROLLUPS = {'LocationType': 'location_type', 'Region': 'region', 'Plant': 'location_id'}
+
+# Output order of the metrics within a period and dimension
+METRICS = ('Inventory Value', 'Inventory Carrying Cost', 'Production Cost', 'Resource Utilization',
+           'Forecast Accuracy', 'On-Time Delivery', 'Perfect Order Rate')
+
+
+class KpiCube:
+    """Additive KPI measures per (period, product category, location) cell
+
+    Fact tables are added chunk by chunk: each chunk is reduced with
+    np.bincount into fixed-size arrays, so memory follows the number of
+    cells rather than rows and cubes built from different chunks (or
+    processes) merge by addition. Rollups by category, location type,
+    region and plant are sums over the cube's axes.
+    """
+
+    def __init__(self, calendar, products_df, locations_df, plant_ids=None):
+        self.calendar = calendar
+        self.product_index = pd.Index(products_df['product_id'])
+        self.product_category, self.categories = pd.factorize(products_df['product_category'])
+        self.unit_costs = products_df['unit_cost'].to_numpy(dtype='float64')
+        self.locations = locations_df.reset_index(drop=True)
+        self.location_index = pd.Index(self.locations['location_id'])
+        if plant_ids is None:
+            plant_ids = self.locations.loc[self.locations['location_type'] == 'Plant', 'location_id']
+        self.plant_ids = pd.Index(plant_ids)
+        self.shape = (len(calendar), len(self.categories), len(self.location_index))
+        self.measures = {
+            name: np.zeros(np.prod(self.shape)) for names in MEASURES.values() for name in names
+        }
+
+    def _add(self, chunk, product=None, **weights):
+        """Sum each weight column of chunk into its measure, one bincount per measure
+
+        product optionally passes the chunk's already resolved product positions.
+        """
+        period = self.calendar.index(chunk['date'])
+        if product is None:
+            product = positions(self.product_index, chunk['product_id'])
+        location = positions(self.location_index, chunk['location_id'])
+        known = (period >= 0) & (product >= 0) & (location >= 0)
+        category = self.product_category[product[known]]
+        cells = (period[known] * self.shape[1] + category) * self.shape[2] + location[known]
+        size = len(self.measures[next(iter(weights))])
+        for name, values in weights.items():
+            values = None if values is None else np.asarray(values, dtype='float64')[known]
+            self.measures[name] += np.bincount(cells, weights=values, minlength=size)
+
+    def add_inventory(self, chunk):
+        product = positions(self.product_index, chunk['product_id'])
+        unit_cost = self.unit_costs[product]
+        target_stock = chunk['safety_stock_level'].to_numpy() + chunk['economic_order_quantity'].to_numpy() / 2
+        self._add(chunk, product, inventory_rows=None,
+                  inventory_value=chunk['quantity_on_hand'].to_numpy() * unit_cost,
+                  target_inventory_value=target_stock * unit_cost,
+                  carrying_cost=chunk['carrying_cost'], stockout_quantity=chunk['stockout_quantity'],
+                  in_stock_rows=chunk['stockout_quantity'].to_numpy() <= 0, fill_rate=chunk['fill_rate'])
+
+    def add_production(self, chunk):
+        self._add(chunk, production_rows=None, total_cost=chunk['total_cost'],
+                  production_hours=chunk['production_hours'], setup_hours=chunk['setup_hours'])
+
+    def add_demand(self, chunk):
+        self._add(chunk, demand_rows=None, forecast_quantity=chunk['forecast_quantity'])
+
+    def merge(self, other):
+        """Add another cube's measures (built over the same calendar and master data) to this one"""
+        for name, values in other.measures.items():
+            self.measures[name] += values
+        return self
+
+    def rollups(self):
+        """(dimension_type, dimension_ids, measures as periods x ids arrays) for every rollup"""
+        cube = {name: values.reshape(self.shape) for name, values in self.measures.items()}
+        yield 'Overall', pd.Index(['ALL']), {name: values.sum(axis=(1, 2))[:, None] for name, values in cube.items()}
+        yield 'Category', pd.Index(self.categories), {name: values.sum(axis=2) for name, values in cube.items()}
+
+        by_location = {name: values.sum(axis=1) for name, values in cube.items()}
+        for dimension_type, column in LOCATION_ROLLUPS.items():
+            if column not in self.locations.columns:
+                continue
+            keys = self.locations[column]
+            if dimension_type == 'Plant':
+                keys = keys.where(keys.isin(self.plant_ids))
+            codes, ids = pd.factorize(keys)
+            # Locations outside the rollup (code -1) land in a dropped extra column
+            membership = np.zeros((len(codes), len(ids) + 1))
+            membership[np.arange(len(codes)), codes] = 1
+            yield dimension_type, pd.Index(ids), {
+                name: (values @ membership)[:, :-1] for name, values in by_location.items()
+            }
+
+
+def kpi_rows(cube):
+    """KPI_Dashboard rows for every period, rollup and metric with underlying data
+
+    Forecast accuracy is 1 - WAPE against actual sales, i.e. forecast demand
+    less the sales lost to stockouts in the Inventory simulation. Orders are
+    not simulated one by one, so delivery metrics come from the same
+    simulation by (product, location, period): on-time delivery is the share
+    of those cells served entirely from stock, and perfect order rate
+    multiplies it by their mean fill rate (on time and in full). Dates and
+    metric names are surrogate keys (see compact.keys).
+    """
+    dates = cube.calendar.dates
+    frames = []
+    for dimension_type, ids, m in cube.rollups():
+        hours = m['production_hours'] + m['setup_hours']
+        on_time = m['in_stock_rows'] / m['inventory_rows']
+        with np.errstate(divide='ignore', invalid='ignore'):
+            metrics = {
+                'Inventory Value': (m['inventory_value'], m['target_inventory_value'], m['inventory_rows']),
+                'Inventory Carrying Cost': (m['carrying_cost'], m['carrying_cost'] * 0.9, m['inventory_rows']),
+                'Production Cost': (m['total_cost'], m['total_cost'] * 0.95, m['production_rows']),
+                'Resource Utilization': (m['production_hours'] / hours * 100, 85.0, hours),
+                'Forecast Accuracy': (np.maximum(0, 1 - m['stockout_quantity'] / m['forecast_quantity']) * 100, 95.0,
+                                      m['forecast_quantity'] * m['inventory_rows']),
+                'On-Time Delivery': (on_time * 100, 98.0, m['inventory_rows']),
+                'Perfect Order Rate': (on_time * m['fill_rate'] / m['inventory_rows'] * 100, 95.0,
+                                       m['inventory_rows'])
+            }
+        # (periods x ids x metrics) arrays, flattened period-major
+        values = np.stack([np.broadcast_to(metrics[name][0], m['inventory_rows'].shape) for name in METRICS], axis=-1)
+        targets = np.stack([np.broadcast_to(metrics[name][1], values.shape[:2]) for name in METRICS], axis=-1)
+        present = np.stack([metrics[name][2] > 0 for name in METRICS], axis=-1).ravel()
+        period, group, metric = np.unravel_index(np.flatnonzero(present), values.shape)
+        value = values.ravel()[present].round(2)
+        target = targets.ravel()[present].round(2)
+        frames.append(pd.DataFrame({
+            'date': keys(period, dates),
+            'metric_name': keys(metric, pd.Index(METRICS)),
+            'metric_value': value,
+            'target_value': target,
+            'variance_percentage': np.divide((value - target) * 100, target, out=np.zeros_like(value),
+                                             where=target != 0).round(2),
+            'dimension_type': dimension_type,
+            'dimension_id': ids.to_numpy()[group]
+        }))
+    # Date codes follow the calendar, so sorting them sorts chronologically
+    rows = pd.concat(frames, ignore_index=True).sort_values('date', kind='stable', ignore_index=True)
+    return narrow(rows, 'KPI_Dashboard')
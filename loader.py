@@ -0,0 +1,497 @@
+import argparse
+import io
+import os
+import re
+import sqlite3
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from sinks import DEFAULT_CHUNK_ROWS
+from sources import iter_table_chunks, table_columns, table_path
+from timeline import SEASONS
+
+try:
+    import duckdb
+except ImportError:  # DuckDB is an optional target
+    duckdb = None
+
+# Schema shipped with the generator
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'schema.sql')
+
+# Rows inserted between commits
+DEFAULT_COMMIT_ROWS = 1_000_000
+
+# Generator column names for schema columns whose names drifted, by table
+COLUMN_ALIASES = {
+    '*': {'date_id': 'date', 'start_date': 'date'},
+    'TransportLane': {
+        'origin_location_id': 'origin_id',
+        'destination_location_id': 'destination_id',
+        'transit_time_days': 'transit_time',
+        'capacity_weight_kg': 'capacity',
+        'reliability_score': 'reliability'
+    }
+}
+
+
+def _end_date(chunk):
+    start = pd.to_datetime(chunk['date']).to_numpy().astype('datetime64[D]')
+    return start + chunk['duration_days'].to_numpy().astype('timedelta64[D]')
+
+
+# Schema columns the generator does not emit, derived from the columns it does
+# (TimeDimension entries cover tables written before the calendar had them)
+DERIVED_COLUMNS = {
+    'TimeDimension': {
+        'is_weekend': lambda chunk: chunk['day_of_week'].to_numpy() >= 5,
+        'season': lambda chunk: SEASONS[chunk['month'].to_numpy() - 1]
+    },
+    'PromotionCalendar': {'end_date': _end_date},
+    'SupplyDisruptions': {'end_date': _end_date}
+}
+
+
+@dataclass
+class Column:
+    name: str
+    definition: str
+
+    @property
+    def serial(self):
+        return self.definition.upper().startswith('SERIAL')
+
+    @property
+    def has_default(self):
+        return 'DEFAULT' in self.definition.upper()
+
+    @property
+    def is_date(self):
+        return self.definition.upper().startswith('DATE')
+
+    @property
+    def decimal(self):
+        """(precision, scale) of a DECIMAL column, else None"""
+        match = re.match(r'DECIMAL\((\d+),\s*(\d+)\)', self.definition, re.IGNORECASE)
+        return (int(match.group(1)), int(match.group(2))) if match else None
+
+
+@dataclass
+class TableSpec:
+    name: str
+    columns: list
+    constraints: list
+    unique: list = field(default_factory=list)
+
+    @property
+    def serial_column(self):
+        return next((column.name for column in self.columns if column.serial), None)
+
+
+def _split_top_level(body):
+    """Split a column list on commas outside parentheses"""
+    items, depth, current = [], 0, []
+    for char in body:
+        depth += (char == '(') - (char == ')')
+        if char == ',' and depth == 0:
+            items.append(''.join(current).strip())
+            current = []
+        else:
+            current.append(char)
+    items.append(''.join(current).strip())
+    return [item for item in items if item]
+
+
+def parse_schema(path=SCHEMA_PATH):
+    """Parse schema.sql into table specs (in file order) and CREATE INDEX statements"""
+    with open(path) as f:
+        sql = re.sub(r'--[^\n]*', '', f.read())
+
+    tables, indexes = [], []
+    for statement in (part.strip() for part in sql.split(';')):
+        match = re.match(r'CREATE TABLE (\w+) \((.*)\)$', statement, re.IGNORECASE | re.DOTALL)
+        if match:
+            columns, constraints, unique = [], [], []
+            for item in _split_top_level(match.group(2)):
+                item = ' '.join(item.split())
+                if item.split()[0].upper() in ('PRIMARY', 'CONSTRAINT', 'UNIQUE', 'FOREIGN', 'CHECK'):
+                    constraints.append(item)
+                    unique_match = re.search(r'UNIQUE \(([^)]*)\)', item, re.IGNORECASE)
+                    if unique_match:
+                        unique.append([name.strip() for name in unique_match.group(1).split(',')])
+                else:
+                    name, definition = item.split(' ', 1)
+                    columns.append(Column(name, definition))
+            tables.append(TableSpec(match.group(1), columns, constraints, unique))
+        elif statement.upper().startswith('CREATE INDEX'):
+            indexes.append(' '.join(statement.split()))
+    return tables, indexes
+
+
+def map_chunk(spec, chunk, columns, first_id=1):
+    """Rename, derive and convert one generated chunk to the schema's columns
+
+    columns lists the schema columns being loaded. A serial key keeps the
+    generated ids when the table has them (see explicit_ids), and is
+    otherwise numbered from first_id so ids keep increasing across chunks.
+    """
+    aliases = {**COLUMN_ALIASES['*'], **COLUMN_ALIASES.get(spec.name, {})}
+    derived = DERIVED_COLUMNS.get(spec.name, {})
+    by_name = {column.name: column for column in spec.columns}
+
+    chunk = chunk.reset_index(drop=True)
+    mapped = {}
+    for name in columns:
+        column = by_name[name]
+        if column.serial and not explicit_ids(spec, chunk):
+            values = np.arange(first_id, first_id + len(chunk))
+        elif name in chunk.columns:
+            values = chunk[name]
+        elif aliases.get(name) in chunk.columns:
+            values = chunk[aliases[name]]
+        else:
+            values = derived[name](chunk)
+
+        if column.is_date and not pd.api.types.is_string_dtype(values.dtype):
+            values = np.datetime_as_string(pd.to_datetime(values).to_numpy().astype('datetime64[D]'))
+        elif column.decimal:
+            # Round to the declared scale; values beyond its precision would be rejected or mangled
+            precision, scale = column.decimal
+            limit = 10 ** (precision - scale) - 10 ** -scale
+            values = np.round(np.asarray(values, dtype='float64'), scale)
+            out_of_range = int((np.abs(values) > limit).sum())
+            if out_of_range:
+                raise ValueError(f"{spec.name}.{name}: {out_of_range} rows exceed DECIMAL({precision},{scale}) "
+                                 f"(largest magnitude {np.nanmax(np.abs(values))})")
+        mapped[name] = values
+    return pd.DataFrame(mapped)
+
+
+def explicit_ids(spec, chunk):
+    """Whether chunk carries its own integer values for spec's serial key (e.g. SOP_Scenario.scenario_id)
+
+    Generated keys that are not integers, such as TransportLane's TL-prefixed
+    lane_id, cannot fill a SERIAL column and are numbered instead.
+    """
+    name = spec.serial_column
+    return name is not None and name in chunk.columns and pd.api.types.is_integer_dtype(chunk[name].dtype)
+
+
+def load_columns(spec, source_columns):
+    """Schema columns of spec that can be filled from a table with source_columns
+
+    Serial keys are always filled; columns with a DEFAULT (created_at,
+    updated_at) are left to the database.
+    """
+    aliases = {**COLUMN_ALIASES['*'], **COLUMN_ALIASES.get(spec.name, {})}
+    derived = DERIVED_COLUMNS.get(spec.name, {})
+    columns = []
+    for column in spec.columns:
+        available = (column.name in source_columns or aliases.get(column.name) in source_columns
+                     or column.name in derived)
+        if column.serial or available:
+            columns.append(column.name)
+        elif not column.has_default:
+            raise ValueError(f"{spec.name}.{column.name} is required by the schema but not generated")
+    return columns
+
+
+class SqlLoader:
+    """Base class for load targets: DDL, batched inserts and transaction control"""
+
+    dialect = None
+
+    def __init__(self, foreign_keys=False):
+        self.foreign_keys = foreign_keys
+
+    def table_ddl(self, spec):
+        """CREATE TABLE statement for spec in this target's dialect"""
+        items = [f'{column.name} {self.column_type(column.definition)}' for column in spec.columns]
+        items += spec.constraints
+        if not self.foreign_keys:
+            # Bulk loads skip referential checks; dimension keys are generated consistently
+            items = [re.sub(r'\s*REFERENCES \w+\(\w+\)', '', item) for item in items]
+        return f"CREATE TABLE {spec.name} ({', '.join(items)})"
+
+    def column_type(self, definition):
+        return definition
+
+    def drop_table(self, table):
+        self.execute(f'DROP TABLE IF EXISTS {table}')
+
+    def execute(self, sql):
+        raise NotImplementedError
+
+    def insert(self, table, frame):
+        """Append a mapped chunk to table within the open transaction"""
+        raise NotImplementedError
+
+    def begin(self):
+        self.execute('BEGIN')
+
+    def commit(self):
+        self.execute('COMMIT')
+
+    def finish_table(self, spec, last_id):
+        """Hook run after a table's rows are loaded; last_id is the largest serial key (0 if none)"""
+
+    def close(self):
+        pass
+
+
+class SqliteLoader(SqlLoader):
+    """Loads into an SQLite database file with executemany in large transactions"""
+
+    dialect = 'sqlite'
+
+    def __init__(self, path, foreign_keys=False):
+        super().__init__(foreign_keys)
+        self.path = path
+        self.connection = sqlite3.connect(path, isolation_level=None)
+        # Durability is not needed while bulk loading a disposable file
+        for pragma in ('journal_mode = OFF', 'synchronous = OFF', 'temp_store = MEMORY',
+                       'cache_size = -262144', 'locking_mode = EXCLUSIVE',
+                       f"foreign_keys = {'ON' if foreign_keys else 'OFF'}"):
+            self.connection.execute(f'PRAGMA {pragma}')
+
+    def column_type(self, definition):
+        # Only INTEGER PRIMARY KEY aliases the rowid in SQLite
+        return re.sub(r'^SERIAL', 'INTEGER', definition, flags=re.IGNORECASE)
+
+    def execute(self, sql):
+        self.connection.execute(sql)
+
+    def insert(self, table, frame):
+        placeholders = ', '.join('?' * len(frame.columns))
+        rows = zip(*(frame[name].tolist() for name in frame.columns))
+        self.connection.executemany(
+            f"INSERT INTO {table} ({', '.join(frame.columns)}) VALUES ({placeholders})", rows)
+
+    def close(self):
+        self.connection.close()
+
+
+class DuckDBLoader(SqlLoader):
+    """Loads into a DuckDB database file by inserting whole registered DataFrames"""
+
+    dialect = 'duckdb'
+
+    def __init__(self, path, foreign_keys=False):
+        if duckdb is None:
+            raise ImportError("The DuckDB target requires duckdb (pip install duckdb)")
+        super().__init__(foreign_keys)
+        self.path = path
+        self.connection = duckdb.connect(path)
+
+    def column_type(self, definition):
+        definition = re.sub(r'^SERIAL', 'INTEGER', definition, flags=re.IGNORECASE)
+        return re.sub(r'^JSON', 'VARCHAR', definition, flags=re.IGNORECASE)
+
+    def execute(self, sql):
+        self.connection.execute(sql)
+
+    def insert(self, table, frame):
+        self.connection.register('_chunk', frame)
+        columns = ', '.join(frame.columns)
+        self.connection.execute(f'INSERT INTO {table} ({columns}) SELECT {columns} FROM _chunk')
+        self.connection.unregister('_chunk')
+
+    def close(self):
+        self.connection.close()
+
+
+def _copy_csv(frame):
+    buffer = io.StringIO()
+    frame.to_csv(buffer, index=False, header=False)
+    return buffer.getvalue()
+
+
+class PostgresLoader(SqlLoader):
+    """Streams chunks into PostgreSQL with COPY ... FROM STDIN (psycopg 3 or psycopg2)"""
+
+    dialect = 'postgres'
+
+    def __init__(self, dsn, foreign_keys=False):
+        super().__init__(foreign_keys)
+        try:
+            import psycopg
+            self.connection = psycopg.connect(dsn, autocommit=True)
+            self._copy = self._copy_psycopg
+        except ImportError:
+            try:
+                import psycopg2
+            except ImportError:
+                raise ImportError("The PostgreSQL target requires psycopg (pip install psycopg)") from None
+            self.connection = psycopg2.connect(dsn)
+            self.connection.autocommit = True
+            self._copy = self._copy_psycopg2
+
+    def drop_table(self, table):
+        self.execute(f'DROP TABLE IF EXISTS {table} CASCADE')
+
+    def execute(self, sql):
+        with self.connection.cursor() as cursor:
+            cursor.execute(sql)
+
+    def _copy_psycopg(self, sql, data):
+        with self.connection.cursor() as cursor, cursor.copy(sql) as copy:
+            copy.write(data)
+
+    def _copy_psycopg2(self, sql, data):
+        with self.connection.cursor() as cursor:
+            cursor.copy_expert(sql, io.StringIO(data))
+
+    def insert(self, table, frame):
+        self._copy(f"COPY {table} ({', '.join(frame.columns)}) FROM STDIN WITH (FORMAT csv)", _copy_csv(frame))
+
+    def finish_table(self, spec, last_id):
+        # Explicit ids bypass the SERIAL sequence, so move it past the largest loaded id
+        if spec.serial_column and last_id:
+            self.execute(f"SELECT setval(pg_get_serial_sequence('{spec.name.lower()}', "
+                         f"'{spec.serial_column}'), {last_id})")
+
+    def close(self):
+        self.connection.close()
+
+
+class CopyScriptLoader(PostgresLoader):
+    """Writes a psql load script plus one CSV per table instead of connecting
+
+    Run it with psql -f <output_dir>/load.sql; every table is loaded with
+    client-side \\copy inside a single transaction.
+    """
+
+    def __init__(self, output_dir, foreign_keys=False):
+        SqlLoader.__init__(self, foreign_keys)
+        self.output_dir = os.path.abspath(output_dir)
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.script = open(os.path.join(self.output_dir, 'load.sql'), 'w')
+        self.files = {}
+
+    def execute(self, sql):
+        self.script.write(f'{sql};\n')
+
+    def insert(self, table, frame):
+        if table not in self.files:
+            path = os.path.join(self.output_dir, f'{table}.csv')
+            self.files[table] = open(path, 'w')
+            self.script.write(f"\\copy {table} ({', '.join(frame.columns)}) FROM '{path}' WITH (FORMAT csv)\n")
+        self.files[table].write(_copy_csv(frame))
+
+    def close(self):
+        for file in self.files.values():
+            file.close()
+        self.script.close()
+
+
+def _unique_mask(spec, frame, seen):
+    """Rows that keep every UNIQUE constraint of spec, given keys already loaded"""
+    keep = np.ones(len(frame), dtype=bool)
+    for position, columns in enumerate(spec.unique):
+        keys = list(zip(*(frame[name].tolist() for name in columns)))
+        known = seen.setdefault(position, set())
+        for row, key in enumerate(keys):
+            if key in known:
+                keep[row] = False
+            else:
+                known.add(key)
+    return keep
+
+
+def load_dataset(loader, input_dir='sample_data', schema_path=SCHEMA_PATH, tables=None,
+                 chunk_rows=DEFAULT_CHUNK_ROWS, commit_rows=DEFAULT_COMMIT_ROWS):
+    """Bulk load generated tables into a database laid out by schema.sql
+
+    Tables are (re)created without secondary indexes, filled chunk by chunk
+    with a commit every commit_rows rows, and the indexes are built once at
+    the end. Tables the generator did not write are skipped. Returns a dict
+    of rows loaded per table.
+    """
+    specs, indexes = parse_schema(schema_path)
+    if tables is not None:
+        specs = [spec for spec in specs if spec.name in tables]
+    specs = [spec for spec in specs if table_path(input_dir, spec.name) is not None]
+
+    for spec in reversed(specs):
+        loader.drop_table(spec.name)
+    for spec in specs:
+        loader.execute(loader.table_ddl(spec))
+
+    loaded = {}
+    for spec in specs:
+        start = time.perf_counter()
+        columns = load_columns(spec, set(table_columns(input_dir, spec.name)))
+        rows, last_id, pending, dropped, seen = 0, 0, 0, 0, {}
+        loader.begin()
+        for chunk in iter_table_chunks(input_dir, spec.name, chunk_rows):
+            frame = map_chunk(spec, chunk, columns, first_id=last_id + 1)
+            if spec.unique:
+                keep = _unique_mask(spec, frame, seen)
+                dropped += int((~keep).sum())
+                frame = frame[keep]
+                if spec.serial_column and not explicit_ids(spec, chunk):
+                    frame[spec.serial_column] = np.arange(last_id + 1, last_id + 1 + len(frame))
+            loader.insert(spec.name, frame)
+            if spec.serial_column and len(frame):
+                last_id = max(last_id, int(frame[spec.serial_column].max()))
+            rows += len(frame)
+            pending += len(frame)
+            if pending >= commit_rows:
+                loader.commit()
+                loader.begin()
+                pending = 0
+        loader.commit()
+        loader.finish_table(spec, last_id)
+
+        elapsed = time.perf_counter() - start
+        note = f", skipped {dropped} duplicate rows" if dropped else ''
+        print(f"Loaded {spec.name}: {rows} rows in {elapsed:.2f}s "
+              f"({rows / max(elapsed, 1e-9):,.0f} rows/s{note})")
+        loaded[spec.name] = rows
+
+    # Building indexes once over the full tables is far cheaper than maintaining them per insert
+    loaded_names = {spec.name.lower() for spec in specs}
+    loader.begin()
+    for statement in indexes:
+        table = re.search(r'ON (\w+)\s*\(', statement, re.IGNORECASE).group(1)
+        if table.lower() in loaded_names:
+            loader.execute(statement)
+    loader.commit()
+    return loaded
+
+
+# Load targets by name
+LOADERS = {
+    'sqlite': SqliteLoader,
+    'duckdb': DuckDBLoader,
+    'postgres': PostgresLoader,
+    'copy-script': CopyScriptLoader
+}
+
+
+def add_load_arguments(parser):
+    parser.add_argument('target', choices=sorted(LOADERS),
+                        help="database to load into (copy-script writes a psql \\copy script)")
+    parser.add_argument('database',
+                        help="database file (sqlite, duckdb), connection string (postgres) or output directory (copy-script)")
+    parser.add_argument('--input', default='sample_data', help="directory of generated tables")
+    parser.add_argument('--schema', default=SCHEMA_PATH, help="schema to create")
+    parser.add_argument('--tables', nargs='+', help="load only these tables")
+    parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS, help="rows per insert batch")
+    parser.add_argument('--commit-rows', type=int, default=DEFAULT_COMMIT_ROWS, help="rows per transaction")
+    parser.add_argument('--foreign-keys', action='store_true', help="keep REFERENCES constraints")
+    return parser
+
+
+def run_load(args):
+    loader = LOADERS[args.target](args.database, foreign_keys=args.foreign_keys)
+    try:
+        return load_dataset(loader, args.input, args.schema, args.tables, args.chunk_rows, args.commit_rows)
+    finally:
+        loader.close()
+
+
+if __name__ == "__main__":
+    run_load(add_load_arguments(argparse.ArgumentParser(description="Load generated S&OP data into SQL")).parse_args())
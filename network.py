@@ -0,0 +1,158 @@
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from cache import CACHE_FORMAT_VERSION, TableCache, _source_digest
+from compact import positions
+
+# Pseudo-mode of the route tables that may change mode between legs
+ANY_MODE = 'Any'
+
+# Lane columns minimized by the route tables: per-unit landed cost and transit days
+ROUTE_MEASURES = {'cost': 'cost_per_unit', 'transit': 'transit_time'}
+
+# Distance cells (sources x lanes) relaxed per step; bounds the memory of a batch of sources
+BATCH_CELLS = 20_000_000
+
+
+def _all_pairs(num_nodes, origins, destinations, weights, batch_cells=BATCH_CELLS):
+    """Least total weight from every node to every node over non-negative edges (inf if unreachable)
+
+    A batch of sources is relaxed at once: each step computes, for every
+    edge, the distance of its origin plus its weight (a sources x edges
+    array) and takes the minimum per destination with one reduceat over
+    edges grouped by destination. Steps repeat until nothing improves, which
+    takes one step more than the most legs any cheapest route needs.
+    """
+    order = np.argsort(destinations, kind='stable')
+    origins, destinations, weights = origins[order], destinations[order], weights[order]
+    targets, starts = np.unique(destinations, return_index=True)
+    result = np.empty((num_nodes, num_nodes), dtype='float32')
+    batch = max(1, batch_cells // max(1, len(origins)))
+    for lo in range(0, num_nodes, batch):
+        sources = np.arange(lo, min(num_nodes, lo + batch))
+        dist = np.full((len(sources), num_nodes), np.inf, dtype=result.dtype)
+        dist[np.arange(len(sources)), sources] = 0
+        # Only sources whose distances improved in the last step can improve again
+        active = np.arange(len(sources)) if len(origins) else np.empty(0, dtype=np.int64)
+        while len(active):
+            rows = dist[active]
+            best = np.minimum.reduceat(rows[:, origins] + weights, starts, axis=1)
+            improved = best < rows[:, targets]
+            rows[:, targets] = np.where(improved, best, rows[:, targets])
+            dist[active] = rows
+            active = active[improved.any(axis=1)]
+        result[sources] = dist
+    return result
+
+
+class RouteTables:
+    """All-pairs cheapest landed cost and fastest transit per mode, as dense location x location arrays
+
+    Lookups are gathers, so millions of (origin, destination) queries cost
+    a few array operations and no graph search.
+    """
+
+    def __init__(self, location_index, tables):
+        self.location_index = location_index
+        self.tables = tables
+
+    @property
+    def modes(self):
+        return list(self.tables)
+
+    def matrix(self, mode=ANY_MODE, measure='cost'):
+        """(origins x destinations) array of one mode and measure; inf where unreachable"""
+        return self.tables[mode][measure]
+
+    def lookup(self, origins, destinations, mode=ANY_MODE, measure='cost'):
+        """Route measure for each (origin, destination) location_id pair; NaN for unknown locations"""
+        origin = positions(self.location_index, pd.Series(origins))
+        destination = positions(self.location_index, pd.Series(destinations))
+        known = (origin >= 0) & (destination >= 0)
+        values = self.matrix(mode, measure)[np.where(known, origin, 0), np.where(known, destination, 0)]
+        return np.where(known, values, np.nan)
+
+    def to_frame(self):
+        """One row per (origin, destination) cell and one column per (mode, measure)"""
+        return pd.DataFrame({(mode, measure): values.ravel() for mode, measures in self.tables.items()
+                             for measure, values in measures.items()})
+
+    @classmethod
+    def from_frame(cls, location_index, frame):
+        size = len(location_index)
+        tables = {}
+        for mode, measure in frame.columns:
+            tables.setdefault(mode, {})[measure] = frame[(mode, measure)].to_numpy().reshape(size, size)
+        return cls(location_index, tables)
+
+
+class TransportNetwork:
+    """TransportLane as a directed multigraph over Location, indexed for routing
+
+    Each mode's lanes are held CSR-style: lanes sorted by origin position,
+    with indptr[i]:indptr[i + 1] spanning the lanes leaving location i.
+    """
+
+    def __init__(self, lanes_df, locations_df):
+        self.lanes = lanes_df.reset_index(drop=True)
+        self.location_index = pd.Index(locations_df['location_id'])
+        self.origins = positions(self.location_index, self.lanes['origin_id'])
+        self.destinations = positions(self.location_index, self.lanes['destination_id'])
+        self.mode_names = sorted(pd.unique(self.lanes['transport_mode'].astype(str)))
+        self._adjacency = {}
+
+    def _mode_lanes(self, mode):
+        """Row numbers of the lanes of one mode (every lane for ANY_MODE) between known locations"""
+        known = (self.origins >= 0) & (self.destinations >= 0)
+        if mode != ANY_MODE:
+            known &= (self.lanes['transport_mode'] == mode).to_numpy()
+        return np.flatnonzero(known)
+
+    def adjacency(self, mode=ANY_MODE):
+        """(indptr, destinations, lane rows) of one mode's lanes in CSR layout"""
+        if mode not in self._adjacency:
+            rows = self._mode_lanes(mode)
+            rows = rows[np.argsort(self.origins[rows], kind='stable')]
+            counts = np.bincount(self.origins[rows], minlength=len(self.location_index))
+            indptr = np.concatenate([[0], np.cumsum(counts)])
+            self._adjacency[mode] = (indptr, self.destinations[rows], rows)
+        return self._adjacency[mode]
+
+    def neighbors(self, location_id, mode=ANY_MODE):
+        """Lanes leaving one location"""
+        indptr, _, rows = self.adjacency(mode)
+        node = self.location_index.get_loc(location_id)
+        return self.lanes.iloc[rows[indptr[node]:indptr[node + 1]]]
+
+    def fingerprint(self):
+        """Content hash of the locations and the lane columns routing reads"""
+        digest = hashlib.sha256()
+        digest.update(f'{CACHE_FORMAT_VERSION}:{_source_digest(_all_pairs)}'.encode())
+        digest.update(pd.util.hash_pandas_object(pd.Series(self.location_index), index=False).to_numpy().tobytes())
+        columns = ['origin_id', 'destination_id', 'transport_mode', *ROUTE_MEASURES.values()]
+        digest.update(pd.util.hash_pandas_object(self.lanes[columns].astype(str), index=False).to_numpy().tobytes())
+        return digest.hexdigest()
+
+    def route_tables(self, cache_dir=None):
+        """RouteTables for every mode and ANY_MODE, reused from cache_dir when the network is unchanged"""
+        cache = TableCache(cache_dir) if cache_dir else None
+        key = self.fingerprint() if cache else None
+        if cache is not None:
+            frame = cache.load(key)
+            if frame is not None:
+                return RouteTables.from_frame(self.location_index, frame)
+
+        tables = {}
+        for mode in [*self.mode_names, ANY_MODE]:
+            rows = self._mode_lanes(mode)
+            tables[mode] = {
+                measure: _all_pairs(len(self.location_index), self.origins[rows], self.destinations[rows],
+                                    self.lanes[column].to_numpy(dtype='float32')[rows])
+                for measure, column in ROUTE_MEASURES.items()
+            }
+        routes = RouteTables(self.location_index, tables)
+        if cache is not None:
+            cache.store(key, 'RouteTables', routes.to_frame())
+        return routes
@@ -0,0 +1,111 @@
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Callable
+
+
+@dataclass
+class Stage:
+    """One table of the pipeline and the upstream tables it needs
+
+    inputs are passed to fn positionally; depends only orders the stage (and
+    keys its cache entry) because its params are derived from those tables.
+    params is a dict or a callable taking the tables generated so far.
+    on_complete, if given, receives the finished table. cacheable=False
+    stages always run, because they write side tables the cache does not
+    hold (e.g. ProductionMaterial alongside ProductionPlan).
+    """
+    table: str
+    fn: Callable
+    inputs: tuple = ()
+    depends: tuple = ()
+    params: object = field(default_factory=dict)
+    on_complete: Callable = None
+    cacheable: bool = True
+
+    @property
+    def upstream(self):
+        return (*self.inputs, *self.depends)
+
+    def resolve_params(self, tables):
+        return self.params(tables) if callable(self.params) else dict(self.params)
+
+
+def topological_order(stages):
+    """Stages ordered so every stage follows its upstream ones; ties keep declaration order"""
+    by_table = {stage.table: stage for stage in stages}
+    for stage in stages:
+        missing = [name for name in stage.upstream if name not in by_table]
+        if missing:
+            raise ValueError(f"Stage {stage.table} depends on unknown stages: {', '.join(missing)}")
+
+    order, done = [], set()
+    pending = list(stages)
+    while pending:
+        ready = [stage for stage in pending if set(stage.upstream) <= done]
+        if not ready:
+            raise ValueError(f"Dependency cycle among stages: {', '.join(stage.table for stage in pending)}")
+        order += ready
+        done.update(stage.table for stage in ready)
+        pending = [stage for stage in pending if stage.table not in done]
+    return order
+
+
+def downstream_stages(stages, changed):
+    """Stages that read any of the changed tables, directly or transitively, in topological order
+
+    The changed tables' own stages are not included.
+    """
+    affected = set(changed)
+    result = []
+    for stage in topological_order(stages):
+        if stage.table not in changed and affected.intersection(stage.upstream):
+            affected.add(stage.table)
+            result.append(stage)
+    return result
+
+
+def critical_path(stages, seconds):
+    """Longest chain of dependent stages by elapsed seconds: (tables, total seconds)"""
+    finish, previous = {}, {}
+    for stage in topological_order(stages):
+        before = max(stage.upstream, key=lambda name: finish[name], default=None)
+        previous[stage.table] = before
+        finish[stage.table] = (finish[before] if before else 0.0) + seconds.get(stage.table, 0.0)
+
+    table = max(finish, key=finish.get)
+    path = []
+    while table is not None:
+        path.append(table)
+        table = previous[table]
+    return path[::-1], finish[path[0]]
+
+
+def run_stages(stages, execute, workers=1):
+    """Call execute(stage) for every stage as soon as its upstream stages have finished
+
+    With workers > 1 independent stages run concurrently on a thread pool:
+    NumPy, pandas and the file writers release the GIL for their heavy loops,
+    and stages hand DataFrames to each other without copying. The first
+    failure cancels stages that have not started and is re-raised.
+    """
+    order = topological_order(stages)
+    if workers == 1:
+        for stage in order:
+            execute(stage)
+        return
+
+    done, started, running = set(), set(), {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        try:
+            while len(done) < len(order):
+                for stage in order:
+                    if stage.table not in started and set(stage.upstream) <= done:
+                        started.add(stage.table)
+                        running[executor.submit(execute, stage)] = stage.table
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    future.result()
+                    done.add(running.pop(future))
+        except BaseException:
+            executor.shutdown(wait=True, cancel_futures=True)
+            raise
@@ -0,0 +1,124 @@
+import numpy as np
+import pandas as pd
+
+from compact import positions
+from event_index import EventIndex
+
+# Lead time multiplier at full disruption: a pair whose suppliers are all
+# fully disrupted waits (1 + LEAD_TIME_STRETCH) times its normal lead time
+LEAD_TIME_STRETCH = 1.0
+
+
+def supplier_severity(disruptions_df, supplier_ids, calendar):
+    """Mean severity of each supplier's active disruptions per period, as a (suppliers x periods) array
+
+    Severity is tracked per day over the calendar's horizon and averaged
+    over each period, so a ten-day outage costs a month a third of its
+    capacity.
+    """
+    if disruptions_df.empty or not len(calendar):
+        return np.zeros((len(supplier_ids), len(calendar)))
+    daily = EventIndex.from_disruptions(disruptions_df).mean_value_matrix(calendar.days, supplier_ids)
+    return calendar.aggregate_days(np.clip(daily, 0, 1))
+
+
+class SourcingMap:
+    """Suppliers and shares of every (product, location) pair, in ELL layout
+
+    Pairs are numbered product-major (product_idx * num_locations +
+    location_idx) like the Inventory simulation. Row i of suppliers and
+    shares lists pair i's supplier positions (-1 padded) and supply shares,
+    so the share-weighted severity of a block of pairs is a gather and a sum
+    over a few slots: a sparse (pairs x suppliers) by (suppliers x periods)
+    product without materializing either matrix.
+    """
+
+    def __init__(self, sourcing_df, product_ids, location_ids, supplier_ids):
+        self.num_locations = len(location_ids)
+        self.num_suppliers = len(supplier_ids)
+        product_idx = positions(pd.Index(product_ids), sourcing_df['product_id'])
+        location_idx = positions(pd.Index(location_ids), sourcing_df['location_id'])
+        supplier_idx = positions(pd.Index(supplier_ids), sourcing_df['supplier_id'])
+        known = (product_idx >= 0) & (location_idx >= 0) & (supplier_idx >= 0)
+        pairs = (product_idx * self.num_locations + location_idx)[known]
+
+        # Slot of each row within its pair: its rank among the pair's rows
+        order = np.argsort(pairs, kind='stable')
+        pairs = pairs[order]
+        first = np.searchsorted(pairs, pairs, side='left')
+        slots = np.arange(len(pairs)) - first
+        width = int(slots.max()) + 1 if len(slots) else 1
+
+        num_pairs = len(product_ids) * self.num_locations
+        self.suppliers = np.full((num_pairs, width), -1, dtype=np.int64)
+        self.shares = np.zeros((num_pairs, width))
+        self.suppliers[pairs, slots] = supplier_idx[known][order]
+        self.shares[pairs, slots] = sourcing_df['share'].to_numpy(dtype='float64')[known][order]
+
+    def impact(self, severity, pair_start, pair_stop):
+        """Share-weighted supplier severity of pairs [pair_start, pair_stop), as a (pairs x periods) array"""
+        # A zero row for padding slots keeps the gather branch-free
+        severity = np.vstack([severity, np.zeros((1, severity.shape[1]))])
+        suppliers = self.suppliers[pair_start:pair_stop]
+        shares = self.shares[pair_start:pair_stop]
+        result = np.zeros((len(suppliers), severity.shape[1]))
+        for slot in range(suppliers.shape[1]):
+            result += shares[:, slot, None] * severity[suppliers[:, slot]]
+        return np.clip(result, 0, 1)
+
+
+class CellFactors:
+    """Sparse per-(product, location, period) factors, with a default everywhere else
+
+    Built from SupplyImpact rows; cells are numbered like _pair_demand's,
+    (product_idx * num_locations + location_idx) * num_periods + period_idx,
+    and kept sorted so a block of pairs is one contiguous slice.
+    """
+
+    def __init__(self, cells, values, num_locations, calendar, default=1.0):
+        self.cells = cells
+        self.values = values
+        self.num_locations = num_locations
+        self.calendar = calendar
+        self.num_periods = len(calendar)
+        self.default = default
+
+    @classmethod
+    def from_chunks(cls, chunks, columns, product_ids, location_ids, calendar, default=1.0):
+        """One CellFactors per factor column of SupplyImpact chunks, read in a single pass"""
+        product_index, location_index = pd.Index(product_ids), pd.Index(location_ids)
+        cells, values = [np.empty(0, dtype=np.int64)], [np.empty((0, len(columns)))]
+        for chunk in chunks:
+            product_idx = positions(product_index, chunk['product_id'])
+            location_idx = positions(location_index, chunk['location_id'])
+            period_idx = calendar.index(chunk['date'])
+            known = (product_idx >= 0) & (location_idx >= 0) & (period_idx >= 0)
+            cells.append(((product_idx * len(location_ids) + location_idx) * len(calendar) + period_idx)[known])
+            values.append(chunk[columns].to_numpy(dtype='float64')[known])
+        cells, values = np.concatenate(cells), np.concatenate(values)
+        order = np.argsort(cells, kind='stable')
+        return [cls(cells[order], values[order, i], len(location_ids), calendar, default)
+                for i in range(len(columns))]
+
+    def slice(self, pair_start, pair_stop):
+        """Factors of pairs [pair_start, pair_stop), renumbered to start at pair zero"""
+        lo, hi = np.searchsorted(self.cells, [pair_start * self.num_periods, pair_stop * self.num_periods])
+        return CellFactors(self.cells[lo:hi] - pair_start * self.num_periods, self.values[lo:hi],
+                           self.num_locations, self.calendar, self.default)
+
+    def dense(self, pair_start, pair_stop):
+        """(pairs x periods) array of pairs [pair_start, pair_stop)"""
+        block = self.slice(pair_start, pair_stop)
+        result = np.full((pair_stop - pair_start) * self.num_periods, self.default)
+        result[block.cells] = block.values
+        return result.reshape(pair_stop - pair_start, self.num_periods)
+
+    def lookup(self, product_idx, location_idx, dates):
+        """Factor of each (product, location, date) cell, products and locations given by position"""
+        period_idx = self.calendar.index(dates)
+        cells = (product_idx * self.num_locations + location_idx) * self.num_periods + period_idx
+        if not len(self.cells):
+            return np.full(len(cells), self.default)
+        found = np.minimum(np.searchsorted(self.cells, cells), len(self.cells) - 1)
+        hit = (product_idx >= 0) & (location_idx >= 0) & (period_idx >= 0) & (self.cells[found] == cells)
+        return np.where(hit, self.values[found], self.default)
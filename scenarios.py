@@ -0,0 +1,236 @@
+import json
+import os
+from collections import ChainMap
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from config import read_config_file
+from data_generator import pipeline_stages
+from pipeline import downstream_stages, topological_order
+from sinks import NullSink, make_sink
+from timeline import Calendar
+
+# Author recorded in SOP_Scenario.created_by unless a scenario names one
+DEFAULT_CREATED_BY = 'scenario_engine'
+
+
+def _external_factors(factors, multipliers):
+    """Scale ExternalFactors columns, e.g. {'market_event_factor': 1.1} for demand +10%"""
+    unknown = set(multipliers) - set(factors.columns)
+    if unknown:
+        raise ValueError(f"Unknown external factor columns: {', '.join(sorted(unknown))}")
+    return factors.assign(**{column: factors[column] * value for column, value in multipliers.items()})
+
+
+def _promotion_blackout(promotions, window):
+    """Drop promotions running at any time in window {'start_date', 'end_date'[, 'product_ids']}
+
+    A promotion runs from its date through date + duration_days inclusive,
+    as in event_index.EventIndex.
+    """
+    start = pd.Timestamp(window['start_date'])
+    end = pd.Timestamp(window['end_date'])
+    dates = pd.to_datetime(promotions['date'])
+    last_day = dates + pd.to_timedelta(promotions['duration_days'], unit='D')
+    blocked = (dates <= end) & (last_day >= start)
+    if 'product_ids' in window:
+        blocked &= promotions['product_id'].isin(window['product_ids'])
+    return promotions[~blocked.to_numpy()].reset_index(drop=True)
+
+
+def _disruptions(disruptions, events):
+    """Add disruption events, each {'supplier_id', 'date', 'duration_days'[, 'severity_factor', 'disruption_type']}"""
+    added = pd.DataFrame({
+        'date': pd.to_datetime([event['date'] for event in events]),
+        'supplier_id': [event['supplier_id'] for event in events],
+        'disruption_type': [event.get('disruption_type', 'Scenario') for event in events],
+        'severity_factor': [float(event.get('severity_factor', 1.0)) for event in events],
+        'duration_days': [int(event['duration_days']) for event in events]
+    })
+    return pd.concat([disruptions, added], ignore_index=True)
+
+
+def _lead_times(products, change):
+    """Scale lead_time_days by change['factor'] (default 1) and add change['days'] (default 0)
+
+    change['product_ids'] limits the change to those products.
+    """
+    lead_times = products['lead_time_days'].to_numpy()
+    changed = np.maximum(1, np.rint(lead_times * change.get('factor', 1) + change.get('days', 0))).astype(
+        lead_times.dtype)
+    if 'product_ids' in change:
+        changed = np.where(products['product_id'].isin(change['product_ids']), changed, lead_times)
+    return products.assign(lead_time_days=changed)
+
+
+# Assumption keys a scenario may set: the base table each one overrides, how, and the
+# stages reading what it changes (None: every stage reading the table)
+OVERRIDES = {
+    'external_factors': ('ExternalFactors', _external_factors, None),
+    'promotion_blackout': ('PromotionCalendar', _promotion_blackout, None),
+    'disruptions': ('SupplyDisruptions', _disruptions, None),
+    'lead_times': ('Product', _lead_times, ('Inventory',))
+}
+
+
+@dataclass
+class Scenario:
+    """One what-if run: overrides of base inputs, recorded as its SOP_Scenario assumptions
+
+    assumptions maps keys of OVERRIDES to their parameters, e.g.
+    {'external_factors': {'market_event_factor': 1.1},
+     'disruptions': [{'supplier_id': 'S0003', 'date': '2024-03-01', 'duration_days': 30}]}.
+    """
+    scenario_id: int
+    scenario_name: str
+    assumptions: dict = field(default_factory=dict)
+    description: str = None
+    created_by: str = DEFAULT_CREATED_BY
+
+    def __post_init__(self):
+        unknown = set(self.assumptions) - set(OVERRIDES)
+        if unknown:
+            raise ValueError(f"Scenario {self.scenario_name}: unknown assumptions {', '.join(sorted(unknown))} "
+                             f"(choose from {', '.join(OVERRIDES)})")
+
+    def overrides(self, tables):
+        """Replacement input tables derived from the base tables, by table name"""
+        replaced = {}
+        for key, value in self.assumptions.items():
+            table, apply, _ = OVERRIDES[key]
+            replaced[table] = apply(replaced.get(table, tables[table]), value)
+        return replaced
+
+    def affected_stages(self, stages):
+        """Stages to recompute, in topological order: readers of what the assumptions change, and downstream"""
+        changed, readers = set(), set()
+        for key in self.assumptions:
+            table, _, stage_tables = OVERRIDES[key]
+            if stage_tables is None:
+                changed.add(table)
+            else:
+                readers.update(stage_tables)
+        affected = readers | {stage.table for stage in downstream_stages(stages, changed | readers)}
+        return [stage for stage in topological_order(stages) if stage.table in affected]
+
+
+@dataclass
+class ScenarioResult:
+    """The tables of one scenario: its own (changed) tables layered over the shared base
+
+    tables holds only the overridden inputs and the recomputed downstream
+    tables; indexing falls through to the base for everything else.
+    """
+    scenario: Scenario
+    tables: dict
+    base: dict
+
+    def __getitem__(self, table):
+        return self.tables[table] if table in self.tables else self.base[table]
+
+    @property
+    def changed(self):
+        return tuple(self.tables)
+
+
+class ScenarioEngine:
+    """Runs many what-if scenarios against one base dataset
+
+    The base tables (e.g. the dict returned by data_generator.main) are
+    generated once and shared read-only by every scenario. A scenario
+    replaces some input tables and recomputes only the stages reading what
+    it changes and their downstream, with the base run's seed so that every
+    other random draw is the same as in the base (common random numbers):
+    differences between scenarios come from their assumptions alone. The
+    seed is therefore required. Unchanged tables, and the
+    unchanged columns of overridden ones (pandas copy-on-write), are never
+    copied. Scenarios run in parallel on a thread pool.
+
+    features and materials_table must match the base run's settings, so
+    that DemandFeatures and ProductionMaterial are recomputed along with
+    the tables they derive from.
+    """
+
+    def __init__(self, base_tables, seed, sizes=None, features=False, materials_table=False):
+        if seed is None:
+            raise ValueError("ScenarioEngine needs the seed the base tables were generated with; "
+                             "without one no draw can be repeated")
+        self.base = base_tables
+        self.seed = seed
+        self.sizes = sizes
+        self.features = features
+        self.materials_table = materials_table
+
+    def run(self, scenario, sink=None):
+        """Compute one scenario's changed tables, writing them to sink if given"""
+        sink = sink or NullSink()
+        stages = pipeline_stages(sink, self.sizes, features=self.features, materials_table=self.materials_table)
+        overrides = scenario.overrides(self.base)
+        tables = ChainMap(dict(overrides), self.base)
+        for stage in stages:
+            # Register dimension lookups (e.g. product_category partitions) with this sink
+            if stage.on_complete is not None and stage.table in tables:
+                stage.on_complete(tables[stage.table])
+        for table, df in overrides.items():
+            sink.write(table, df)
+
+        for stage in scenario.affected_stages(stages):
+            args = [tables[name] for name in stage.inputs]
+            tables[stage.table] = stage.fn(*args, seed=self.seed, sink=sink, **stage.resolve_params(tables))
+        return ScenarioResult(scenario, tables.maps[0], self.base)
+
+    def run_all(self, scenarios, workers=4, output_dir=None, output_format='csv', **sink_options):
+        """Run scenarios concurrently; returns {scenario_id: ScenarioResult}
+
+        With an output_dir, each scenario's changed tables are written to
+        output_dir/scenarios/<scenario_id>/ and the scenarios themselves to
+        the SOP_Scenario table in output_dir.
+        """
+        ids = [scenario.scenario_id for scenario in scenarios]
+        if len(set(ids)) != len(ids):
+            raise ValueError("Scenario ids must be unique")
+
+        def run(scenario):
+            sink = None
+            if output_dir is not None:
+                scenario_dir = os.path.join(output_dir, 'scenarios', str(scenario.scenario_id))
+                sink = make_sink(output_format, scenario_dir, **sink_options)
+            return self.run(scenario, sink)
+
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            results = dict(zip(ids, executor.map(run, scenarios)))
+        if output_dir is not None:
+            make_sink(output_format, output_dir, **sink_options).write('SOP_Scenario', self.scenario_table(scenarios))
+        return results
+
+    def scenario_table(self, scenarios):
+        """SOP_Scenario rows; every scenario spans the base calendar"""
+        calendar = Calendar.from_time_dimension(self.base['TimeDimension'])
+        days = calendar.days
+        return pd.DataFrame({
+            'scenario_id': [scenario.scenario_id for scenario in scenarios],
+            'scenario_name': [scenario.scenario_name for scenario in scenarios],
+            'start_date': days.min(),
+            'end_date': days.max(),
+            'description': [scenario.description for scenario in scenarios],
+            'assumptions': [json.dumps(scenario.assumptions, sort_keys=True, default=str) for scenario in scenarios],
+            'created_by': [scenario.created_by for scenario in scenarios]
+        })
+
+
+def read_scenarios(path):
+    """Scenarios from a YAML or TOML file holding a list under 'scenarios'
+
+    Each entry has a name, optional id (default: its position from 1),
+    description and created_by, and its assumptions.
+    """
+    entries = read_config_file(path).get('scenarios', [])
+    return [
+        Scenario(scenario_id=entry.get('id', position), scenario_name=entry['name'],
+                 assumptions=entry.get('assumptions', {}), description=entry.get('description'),
+                 created_by=entry.get('created_by', DEFAULT_CREATED_BY))
+        for position, entry in enumerate(entries, start=1)
+    ]
@@ -20,6 +20,7 @@ CREATE TABLE Location (
     location_id VARCHAR(10) PRIMARY KEY,
     location_name VARCHAR(100) NOT NULL,
     location_type VARCHAR(20) NOT NULL,
+    region VARCHAR(50) NOT NULL,
     storage_capacity INTEGER NOT NULL,
     handling_capacity INTEGER NOT NULL,
     operating_cost DECIMAL(10,2) NOT NULL,
@@ -96,6 +97,27 @@ CREATE TABLE SupplyDisruptions (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Product sourcing table
+CREATE TABLE ProductSourcing (
+    sourcing_id SERIAL PRIMARY KEY,
+    supplier_id VARCHAR(10) REFERENCES Supplier(supplier_id),
+    product_id VARCHAR(10) REFERENCES Product(product_id),
+    location_id VARCHAR(10) REFERENCES Location(location_id),
+    share DECIMAL(5,4) NOT NULL,
+    CONSTRAINT unique_sourcing UNIQUE (supplier_id, product_id, location_id)
+);
+
+-- Supply impact table
+CREATE TABLE SupplyImpact (
+    impact_id SERIAL PRIMARY KEY,
+    date_id DATE REFERENCES TimeDimension(date_id),
+    product_id VARCHAR(10) REFERENCES Product(product_id),
+    location_id VARCHAR(10) REFERENCES Location(location_id),
+    capacity_factor DECIMAL(5,4) NOT NULL,
+    lead_time_factor DECIMAL(5,4) NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
 -- Transport lanes table
 CREATE TABLE TransportLane (
     lane_id SERIAL PRIMARY KEY,
@@ -148,6 +170,16 @@ CREATE TABLE ProductionPlan (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Production material table (written by --materials-table): one row per material of a plan
+CREATE TABLE ProductionMaterial (
+    production_material_id SERIAL PRIMARY KEY,
+    date_id DATE REFERENCES TimeDimension(date_id),
+    product_id VARCHAR(10) REFERENCES Product(product_id),
+    location_id VARCHAR(10) REFERENCES Location(location_id),
+    material_id VARCHAR(10) NOT NULL,
+    quantity DECIMAL(15,2) NOT NULL
+);
+
 -- S&OP Scenario table
 CREATE TABLE SOP_Scenario (
     scenario_id SERIAL PRIMARY KEY,
@@ -166,14 +198,49 @@ CREATE TABLE KPI_Dashboard (
     kpi_id SERIAL PRIMARY KEY,
     date_id DATE REFERENCES TimeDimension(date_id),
     metric_name VARCHAR(50) NOT NULL,
-    metric_value DECIMAL(10,2) NOT NULL,
-    target_value DECIMAL(10,2) NOT NULL,
+    metric_value DECIMAL(15,2) NOT NULL,
+    target_value DECIMAL(15,2) NOT NULL,
     variance_percentage DECIMAL(5,2) NOT NULL,
     dimension_type VARCHAR(20) NOT NULL,
-    dimension_id VARCHAR(10) NOT NULL,
+    dimension_id VARCHAR(50) NOT NULL,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- ML feature store (written by --features); lag and rolling-window columns match the
+-- default FEATURE_LAGS and ROLLING_WINDOWS and are NULL without enough history
+CREATE TABLE DemandFeatures (
+    feature_id SERIAL PRIMARY KEY,
+    date_id DATE REFERENCES TimeDimension(date_id),
+    product_id VARCHAR(10) REFERENCES Product(product_id),
+    location_id VARCHAR(10) REFERENCES Location(location_id),
+    forecast_quantity DECIMAL(10,2) NOT NULL,
+    demand_lag_1 REAL DEFAULT NULL,
+    demand_lag_2 REAL DEFAULT NULL,
+    demand_lag_3 REAL DEFAULT NULL,
+    demand_lag_6 REAL DEFAULT NULL,
+    demand_lag_12 REAL DEFAULT NULL,
+    demand_rolling_mean_3 REAL DEFAULT NULL,
+    demand_rolling_std_3 REAL DEFAULT NULL,
+    demand_rolling_mean_6 REAL DEFAULT NULL,
+    demand_rolling_std_6 REAL DEFAULT NULL,
+    demand_rolling_mean_12 REAL DEFAULT NULL,
+    demand_rolling_std_12 REAL DEFAULT NULL,
+    promo_active BOOLEAN NOT NULL,
+    promo_days INTEGER NOT NULL,
+    promo_discount REAL NOT NULL,
+    gdp_factor REAL NOT NULL,
+    inflation_factor REAL NOT NULL,
+    seasonal_factor REAL NOT NULL,
+    market_event_factor REAL NOT NULL,
+    weather_impact_factor REAL NOT NULL,
+    year INTEGER NOT NULL,
+    quarter INTEGER NOT NULL,
+    month INTEGER NOT NULL,
+    week INTEGER NOT NULL,
+    day_of_week INTEGER NOT NULL,
+    is_holiday BOOLEAN NOT NULL
+);
+
 -- Create indexes for better query performance
 CREATE INDEX idx_product_category ON Product(product_category);
 CREATE INDEX idx_location_type ON Location(location_type);
@@ -183,4 +250,6 @@ CREATE INDEX idx_time_date ON TimeDimension(date_id);
 CREATE INDEX idx_forecast_date_product ON DemandForecast(date_id, product_id);
 CREATE INDEX idx_inventory_date_product ON Inventory(date_id, product_id);
 CREATE INDEX idx_production_date_product ON ProductionPlan(date_id, product_id);
+CREATE INDEX idx_material_plan ON ProductionMaterial(date_id, product_id, location_id);
 CREATE INDEX idx_kpi_date_metric ON KPI_Dashboard(date_id, metric_name);
+CREATE INDEX idx_features_product_location ON DemandFeatures(product_id, location_id, date_id);
@@ -0,0 +1,25 @@
+import zlib
+
+import numpy as np
+
+
+def table_seed_sequence(seed, table, shard=None):
+    """SeedSequence for one table (or one shard of it) derived from the master seed
+
+    The spawn key is built from a stable hash of the table name and the shard
+    number, so each stream can be recreated on its own without replaying any
+    other table. A seed of None draws fresh OS entropy.
+    """
+    table_key = zlib.crc32(table.encode('utf-8'))
+    spawn_key = (table_key,) if shard is None else (table_key, shard)
+    return np.random.SeedSequence(seed, spawn_key=spawn_key)
+
+
+def table_rng(seed, table, shard=None):
+    """Independent numpy Generator for one table or shard"""
+    return np.random.default_rng(table_seed_sequence(seed, table, shard))
+
+
+def table_int_seed(seed, table):
+    """32-bit integer seed for libraries that cannot take a Generator (e.g. Faker)"""
+    return int(table_seed_sequence(seed, table).generate_state(1)[0])
@@ -0,0 +1,75 @@
+import copy
+import json
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+
+from seeding import table_rng
+
+# Manifest written next to the shard files of each table
+MANIFEST_NAME = '_manifest.json'
+
+
+def shard_bounds(num_items, shard_size):
+    """Fixed (start, stop) blocks of num_items; independent of the worker count"""
+    return [(start, min(start + shard_size, num_items)) for start in range(0, num_items, shard_size)]
+
+
+def _write_shard(task):
+    """Generate one shard in a worker process and write it to its own file"""
+    shard_fn, table, shard, seed, sink, args = task
+    shard_sink = copy.copy(sink)
+    shard_sink.output_dir = os.path.join(sink.output_dir, table)
+    name = f'part-{shard:05d}'
+    rows = shard_sink.write_chunks(name, shard_fn(table_rng(seed, table, shard), *args))
+    return {
+        'shard': shard,
+        'path': os.path.relpath(shard_sink.path(name), shard_sink.output_dir),
+        'rows': rows
+    }
+
+
+def run_shards(table, shard_fn, shard_args, seed, sink, workers=1, metadata=None, shards=None):
+    """Generate a table as independent shards, in parallel, plus a manifest
+
+    shard_fn(rng, *args) must be a module-level function yielding DataFrame
+    chunks; shard_args holds one args tuple per shard. Shard files go to
+    <output_dir>/<table>/part-NNNNN.<ext> and the manifest lists them in
+    shard order. Passing shards regenerates only those shard numbers and
+    updates the existing manifest in place.
+    """
+    table_dir = os.path.join(sink.output_dir, table)
+    manifest_path = os.path.join(table_dir, MANIFEST_NAME)
+    if shards is None:
+        # Drop shard files left over from a previous run with a different layout
+        shutil.rmtree(table_dir, ignore_errors=True)
+        shards = range(len(shard_args))
+
+    # Observers hold locks and open logs, which cannot be sent to worker processes
+    task_sink = copy.copy(sink)
+    task_sink.observer = None
+    tasks = [(shard_fn, table, shard, seed, task_sink, shard_args[shard]) for shard in shards]
+    if workers is None or workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            written = list(executor.map(_write_shard, tasks))
+    else:
+        written = [_write_shard(task) for task in tasks]
+
+    by_shard = {}
+    if len(written) < len(shard_args) and os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            by_shard = {entry['shard']: entry for entry in json.load(f)['shards']}
+    by_shard.update((entry['shard'], entry) for entry in written)
+    entries = [by_shard[shard] for shard in sorted(by_shard)]
+
+    manifest = {
+        'table': table,
+        'seed': seed,
+        'num_shards': len(shard_args),
+        'rows': sum(entry['rows'] for entry in entries),
+        'shards': entries,
+        **(metadata or {})
+    }
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
@@ -0,0 +1,340 @@
+import os
+import queue
+import shutil
+import threading
+
+import numpy as np
+import pandas as pd
+
+from compact import decode, positions
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is only needed for the Parquet/Arrow backends
+    pa = None
+
+# Default number of rows per chunk for streaming generators
+DEFAULT_CHUNK_ROWS = 250_000
+
+# Tables split into Hive-style directories by the columnar backends
+DEFAULT_PARTITIONS = {
+    'DemandForecast': ['month', 'product_category'],
+    'Inventory': ['month', 'product_category'],
+}
+
+# NumPy datetime units for the derived date partition column (e.g. month=2023-01)
+DATE_PARTITION_UNITS = {'year': 'datetime64[Y]', 'month': 'datetime64[M]', 'day': 'datetime64[D]'}
+
+
+class CsvTableWriter:
+    """Appends DataFrame chunks to a single CSV file"""
+
+    def __init__(self, path):
+        self.path = path
+        self.rows_written = 0
+        self._header_written = False
+
+    def append(self, chunk):
+        chunk.to_csv(self.path, mode='a' if self._header_written else 'w',
+                     header=not self._header_written, index=False)
+        self._header_written = True
+        self.rows_written += len(chunk)
+
+    def close(self):
+        if not self._header_written:
+            # Leave an empty file so downstream readers find every table
+            open(self.path, 'w').close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def _append_behind(writer, chunks, depth):
+    """Append chunks on a separate thread while the caller produces the next ones"""
+    pending = queue.Queue(maxsize=depth)
+    failures = []
+
+    def drain():
+        while True:
+            chunk = pending.get()
+            if chunk is None:
+                return
+            if not failures:
+                try:
+                    writer.append(chunk)
+                except BaseException as exc:
+                    failures.append(exc)
+
+    thread = threading.Thread(target=drain, daemon=True)
+    thread.start()
+    try:
+        for chunk in chunks:
+            if failures:
+                break
+            pending.put(chunk)
+    finally:
+        pending.put(None)
+        thread.join()
+    if failures:
+        raise failures[0]
+
+
+class TableSink:
+    """Base class for output backends: one named table at a time, chunk by chunk"""
+
+    extension = None
+    # Chunks a writer thread may lag behind the generator; 0 writes inline
+    write_behind = 0
+
+    def __init__(self, output_dir='sample_data'):
+        self.output_dir = output_dir
+        self.lookups = {}
+        # Receives chunk(table, rows) for every chunk a generator emits (see instrumentation)
+        self.observer = None
+
+    def path(self, table):
+        return os.path.join(self.output_dir, f'{table}.{self.extension}')
+
+    def add_lookup(self, column, df):
+        """Register a dimension column that fact tables can be enriched with
+
+        df maps its first column (a key present in fact tables, such as
+        product_id) to column. Backends that partition by dimension
+        attributes use it; others ignore it.
+        """
+        self.lookups[column] = df.set_index(df.columns[0])[column]
+
+    def open(self, table):
+        """Open a writer that appends chunks of table to disk"""
+        raise NotImplementedError
+
+    def track(self, table, chunks):
+        """Report each chunk of table to the observer as it is produced"""
+        if self.observer is None:
+            return chunks
+        return self._tracked(table, chunks)
+
+    def _tracked(self, table, chunks):
+        for chunk in chunks:
+            self.observer.chunk(table, len(chunk))
+            yield chunk
+
+    def write(self, table, df):
+        """Write a whole table in one go"""
+        return self.write_chunks(table, [df])
+
+    def write_chunks(self, table, chunks):
+        """Drain an iterable of chunks into table, holding one chunk at a time
+
+        With write_behind > 0 chunks are appended on a writer thread, up to
+        that many chunks behind the producer, so encoding and disk I/O
+        overlap with generating the next chunk.
+        """
+        with self.open(table) as writer:
+            if self.write_behind:
+                _append_behind(writer, chunks, self.write_behind)
+            else:
+                for chunk in chunks:
+                    writer.append(chunk)
+        # One write per line keeps messages from concurrent stages from interleaving
+        print(f"Generated {os.path.abspath(writer.path)}\n", end='')
+        return writer.rows_written
+
+
+class CsvSink(TableSink):
+    """Writes each table to <output_dir>/<table>.csv"""
+
+    extension = 'csv'
+
+    def open(self, table):
+        os.makedirs(self.output_dir, exist_ok=True)
+        return CsvTableWriter(self.path(table))
+
+
+class NullTableWriter:
+    """Counts and discards chunks"""
+
+    path = os.devnull
+
+    def __init__(self):
+        self.rows_written = 0
+
+    def append(self, chunk):
+        self.rows_written += len(chunk)
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class NullSink(TableSink):
+    """Discards every table; times generation without any I/O"""
+
+    def open(self, table):
+        return NullTableWriter()
+
+    def write_chunks(self, table, chunks):
+        with self.open(table) as writer:
+            for chunk in chunks:
+                writer.append(chunk)
+        return writer.rows_written
+
+
+class ArrowTableWriter:
+    """Appends DataFrame chunks to a Parquet/Arrow file or Hive-partitioned directory"""
+
+    def __init__(self, sink, table, path):
+        self.sink = sink
+        self.table = table
+        self.path = path
+        self.partition_by = sink.partition_by.get(table, [])
+        self.rows_written = 0
+        self._chunks_written = 0
+        self._writer = None
+        self._dictionaries = {}
+
+    def append(self, chunk):
+        if self.partition_by:
+            # Grouping rows by partition first lets pyarrow write each file from one
+            # contiguous slice; a daily chunk otherwise splits into tiny row groups
+            chunk = self.sink.add_partition_columns(chunk, self.partition_by)
+            chunk = chunk.sort_values(self.partition_by, kind='stable')
+        batch = self.to_arrow(chunk)
+
+        if self.partition_by:
+            # Each chunk lands as one file per partition it touches
+            ds.write_dataset(
+                batch, self.path, format=self.sink.dataset_format,
+                partitioning=ds.partitioning(batch.select(self.partition_by).schema, flavor='hive'),
+                basename_template=f'part-{self._chunks_written:05d}-{{i}}.{self.sink.extension}',
+                file_options=self.sink.file_options(),
+                existing_data_behavior='overwrite_or_ignore'
+            )
+        else:
+            if self._writer is None:
+                self._writer = self.sink.new_file_writer(self.path, batch.schema)
+            self._writer.write_table(batch)
+
+        self._chunks_written += 1
+        self.rows_written += len(chunk)
+
+    def to_arrow(self, chunk):
+        """Convert a chunk to an Arrow table with compact, typed columns
+
+        ID dictionaries only ever grow across chunks, so every batch is a
+        delta of the previous one as the Arrow IPC file format requires.
+        Surrogate-key ID columns (see compact.keys) contribute their
+        categories; other categorical columns are written as plain values.
+        Date columns, including TimeDimension's date_id key, become date32.
+        """
+        columns = {}
+        for name in chunk.columns:
+            values = chunk[name]
+            categorical = isinstance(values.dtype, pd.CategoricalDtype)
+            if name in ('date', 'date_id'):
+                columns[name] = pa.array(pd.to_datetime(decode(values)).to_numpy().astype('datetime64[D]'))
+            elif name.endswith('_id') and (categorical or pd.api.types.is_string_dtype(values.dtype)):
+                uniques = values.cat.categories if categorical else pd.unique(values)
+                known = self._dictionaries.get(name, pd.Index([], dtype=object))
+                known = known.append(pd.Index(uniques).difference(known, sort=False))
+                self._dictionaries[name] = known
+                columns[name] = pa.DictionaryArray.from_arrays(
+                    pa.array(positions(known, values), type=pa.int32()), pa.array(known, type=pa.string()))
+            else:
+                columns[name] = pa.array(decode(values))
+        return pa.table(columns)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class ArrowSink(TableSink):
+    """Writes typed Parquet or Arrow IPC (Feather v2) files via pyarrow
+
+    ID columns are dictionary-encoded and date columns are stored as date32.
+    Tables listed in partition_by are written as Hive-style directories
+    (e.g. Inventory/month=2023-01/product_category=Food/part-00000-0.parquet)
+    that pyarrow.dataset, DuckDB or Spark can prune by partition. Partition
+    columns other than the date are resolved through add_lookup. Arrow IPC
+    output can be memory-mapped; leave compression unset for zero-copy reads.
+    """
+
+    def __init__(self, output_dir='sample_data', file_format='parquet', compression='zstd',
+                 partition_by=None, date_partition='month'):
+        if pa is None:
+            raise ImportError("The Parquet/Arrow output backends require pyarrow (pip install pyarrow)")
+        if file_format not in ('parquet', 'arrow'):
+            raise ValueError(f"Unknown columnar format: {file_format}")
+        super().__init__(output_dir)
+        self.file_format = file_format
+        self.extension = file_format
+        self.dataset_format = 'parquet' if file_format == 'parquet' else 'ipc'
+        self.compression = compression
+        self.partition_by = DEFAULT_PARTITIONS if partition_by is None else partition_by
+        self.date_partition = date_partition
+
+    def path(self, table):
+        if table in self.partition_by:
+            return os.path.join(self.output_dir, table)
+        return super().path(table)
+
+    def open(self, table):
+        path = self.path(table)
+        # Partitioned tables are appended file by file, so start from a clean directory
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        os.makedirs(self.output_dir, exist_ok=True)
+        return ArrowTableWriter(self, table, path)
+
+    def add_partition_columns(self, chunk, columns):
+        chunk = chunk.copy(deep=False)
+        for column in columns:
+            if column == self.date_partition:
+                periods = pd.to_datetime(decode(chunk['date'])).to_numpy().astype(DATE_PARTITION_UNITS[column])
+                uniques, codes = np.unique(periods, return_inverse=True)
+                chunk[column] = np.datetime_as_string(uniques)[codes]
+            elif column not in chunk.columns:
+                lookup = self.lookups[column]
+                chunk[column] = chunk[lookup.index.name].map(lookup).fillna('Unknown')
+        return chunk
+
+    def file_options(self):
+        if self.file_format == 'parquet':
+            return ds.ParquetFileFormat().make_write_options(compression=self.compression)
+        return ds.IpcFileFormat().make_write_options(compression=self.compression)
+
+    def new_file_writer(self, path, schema):
+        if self.file_format == 'parquet':
+            return pq.ParquetWriter(path, schema, compression=self.compression)
+        options = pa.ipc.IpcWriteOptions(compression=self.compression, emit_dictionary_deltas=True)
+        return pa.ipc.new_file(path, schema, options=options)
+
+    def dataset(self, table):
+        """Open a written table as a lazily scanned pyarrow dataset"""
+        return ds.dataset(self.path(table), format=self.dataset_format, partitioning='hive')
+
+
+def make_sink(output_format='csv', output_dir='sample_data', **options):
+    """Build the output backend for a format name: csv, parquet, arrow or null"""
+    if output_format == 'csv':
+        return CsvSink(output_dir)
+    if output_format == 'null':
+        return NullSink(output_dir)
+    return ArrowSink(output_dir, file_format=output_format, **options)
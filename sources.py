@@ -0,0 +1,129 @@
+import json
+import os
+
+import pandas as pd
+
+from sharding import MANIFEST_NAME
+from sinks import DEFAULT_CHUNK_ROWS
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+except ImportError:  # pyarrow is only needed to read Parquet/Arrow output
+    ds = None
+
+# File extensions written by the sinks, in lookup order
+TABLE_EXTENSIONS = ('csv', 'parquet', 'arrow')
+
+# pyarrow.dataset format names for the columnar extensions
+DATASET_FORMATS = {'parquet': 'parquet', 'arrow': 'ipc'}
+
+
+def _file_format(path):
+    """Extension of a table file or of the first data file inside a directory"""
+    if os.path.isfile(path):
+        return os.path.splitext(path)[1].lstrip('.')
+    for root, _, files in sorted(os.walk(path)):
+        for name in sorted(files):
+            extension = os.path.splitext(name)[1].lstrip('.')
+            if extension in TABLE_EXTENSIONS:
+                return extension
+    return None
+
+
+def table_path(input_dir, table):
+    """Location of a generated table: a single file or a sharded/partitioned directory"""
+    for extension in TABLE_EXTENSIONS:
+        path = os.path.join(input_dir, f'{table}.{extension}')
+        if os.path.exists(path):
+            return path
+    path = os.path.join(input_dir, table)
+    return path if os.path.isdir(path) else None
+
+
+def _table_files(path):
+    """Data files of a table in write order; shards follow their manifest"""
+    if os.path.isfile(path):
+        return [path]
+    manifest_path = os.path.join(path, MANIFEST_NAME)
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            return [os.path.join(path, entry['path']) for entry in json.load(f)['shards']]
+    return [path]
+
+
+def _iter_file_chunks(path, chunk_rows, columns):
+    file_format = _file_format(path)
+    if file_format == 'csv':
+        if os.path.getsize(path) == 0:
+            return
+        yield from pd.read_csv(path, chunksize=chunk_rows, usecols=columns)
+    elif file_format in DATASET_FORMATS:
+        if ds is None:
+            raise ImportError("Reading Parquet/Arrow output requires pyarrow (pip install pyarrow)")
+        dataset = ds.dataset(path, format=DATASET_FORMATS[file_format], partitioning='hive')
+        # Partitioned tables hold many small files; coalesce their batches into full chunks
+        batches, rows = [], 0
+        for batch in dataset.to_batches(columns=columns, batch_size=chunk_rows):
+            batches.append(batch)
+            rows += batch.num_rows
+            if rows >= chunk_rows:
+                yield pa.Table.from_batches(batches).to_pandas(date_as_object=False)
+                batches, rows = [], 0
+        if rows:
+            yield pa.Table.from_batches(batches).to_pandas(date_as_object=False)
+
+
+def iter_table_chunks(input_dir, table, chunk_rows=DEFAULT_CHUNK_ROWS, columns=None):
+    """Stream a generated table back as DataFrame chunks of about chunk_rows rows
+
+    Reads whatever a sink wrote: <table>.csv/.parquet/.arrow, a Hive-partitioned
+    directory or a sharded directory with a manifest. Only one chunk is held
+    in memory at a time; columns restricts the columns read.
+    """
+    path = table_path(input_dir, table)
+    if path is None:
+        raise FileNotFoundError(f"No output for table {table} in {input_dir}")
+    for file_path in _table_files(path):
+        yield from _iter_file_chunks(file_path, chunk_rows, columns)
+
+
+def table_columns(input_dir, table):
+    """Column names of a generated table without reading its rows"""
+    path = _table_files(table_path(input_dir, table))[0]
+    file_format = _file_format(path)
+    if file_format == 'csv':
+        if os.path.getsize(path) == 0:
+            return []
+        return list(pd.read_csv(path, nrows=0).columns)
+    if ds is None:
+        raise ImportError("Reading Parquet/Arrow output requires pyarrow (pip install pyarrow)")
+    return ds.dataset(path, format=DATASET_FORMATS[file_format], partitioning='hive').schema.names
+
+
+class TableSource:
+    """A generated table on disk, scanned lazily in chunks
+
+    Stands in for a DataFrame wherever a stage only aggregates a table, so
+    fact tables larger than memory can feed ProductionPlan, Inventory and
+    KPI_Dashboard: every pass streams the files a sink wrote with one chunk
+    held at a time.
+    """
+
+    def __init__(self, input_dir, table, chunk_rows=DEFAULT_CHUNK_ROWS):
+        if table_path(input_dir, table) is None:
+            raise FileNotFoundError(f"No output for table {table} in {input_dir}")
+        self.input_dir = input_dir
+        self.table = table
+        self.chunk_rows = chunk_rows
+
+    def __repr__(self):
+        return f'TableSource({self.input_dir!r}, {self.table!r})'
+
+    @property
+    def columns(self):
+        return table_columns(self.input_dir, self.table)
+
+    def chunks(self, columns=None, chunk_rows=None):
+        """DataFrame chunks of about chunk_rows rows, restricted to columns"""
+        return iter_table_chunks(self.input_dir, self.table, chunk_rows or self.chunk_rows, columns)
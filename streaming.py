@@ -0,0 +1,456 @@
+import argparse
+import asyncio
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from compact import decode, keys
+from data_generator import (DEFAULT_SIZES, _event_horizon, _factor_horizon, _pair_demand, generate_demand_forecast,
+                            generate_external_factors, generate_location_data, generate_product_data,
+                            generate_promotion_calendar, generate_supplier_data, generate_supply_disruptions,
+                            generate_time_dimension, replenishment_policy, simulate_inventory)
+from instrumentation import Instrumentation
+from seeding import table_int_seed, table_rng
+from sinks import NullSink
+from timeline import Calendar
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:  # pyarrow is only needed for streaming and the Parquet/Arrow backends
+    pa = pc = None
+
+# Target events per second of a stream; 0 sends as fast as the sink accepts
+DEFAULT_RATE = 100_000
+
+# Events per batch handed to the sink, and batches buffered between generation and the sink
+DEFAULT_BATCH_EVENTS = 1000
+DEFAULT_MAX_PENDING = 64
+
+# Simulated days generated at a time
+DEFAULT_WINDOW_DAYS = 30
+
+# Digits kept of float fields
+FLOAT_DECIMALS = 4
+
+# Fields of each event type as (JSON field, generator column) pairs, in emission order
+# within a day; every event also carries seq, event_type and event_time
+EVENT_FIELDS = {
+    'disruption': [('supplier_id', 'supplier_id'), ('disruption_type', 'disruption_type'),
+                   ('severity_factor', 'severity_factor'), ('duration_days', 'duration_days')],
+    'promotion_start': [('product_id', 'product_id'), ('promotion_type', 'promotion_type'),
+                        ('discount_factor', 'discount_factor'), ('duration_days', 'duration_days')],
+    'demand': [('product_id', 'product_id'), ('location_id', 'location_id'), ('quantity', 'forecast_quantity'),
+               ('confidence_level', 'confidence_level')],
+    'inventory': [('product_id', 'product_id'), ('location_id', 'location_id'),
+                  ('quantity_on_hand', 'quantity_on_hand'), ('quantity_change', 'quantity_change'),
+                  ('quantity_on_order', 'quantity_on_order'), ('stockout_quantity', 'stockout_quantity')]
+}
+
+
+def _json_values(values):
+    """JSON literals of a column as a pyarrow string array (null for missing values)"""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        # Surrogate keys: encode each dictionary entry once, then gather by code
+        literals = _json_values(pd.Series(decode(pd.Series(values.cat.categories, dtype=values.dtype))))
+        codes = values.cat.codes.to_numpy()
+        return pc.fill_null(literals.take(pa.array(codes, mask=codes < 0)), 'null')
+    if pd.api.types.is_numeric_dtype(values.dtype) and not pd.api.types.is_bool_dtype(values.dtype):
+        array = pa.array(values)
+        if pa.types.is_floating(array.type):
+            array = pc.round(array, FLOAT_DECIMALS)
+        return pc.fill_null(pc.cast(array, pa.string()), 'null')
+    text = pa.array(np.asarray(values, dtype=object).astype(str), pa.string())
+    text = pc.replace_substring(pc.replace_substring(text, '\\', '\\\\'), '"', '\\"')
+    return pc.binary_join_element_wise('"', text, '"', '')
+
+
+def ndjson_lines(event_type, frame, event_times, seq):
+    """One NDJSON line (newline included) per row of frame, built column-wise by pyarrow kernels"""
+    parts = ['{"seq":', pc.cast(pa.array(seq), pa.string()), f',"event_type":"{event_type}","event_time":"',
+             event_times, '"']
+    for field, column in EVENT_FIELDS[event_type]:
+        parts += [f',"{field}":', _json_values(frame[column])]
+    return pc.binary_join_element_wise(*parts, '}\n', '')
+
+
+class EventSource:
+    """Endless live S&OP events, generated window by window with the table generators
+
+    Master data is generated once. Every window of window_days simulated
+    days then runs generate_supply_disruptions, generate_promotion_calendar
+    and generate_demand_forecast over a daily calendar with the window's own
+    seed, so each event type follows the distributions of its table.
+    Inventory is simulated as in generate_inventory_data, but the stock on
+    hand and the orders in transit of every (product, location) pair carry
+    over from one window to the next: each window re-plans the (s, Q)
+    policy from its demand and continues from where the last one stopped.
+    Windows must therefore be generated in order. Events are numbered by seq
+    and ordered by simulated day.
+    """
+
+    def __init__(self, seed=None, sizes=None, start_date=None, window_days=DEFAULT_WINDOW_DAYS):
+        if pa is None:
+            raise ImportError("Streaming requires pyarrow (pip install pyarrow)")
+        sizes = {**DEFAULT_SIZES, **(sizes or {})}
+        sink = NullSink()
+        self.seed = seed
+        self.window_days = window_days
+        self.start_date = pd.Timestamp(start_date or sizes['start_date'])
+        self.num_forecasts = sizes['num_forecasts']
+        self.products = generate_product_data(sizes['num_products'], seed, sink)
+        self.locations = generate_location_data(sizes['num_locations'], seed, sink)
+        self.suppliers = generate_supplier_data(sizes['num_suppliers'], seed, sink)
+        self.next_window = 0
+        # Per pair: on hand, orders in transit and the last reported on-hand and on-order quantities
+        self._inventory_state = None
+
+    def _inventory(self, demand, calendar, seed):
+        """Inventory events of one window: the (pair, day) cells whose quantities changed
+
+        A cell is reported when its on-hand or on-order quantity differs
+        from the pair's previous day, including the last day of the previous
+        window, or when demand went unserved.
+        """
+        product_ids = self.products['product_id'].to_numpy()
+        location_ids = self.locations['location_id'].to_numpy()
+        num_pairs, num_days = len(product_ids) * len(location_ids), len(calendar)
+        product_idx, location_idx = np.divmod(np.arange(num_pairs), len(location_ids))
+        cells, quantities = _pair_demand(demand, product_ids, location_ids, calendar)
+        demand = np.bincount(cells, weights=quantities, minlength=num_pairs * num_days).reshape(num_pairs, num_days)
+
+        policy = replenishment_policy(
+            table_rng(seed, 'Inventory'), demand, self.products['lead_time_days'].to_numpy()[product_idx],
+            self.products['unit_cost'].to_numpy()[product_idx],
+            self.products['min_order_quantity'].to_numpy()[product_idx],
+            self.products['pack_size'].to_numpy()[product_idx], 1.0
+        )
+        if self._inventory_state is None:
+            on_hand = policy['initial_on_hand']
+            self._inventory_state = (on_hand, np.zeros((num_pairs, 0)), np.floor(on_hand).astype(int),
+                                     np.zeros(num_pairs, dtype=int))
+        on_hand, in_transit, last_on_hand, last_on_order = self._inventory_state
+        on_hand, on_order, lost, end_on_hand, end_in_transit = simulate_inventory(
+            demand, policy['reorder_point'], policy['order_quantity'], policy['lead_periods'], on_hand,
+            in_transit=in_transit, return_state=True
+        )
+        quantity_on_hand = np.floor(on_hand).astype(int)
+        quantity_on_order = np.round(on_order).astype(int)
+        self._inventory_state = (end_on_hand, end_in_transit, quantity_on_hand[:, -1], quantity_on_order[:, -1])
+
+        change = np.diff(quantity_on_hand, axis=1, prepend=last_on_hand[:, None])
+        on_order_change = np.diff(quantity_on_order, axis=1, prepend=last_on_order[:, None])
+        pairs, days = np.nonzero((change != 0) | (on_order_change != 0) | (lost > 0))
+        return pd.DataFrame({
+            'date': keys(days, calendar.dates),
+            'product_id': keys(product_idx[pairs], product_ids),
+            'location_id': keys(location_idx[pairs], location_ids),
+            'quantity_on_hand': quantity_on_hand[pairs, days],
+            'quantity_change': change[pairs, days],
+            'quantity_on_order': quantity_on_order[pairs, days],
+            'stockout_quantity': lost[pairs, days].round(2)
+        })
+
+    def tables(self, number):
+        """Event tables of window number by event type, with the window's calendar"""
+        if number != self.next_window:
+            raise ValueError(f"Inventory carries over between windows; expected window {self.next_window}, "
+                             f"got {number}")
+        seed = None if self.seed is None else table_int_seed(self.seed, f'Stream:{number}')
+        sink = NullSink()
+        start = self.start_date + pd.Timedelta(days=number * self.window_days)
+        time_df = generate_time_dimension(start, self.window_days, 'day', sink=sink)
+        calendar = Calendar.from_time_dimension(time_df)
+        horizon = _event_horizon(calendar)
+        promotions = generate_promotion_calendar(num_products=len(self.products), seed=seed, sink=sink, **horizon)
+        demand = generate_demand_forecast(
+            self.products, self.locations, time_df, self.num_forecasts, seed, sink,
+            external_factors=generate_external_factors(seed=seed, sink=sink, **_factor_horizon(calendar)),
+            promotions=promotions
+        )
+        tables = {
+            'disruption': generate_supply_disruptions(num_suppliers=len(self.suppliers), seed=seed, sink=sink,
+                                                      **horizon),
+            'promotion_start': promotions,
+            'demand': demand,
+            'inventory': self._inventory(demand, calendar, seed)
+        }
+        self.next_window += 1
+        return tables, calendar
+
+    def lines(self, number, first_seq=0):
+        """NDJSON lines of window number in seq order, as a pyarrow string array"""
+        tables, calendar = self.tables(number)
+        day_names = pa.array(np.asarray(calendar.days.strftime('%Y-%m-%d'), dtype=object), pa.string())
+        days, types = [], []
+        for code, frame in enumerate(tables.values()):
+            days.append(calendar.index(frame['date']))
+            types.append(np.full(len(frame), code))
+        days, types = np.concatenate(days), np.concatenate(types)
+        order = np.lexsort((np.arange(len(days)), types, days))
+        seq = np.empty(len(order), dtype='int64')
+        seq[order] = first_seq + np.arange(len(order))
+
+        arrays, offset = [], 0
+        for event_type, frame in tables.items():
+            rows = slice(offset, offset + len(frame))
+            arrays.append(ndjson_lines(event_type, frame, day_names.take(pa.array(days[rows])), seq[rows]))
+            offset += len(frame)
+        return pa.concat_arrays(arrays).take(pa.array(order))
+
+
+def batches(lines, batch_events):
+    """(events, bytes) batches of consecutive lines, as zero-copy views of the array's buffer"""
+    _, offsets, data = lines.buffers()
+    offsets = np.frombuffer(offsets, dtype=np.int32)[lines.offset:lines.offset + len(lines) + 1]
+    data = memoryview(data)
+    for start in range(0, len(lines), batch_events):
+        stop = min(start + batch_events, len(lines))
+        yield stop - start, data[offsets[start]:offsets[stop]]
+
+
+class EventSink:
+    """Destination of a stream: receives batches of NDJSON bytes"""
+
+    async def open(self):
+        pass
+
+    async def send(self, data):
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+
+class NdjsonEventSink(EventSink):
+    """Appends events to a newline-delimited JSON file"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    async def open(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(self.path, 'ab')
+
+    async def send(self, data):
+        self._file.write(data)
+
+    async def close(self):
+        self._file.close()
+
+
+class StdoutEventSink(EventSink):
+    """Writes events to standard output"""
+
+    async def send(self, data):
+        sys.stdout.buffer.write(data)
+        sys.stdout.buffer.flush()
+
+
+class SocketEventSink(EventSink):
+    """Sends events over a TCP (host:port) or Unix domain socket (a path)
+
+    send waits for the socket's buffer to drain, so a slow reader holds
+    back the stream instead of growing memory.
+    """
+
+    def __init__(self, address):
+        self.address = address
+        self._writer = None
+
+    async def open(self):
+        host, _, port = self.address.rpartition(':')
+        if port.isdigit() and os.sep not in self.address:
+            _, self._writer = await asyncio.open_connection(host or 'localhost', int(port))
+        else:
+            _, self._writer = await asyncio.open_unix_connection(self.address)
+
+    async def send(self, data):
+        self._writer.write(data)
+        await self._writer.drain()
+
+    async def close(self):
+        self._writer.close()
+        await self._writer.wait_closed()
+
+
+# Stream destinations by name; each takes the --target given on the command line
+EVENT_SINKS = {'ndjson': NdjsonEventSink, 'socket': SocketEventSink, 'stdout': StdoutEventSink}
+
+
+def make_event_sink(kind='stdout', target=None):
+    """Build a stream destination: ndjson (file path), socket (host:port or Unix socket path) or stdout"""
+    if kind == 'stdout':
+        return StdoutEventSink()
+    if target is None:
+        raise ValueError(f"The {kind} event sink needs a target")
+    return EVENT_SINKS[kind](target)
+
+
+@dataclass
+class StreamStats:
+    """Counters of a stream; seconds run from the first event sent"""
+    events: int = 0
+    batches: int = 0
+    bytes: int = 0
+    seconds: float = 0.0
+    max_lag: float = 0.0
+
+    @property
+    def events_per_sec(self):
+        return self.events / self.seconds if self.seconds > 0 else 0.0
+
+
+class EventStream:
+    """Sends an EventSource's events to an EventSink at a target rate
+
+    Windows are generated on a worker thread and split into batches of
+    batch_events, which wait in a queue of at most max_pending batches:
+    when the sink falls behind the queue fills and generation pauses
+    (backpressure), so memory stays bounded. Batches are released on a
+    schedule of rate events per second from the start; max_lag records how
+    far the stream fell behind it. Progress (current and mean events/sec,
+    queue depth) is reported every report_interval seconds to stderr and as
+    stream_progress events to event_log.
+    """
+
+    def __init__(self, source, sink, rate=DEFAULT_RATE, batch_events=DEFAULT_BATCH_EVENTS,
+                 max_pending=DEFAULT_MAX_PENDING, report_interval=5.0, event_log=None, verbose=True):
+        self.source = source
+        self.sink = sink
+        self.rate = rate
+        self.batch_events = batch_events
+        self.max_pending = max_pending
+        self.report_interval = report_interval
+        self.verbose = verbose
+        self.instrumentation = Instrumentation(event_log, verbose=False)
+
+    async def _produce(self, queue, executor, max_events):
+        loop = asyncio.get_running_loop()
+        produced, number = 0, 0
+        try:
+            while max_events is None or produced < max_events:
+                lines = await loop.run_in_executor(executor, self.source.lines, number, produced)
+                if max_events is not None:
+                    lines = lines.slice(0, max_events - produced)
+                for batch in batches(lines, self.batch_events):
+                    await queue.put(batch)
+                produced += len(lines)
+                number += 1
+        except Exception:
+            await queue.put(None)
+            raise
+        await queue.put(None)
+
+    def _report(self, stats, interval_events, interval_seconds, queue):
+        rate = interval_events / interval_seconds if interval_seconds > 0 else 0.0
+        self.instrumentation.emit('stream_progress', events=stats.events, seconds=round(stats.seconds, 3),
+                                  events_per_sec=round(rate, 1), mean_events_per_sec=round(stats.events_per_sec, 1),
+                                  queue_depth=queue.qsize(), max_lag=round(stats.max_lag, 3))
+        if self.verbose:
+            print(f"  stream: {stats.events:,} events in {stats.seconds:.1f}s ({rate:,.0f} events/s now, "
+                  f"{stats.events_per_sec:,.0f} mean, queue {queue.qsize()}/{self.max_pending})", file=sys.stderr)
+
+    async def _send(self, queue, duration):
+        stats = StreamStats()
+        start = None
+        last_report, last_events = 0.0, 0
+        while True:
+            batch = await queue.get()
+            if batch is None:
+                break
+            events, data = batch
+            if start is None:
+                start = time.perf_counter()
+            if self.rate:
+                # A batch is due once the schedule has room for all of its events
+                due = start + (stats.events + events) / self.rate
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                else:
+                    stats.max_lag = max(stats.max_lag, -delay)
+            await self.sink.send(data)
+            stats.events += events
+            stats.batches += 1
+            stats.bytes += len(data)
+            stats.seconds = time.perf_counter() - start
+            if stats.seconds - last_report >= self.report_interval:
+                self._report(stats, stats.events - last_events, stats.seconds - last_report, queue)
+                last_report, last_events = stats.seconds, stats.events
+            if duration is not None and stats.seconds >= duration:
+                break
+        return stats
+
+    async def run(self, duration=None, max_events=None):
+        """Stream until duration seconds have passed or max_events were sent (forever without either)"""
+        queue = asyncio.Queue(self.max_pending)
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            async with self.sink:
+                producer = asyncio.create_task(self._produce(queue, executor, max_events))
+                try:
+                    stats = await self._send(queue, duration)
+                finally:
+                    if not producer.done():
+                        producer.cancel()
+                    try:
+                        await producer
+                    except asyncio.CancelledError:
+                        pass
+        self.instrumentation.emit('stream_end', events=stats.events, batches=stats.batches, bytes=stats.bytes,
+                                  seconds=round(stats.seconds, 3), events_per_sec=round(stats.events_per_sec, 1),
+                                  max_lag=round(stats.max_lag, 3))
+        self.instrumentation.close()
+        return stats
+
+
+def add_stream_arguments(parser):
+    parser.add_argument('--sink', choices=sorted(EVENT_SINKS), default='stdout', help="where events go")
+    parser.add_argument('--target', help="NDJSON file (ndjson) or host:port / Unix socket path (socket)")
+    parser.add_argument('--rate', type=float, default=DEFAULT_RATE, help="events per second (0: unthrottled)")
+    parser.add_argument('--batch-events', type=int, default=DEFAULT_BATCH_EVENTS, help="events per write")
+    parser.add_argument('--max-pending', type=int, default=DEFAULT_MAX_PENDING,
+                        help="batches buffered ahead of the sink")
+    parser.add_argument('--duration', type=float, help="stop after this many seconds")
+    parser.add_argument('--max-events', type=int, help="stop after this many events")
+    parser.add_argument('--seed', type=int, help="master random seed")
+    parser.add_argument('--start-date', help="first simulated day")
+    parser.add_argument('--window-days', type=int, default=DEFAULT_WINDOW_DAYS, help="simulated days per window")
+    parser.add_argument('--products', type=int, default=DEFAULT_SIZES['num_products'], help="number of products")
+    parser.add_argument('--locations', type=int, default=DEFAULT_SIZES['num_locations'], help="number of locations")
+    parser.add_argument('--suppliers', type=int, default=DEFAULT_SIZES['num_suppliers'], help="number of suppliers")
+    parser.add_argument('--series', type=int, default=DEFAULT_SIZES['num_forecasts'], help="demand series")
+    parser.add_argument('--report-interval', type=float, default=5.0, help="seconds between rate reports")
+    parser.add_argument('--event-log', help="JSON-lines file for stream_progress events")
+    return parser
+
+
+def run_stream(args):
+    sizes = {'num_products': args.products, 'num_locations': args.locations, 'num_suppliers': args.suppliers,
+             'num_forecasts': args.series}
+    source = EventSource(args.seed, sizes, args.start_date, args.window_days)
+    stream = EventStream(source, make_event_sink(args.sink, args.target), args.rate, args.batch_events,
+                         args.max_pending, args.report_interval, args.event_log)
+    stats = asyncio.run(stream.run(args.duration, args.max_events))
+    print(f"Streamed {stats.events:,} events ({stats.bytes / 2 ** 20:,.1f} MB) in {stats.seconds:.2f}s: "
+          f"{stats.events_per_sec:,.0f} events/s (max lag {stats.max_lag:.3f}s)", file=sys.stderr)
+    return stats
+
+
+if __name__ == "__main__":
+    run_stream(add_stream_arguments(argparse.ArgumentParser(description="Stream live S&OP events")).parse_args())
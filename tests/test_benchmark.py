@@ -0,0 +1,28 @@
+import benchmark
+
+
+def _report(**stages):
+    return {'presets': {'small': {'stages': {
+        table: {'seconds': seconds, 'rows': rows, 'peak_rss_mb': 100.0} for table, (seconds, rows) in stages.items()
+    }}}}
+
+
+def test_compare_flags_slowdowns_beyond_tolerance():
+    baseline = _report(Product=(1.0, 100), Location=(1.0, 10))
+    report = _report(Product=(1.5, 100), Location=(1.1, 10))
+    assert benchmark.compare(report, baseline) == [('small', 'Product', 'seconds', 1.0, 1.5)]
+
+
+def test_compare_flags_row_count_mismatches():
+    baseline = _report(KPI_Dashboard=(0.1, 252))
+    report = _report(KPI_Dashboard=(0.1, 3924))
+    assert benchmark.compare(report, baseline) == [('small', 'KPI_Dashboard', 'rows', 252, 3924)]
+
+
+def test_compare_flags_stages_missing_from_the_baseline():
+    baseline = _report(Product=(1.0, 100))
+    report = _report(Product=(1.0, 100), SupplyImpact=(0.1, 500))
+    assert benchmark.compare(report, baseline) == [('small', 'SupplyImpact', 'rows', None, 500)]
+    assert benchmark.compare(report, {'presets': {}}) == [
+        ('small', 'Product', 'rows', None, 100), ('small', 'SupplyImpact', 'rows', None, 500)
+    ]
@@ -0,0 +1,70 @@
+import re
+
+import pandas as pd
+
+import data_generator
+from cache import TableCache
+
+SEED = 4
+SIZES = {'num_products': 10, 'num_locations': 4, 'num_suppliers': 5, 'num_customers': 5, 'num_resources': 5,
+         'periods': 6, 'num_forecasts': 20, 'num_lanes': 10}
+
+
+def _run(cache_dir, capsys, **sizes):
+    tables = data_generator.main(output_format='null', seed=SEED, sizes={**SIZES, **sizes}, workers=1,
+                                 cache_dir=str(cache_dir))
+    reused = set(re.findall(r'Reusing cached (\w+)', capsys.readouterr().out))
+    return tables, reused
+
+
+def test_unchanged_run_reuses_every_table(tmp_path, capsys):
+    first, reused = _run(tmp_path, capsys)
+    assert reused == set()
+    second, reused = _run(tmp_path, capsys)
+    assert reused == set(first)
+    for table, df in first.items():
+        pd.testing.assert_frame_equal(second[table], df)
+
+
+def test_size_change_invalidates_only_downstream_tables(tmp_path, capsys):
+    first, _ = _run(tmp_path, capsys)
+    _, reused = _run(tmp_path, capsys, num_forecasts=30)
+    assert set(first) - reused == {'DemandForecast', 'Inventory', 'ProductionPlan', 'KPI_Dashboard'}
+    _, reused = _run(tmp_path, capsys, num_forecasts=30, num_customers=8)
+    assert set(first) - reused == {'Customer'}
+
+
+def test_runs_without_a_seed_are_not_cached(tmp_path):
+    cache = TableCache(str(tmp_path))
+    assert cache.fingerprint('Product', data_generator.generate_product_data, {}, None, {}) is None
+    assert cache.fingerprint('Inventory', data_generator.generate_inventory_data, {}, SEED, {'Product': None}) is None
+
+
+def test_eviction_keeps_the_cache_under_its_budget(tmp_path):
+    frame = pd.DataFrame({'value': range(2000)})
+    cache = TableCache(str(tmp_path), max_bytes=40_000)
+    for number in range(4):
+        cache.store(f'{number:064x}', 'Product', frame)
+    assert sum(entry['bytes'] for entry in cache.index.values()) <= 40_000
+    assert cache.load(f'{3:064x}') is not None
+    assert cache.load(f'{0:064x}') is None
+
+
+def test_editing_a_helper_module_misses_the_cache(tmp_path, monkeypatch):
+    modules = tmp_path / 'modules'
+    modules.mkdir()
+    (modules / 'helper_tables.py').write_text('SCALE = 1\n')
+    (modules / 'stage_tables.py').write_text(
+        'import pandas as pd\n'
+        'import helper_tables\n\n\n'
+        'def generate(seed=None, sink=None):\n'
+        '    return pd.DataFrame({"value": [helper_tables.SCALE]})\n'
+    )
+    monkeypatch.syspath_prepend(str(modules))
+    import stage_tables
+
+    cache = TableCache(str(tmp_path / 'cache'))
+    before = cache.fingerprint('Stage', stage_tables.generate, {}, SEED, {})
+    assert cache.fingerprint('Stage', stage_tables.generate, {}, SEED, {}) == before
+    (modules / 'helper_tables.py').write_text('SCALE = 2\n')
+    assert cache.fingerprint('Stage', stage_tables.generate, {}, SEED, {}) != before
@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from compact import COMPACT_DTYPES, decode, keys, narrow, positions
+from sinks import make_sink
+
+PRODUCT_IDS = np.array(['P0000', 'P0001', 'P0002', 'P0003'])
+DATES = pd.date_range('2024-01-31', periods=6, freq='ME')
+
+
+def test_decode_inverts_keys():
+    rng = np.random.default_rng(0)
+    codes = rng.integers(0, len(PRODUCT_IDS), 500)
+    np.testing.assert_array_equal(np.asarray(decode(pd.Series(keys(codes, PRODUCT_IDS)))), PRODUCT_IDS[codes])
+    dates = decode(pd.Series(keys(codes % len(DATES), DATES)))
+    assert pd.DatetimeIndex(dates).equals(DATES[codes % len(DATES)])
+
+
+def test_missing_codes_decode_to_missing_values():
+    decoded = decode(pd.Series(keys(np.array([1, -1, 0]), DATES)))
+    assert pd.isna(decoded[1]) and decoded[0] == DATES[1] and decoded[2] == DATES[0]
+
+
+def test_decode_passes_plain_columns_through():
+    values = pd.Series([1.5, 2.5])
+    assert decode(values) is values
+
+
+def test_positions_of_keys_match_plain_lookup():
+    index = pd.Index(PRODUCT_IDS[::-1][:3])
+    codes = np.random.default_rng(1).integers(0, len(PRODUCT_IDS), 200)
+    encoded = pd.Series(keys(codes, PRODUCT_IDS))
+    np.testing.assert_array_equal(positions(index, encoded), index.get_indexer(PRODUCT_IDS[codes]))
+    np.testing.assert_array_equal(positions(index, pd.Series(PRODUCT_IDS[codes])), positions(index, encoded))
+
+
+@pytest.mark.parametrize('table', sorted(COMPACT_DTYPES))
+def test_narrow_keeps_schema_precision(table):
+    rng = np.random.default_rng(2)
+    df = pd.DataFrame({
+        column: rng.integers(0, 2 ** 31 - 1, 300) if dtype == 'int32' else rng.uniform(-10, 10, 300).round(4)
+        for column, dtype in COMPACT_DTYPES[table].items()
+    })
+    narrowed = narrow(df, table)
+    assert dict(narrowed.dtypes.astype(str)) == COMPACT_DTYPES[table]
+    for column, dtype in COMPACT_DTYPES[table].items():
+        restored = narrowed[column].astype('float64')
+        if dtype == 'float32':
+            restored = restored.round(4)
+        np.testing.assert_array_equal(restored, df[column])
+
+
+def test_narrow_skips_absent_columns_and_other_tables():
+    df = pd.DataFrame({'fill_rate': [0.25], 'quantity': [1.0]})
+    assert narrow(df, 'Inventory').dtypes.astype(str).to_dict() == {'fill_rate': 'float32', 'quantity': 'float64'}
+    assert narrow(df, 'Product') is df
+
+
+def test_keyed_chunks_are_written_as_plain_values(tmp_path):
+    codes = np.array([3, 0, 2, 2])
+    chunk = narrow(pd.DataFrame({
+        'date': keys(codes % len(DATES), DATES),
+        'product_id': keys(codes, PRODUCT_IDS),
+        'location_id': keys(np.zeros(4, dtype=int), np.array(['L0000'])),
+        'fill_rate': [0.9123, 1.0, 0.5, 0.0001]
+    }), 'Inventory')
+    sink = make_sink('csv', str(tmp_path))
+    sink.write('Inventory', chunk)
+    written = pd.read_csv(sink.path('Inventory'))
+    assert list(written['product_id']) == list(PRODUCT_IDS[codes])
+    assert list(pd.to_datetime(written['date'])) == list(DATES[codes % len(DATES)])
+    np.testing.assert_array_equal(written['fill_rate'], [0.9123, 1.0, 0.5, 0.0001])
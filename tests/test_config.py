@@ -0,0 +1,21 @@
+import pytest
+
+from config import resolve_config
+
+
+@pytest.mark.parametrize('workers', [0, -2, 1.5, None])
+def test_workers_below_one_are_rejected(workers):
+    with pytest.raises(ValueError, match='workers must be a positive integer'):
+        resolve_config(overrides={'workers': workers})
+
+
+@pytest.mark.parametrize('processes', [0, -1])
+def test_processes_below_one_are_rejected(processes):
+    with pytest.raises(ValueError, match='processes must be a positive integer'):
+        resolve_config(overrides={'processes': processes})
+
+
+def test_valid_settings_resolve():
+    config = resolve_config(preset='small', overrides={'workers': 1, 'processes': 2})
+    assert (config['workers'], config['processes']) == (1, 2)
+    assert config['tables']['Product'] == 100
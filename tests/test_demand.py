@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import data_generator
+from sinks import NullSink
+from timeline import period_dates
+
+SIZES = {'num_products': 6, 'num_locations': 4, 'num_forecasts': 25, 'periods': 18}
+
+
+def _forecast(seed, chunk_rows=data_generator.DEFAULT_CHUNK_ROWS):
+    sink = NullSink()
+    products = data_generator.generate_product_data(SIZES['num_products'], seed=seed, sink=sink)
+    locations = data_generator.generate_location_data(SIZES['num_locations'], seed=seed, sink=sink)
+    time_df = data_generator.generate_time_dimension('2024-01-01', SIZES['periods'], 'week', sink=sink)
+    return data_generator.generate_demand_forecast(products, locations, time_df, SIZES['num_forecasts'], seed=seed,
+                                                   sink=sink, chunk_rows=chunk_rows)
+
+
+def test_same_seed_reproduces_the_forecast():
+    pd.testing.assert_frame_equal(_forecast(11), _forecast(11))
+    assert not _forecast(11)['forecast_quantity'].equals(_forecast(12)['forecast_quantity'])
+
+
+def test_forecast_shape_and_bounds():
+    forecast = _forecast(11)
+    assert len(forecast) == SIZES['num_forecasts'] * SIZES['periods']
+    assert (forecast['forecast_quantity'] >= 0).all()
+    assert forecast['confidence_level'].between(0.6, 0.95).all()
+    # Each series is one product at one location over every period
+    series = forecast.index // SIZES['periods']
+    assert (forecast.groupby(series)[['product_id', 'location_id']].nunique(dropna=False) == 1).all().all()
+    assert (forecast.groupby(series)['date'].nunique() == SIZES['periods']).all()
+
+
+def test_batched_arrays_follow_the_series_formula():
+    dates = period_dates('2024-01-01', 52, 'week')
+    external_impact = np.linspace(0.9, 1.1, len(dates))
+    promo_lift = np.ones((3, len(dates)))
+    promo_lift[1, 10:14] = 1.25
+    product_idx, location_idx, demand, confidence = data_generator._demand_arrays(
+        np.random.default_rng(4), dates, 8, 5, external_impact, promo_lift)
+
+    # Same draws, one series at a time
+    rng = np.random.default_rng(4)
+    assert (rng.integers(0, 3, 8) == product_idx).all() and (rng.integers(0, 5, 8) == location_idx).all()
+    base, trend = rng.uniform(100, 1000, 8), rng.uniform(-0.2, 0.3, 8)
+    seasonality, noise_level = rng.uniform(0.1, 0.4, 8), rng.uniform(0.05, 0.15, 8)
+    noise = rng.standard_normal((8, len(dates)))
+    years = (dates - dates[0]).days.to_numpy() / 365
+    for i in range(8):
+        expected = (base[i] * (1 + trend[i] * years) * (1 + seasonality[i] * np.sin(2 * np.pi * dates.dayofyear / 365))
+                    * external_impact * promo_lift[product_idx[i]])
+        np.testing.assert_allclose(demand[i], np.maximum(0, expected * (1 + noise_level[i] * noise[i])))
+    assert confidence.shape == demand.shape
+
+
+@pytest.mark.parametrize('chunk_rows', [18, 100])
+def test_chunking_does_not_change_the_series_count(chunk_rows):
+    forecast = _forecast(3, chunk_rows)
+    assert len(forecast) == SIZES['num_forecasts'] * SIZES['periods']
+    assert (forecast['forecast_quantity'] >= 0).all()
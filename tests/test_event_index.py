@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from event_index import EventIndex
+
+KEYS = ['P0', 'P1', 'P2', 'P3']
+
+
+@pytest.fixture(scope='module')
+def events():
+    rng = np.random.default_rng(7)
+    num_events = 300
+    return pd.DataFrame({
+        'key': rng.choice(KEYS[:3], num_events),
+        'start': pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 120, num_events), unit='D'),
+        'duration': rng.integers(0, 15, num_events),
+        'value': rng.uniform(0.1, 0.9, num_events)
+    })
+
+
+def _brute_force(events, key, day):
+    """Row positions of events active for key on day, checking every event"""
+    end = events['start'] + pd.to_timedelta(events['duration'], unit='D')
+    mask = (events['key'] == key) & (events['start'] <= day) & (end >= day)
+    return np.flatnonzero(mask.to_numpy())
+
+
+def test_active_matches_brute_force(events):
+    index = EventIndex(events['key'], events['start'], events['duration'], events['value'])
+    for day in pd.date_range('2023-12-25', '2024-05-15'):
+        for key in KEYS:
+            assert sorted(index.active(key, day)) == list(_brute_force(events, key, day))
+
+
+def test_matrices_match_brute_force(events):
+    index = EventIndex(events['key'], events['start'], events['duration'], events['value'])
+    dates = pd.date_range('2023-12-25', '2024-05-15')
+    counts = index.activity_matrix(dates, KEYS)
+    means = index.mean_value_matrix(dates, KEYS, default=-1.0)
+    for row, key in enumerate(KEYS):
+        for column, day in enumerate(dates):
+            active = _brute_force(events, key, day)
+            assert counts[row, column] == len(active)
+            expected = events['value'].to_numpy()[active].mean() if len(active) else -1.0
+            assert means[row, column] == pytest.approx(expected)
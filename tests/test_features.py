@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from features import FEATURE_LAGS, ROLLING_WINDOWS, demand_features, lagged, rolling_stats
+
+
+@pytest.fixture(scope='module')
+def demand():
+    rng = np.random.default_rng(3)
+    demand = rng.gamma(2.0, 50.0, (6, 30))
+    demand[2] = 40.0  # a flat series, where running sums can leave a tiny negative variance
+    return demand
+
+
+@pytest.mark.parametrize('lag', [*FEATURE_LAGS, 40])
+def test_lags_match_pandas_shift(demand, lag):
+    expected = pd.DataFrame(demand.T).shift(lag).to_numpy().T
+    np.testing.assert_array_equal(lagged(demand, lag), expected)
+
+
+@pytest.mark.parametrize('window', [*ROLLING_WINDOWS, 1, 29, 30])
+def test_rolling_stats_match_pandas_rolling(demand, window):
+    previous = pd.DataFrame(demand.T).shift(1).rolling(window)
+    mean, std = rolling_stats(demand, window)
+    np.testing.assert_allclose(mean, previous.mean().to_numpy().T, rtol=1e-9)
+    if window > 1:
+        np.testing.assert_allclose(std, previous.std().to_numpy().T, rtol=1e-6, atol=1e-6)
+    else:
+        assert np.isnan(std).all()
+    assert (np.nan_to_num(std) >= 0).all()
+
+
+def test_demand_features_columns_and_dtype(demand):
+    features = demand_features(demand)
+    assert list(features) == [
+        *(f'demand_lag_{lag}' for lag in FEATURE_LAGS),
+        *(f'demand_rolling_{stat}_{window}' for window in ROLLING_WINDOWS for stat in ('mean', 'std'))
+    ]
+    assert all(values.dtype == np.float32 and values.shape == demand.shape for values in features.values())
@@ -0,0 +1,47 @@
+import io
+import json
+import threading
+
+from instrumentation import Instrumentation
+
+
+def _events(log):
+    return {record['stage']: record for record in map(json.loads, log.getvalue().splitlines())
+            if record['event'] == 'stage_end'}
+
+
+def test_sequential_stages_report_their_own_peak():
+    log = io.StringIO()
+    instrumentation = Instrumentation(log, verbose=False)
+    for table in ('Product', 'Location'):
+        with instrumentation.stage(table):
+            pass
+    events = _events(log)
+    assert not events['Product']['peak_rss_shared'] and not events['Location']['peak_rss_shared']
+
+
+def test_overlapping_stages_are_marked_shared(capsys):
+    log = io.StringIO()
+    instrumentation = Instrumentation(log)
+    started, release = threading.Event(), threading.Event()
+
+    def first():
+        with instrumentation.stage('Product'):
+            started.set()
+            release.wait(5)
+
+    thread = threading.Thread(target=first)
+    thread.start()
+    started.wait(5)
+    with instrumentation.stage('Location'):
+        release.set()
+    thread.join()
+    with instrumentation.stage('Customer'):
+        pass
+
+    events = _events(log)
+    assert events['Product']['peak_rss_shared'] and events['Location']['peak_rss_shared']
+    assert not events['Customer']['peak_rss_shared']
+    output = capsys.readouterr().out
+    assert 'Location: 0 rows' in output and 'MB, shared)' in output
+    assert 'MB, shared' not in output.split('Customer:')[1]
@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from data_generator import replenishment_policy, simulate_inventory
+
+
+def _orders(on_order, lead_periods):
+    """Quantity ordered each period, recovered from on-order changes and arrivals"""
+    placed = np.zeros_like(on_order)
+    previous = np.zeros(len(on_order))
+    for t in range(on_order.shape[1]):
+        arriving = placed[:, t - lead_periods] if t >= lead_periods else 0
+        placed[:, t] = on_order[:, t] - previous + arriving
+        previous = on_order[:, t]
+    return placed
+
+
+def test_orders_fire_at_the_reorder_point_and_arrive_after_the_lead_time():
+    demand = np.full((1, 12), 10.0)
+    on_hand, on_order, lost = simulate_inventory(demand, np.array([25.0]), np.array([40.0]), np.array([2]),
+                                                 np.array([50.0]))
+    # Position drops to 20 <= 25 in periods 2, 6 and 10; each Q of 40 lands two periods later
+    np.testing.assert_array_equal(on_hand[0], [40, 30, 20, 10, 40, 30, 20, 10, 40, 30, 20, 10])
+    np.testing.assert_array_equal(on_order[0], [0, 0, 40, 40, 0, 0, 40, 40, 0, 0, 40, 40])
+    np.testing.assert_array_equal(_orders(on_order, 2)[0], [0, 0, 40, 0, 0, 0, 40, 0, 0, 0, 40, 0])
+    assert not lost.any()
+
+
+def test_large_shortfalls_order_enough_multiples_of_q():
+    demand = np.array([[0.0, 95.0, 0.0, 0.0, 0.0]])
+    on_hand, on_order, lost = simulate_inventory(demand, np.array([20.0]), np.array([30.0]), np.array([1]),
+                                                 np.array([100.0]))
+    # Position 5 is 15 short of s: one Q lifts it to 35, above s
+    np.testing.assert_array_equal(on_order[0], [0, 30, 0, 0, 0])
+    np.testing.assert_array_equal(on_hand[0], [100, 5, 35, 35, 35])
+    assert not lost.any()
+
+
+def test_unmet_demand_is_lost_rather_than_backordered():
+    demand = np.array([[30.0, 30.0, 30.0, 0.0]])
+    on_hand, on_order, lost = simulate_inventory(demand, np.array([10.0]), np.array([50.0]), np.array([2]),
+                                                 np.array([40.0]))
+    # The order placed at s in period 0 only lands in period 2, so period 1 runs dry
+    np.testing.assert_array_equal(on_hand[0], [10, 0, 20, 20])
+    np.testing.assert_array_equal(lost[0], [0, 20, 0, 0])
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_policy_keeps_stock_non_negative_and_position_above_s(seed):
+    rng = np.random.default_rng(seed)
+    num_pairs, num_periods = 40, 60
+    demand = rng.poisson(rng.uniform(5, 50, (num_pairs, 1)), (num_pairs, num_periods)).astype(float)
+    lead_times = rng.integers(1, 60, num_pairs)
+    pack_size = rng.choice([1, 6, 12], num_pairs)
+    policy = replenishment_policy(rng, demand, lead_times, rng.uniform(5, 100, num_pairs),
+                                  rng.integers(10, 200, num_pairs), pack_size, 7)
+
+    np.testing.assert_array_equal(policy['lead_periods'], np.maximum(1, np.ceil(lead_times / 7)))
+    assert (policy['order_quantity'] % pack_size == 0).all()
+    assert (policy['reorder_point'] >= demand.mean(axis=1) * policy['lead_periods']).all()
+
+    on_hand, on_order, lost = simulate_inventory(demand, policy['reorder_point'], policy['order_quantity'],
+                                                 policy['lead_periods'], policy['initial_on_hand'])
+    assert (on_hand >= 0).all() and (lost >= 0).all()
+    # Every period ends with the inventory position lifted above s
+    assert (on_hand + on_order > policy['reorder_point'][:, None]).all()
+    for pair in range(num_pairs):
+        placed = _orders(on_order[pair:pair + 1], policy['lead_periods'][pair])[0]
+        assert np.allclose(placed % policy['order_quantity'][pair], 0)
+
+
+def test_constant_demand_needs_no_safety_stock():
+    demand = np.full((3, 20), 12.0)
+    policy = replenishment_policy(np.random.default_rng(0), demand, np.array([7, 14, 30]), np.full(3, 20.0),
+                                  np.full(3, 50), np.full(3, 10), 7)
+    np.testing.assert_array_equal(policy['safety_stock'], 0)
+    np.testing.assert_array_equal(policy['reorder_point'], [12, 24, 60])
+    assert (policy['order_quantity'] >= 50).all()
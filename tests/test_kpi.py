@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import data_generator
+from compact import decode
+from kpi import KpiCube
+from timeline import Calendar
+
+SIZES = {'num_products': 15, 'num_locations': 8, 'num_suppliers': 5, 'num_customers': 5, 'num_resources': 5,
+         'periods': 6, 'num_forecasts': 60, 'num_lanes': 10}
+
+
+@pytest.fixture(scope='module')
+def tables():
+    tables = data_generator.main(output_format='null', seed=21, sizes=SIZES, workers=1)
+    return {name: df.apply(decode) for name, df in tables.items()}
+
+
+def _metric(tables, metric_name, dimension_type):
+    kpis = tables['KPI_Dashboard']
+    rows = kpis[(kpis['metric_name'] == metric_name) & (kpis['dimension_type'] == dimension_type)]
+    return rows.set_index([pd.to_datetime(rows['date']), rows['dimension_id']])['metric_value'].sort_index()
+
+
+def _expected(frame, by, values):
+    grouped = frame.assign(value=values).groupby([pd.to_datetime(frame['date']), by])['value'].sum()
+    return grouped.round(2).rename_axis(['date', 'dimension_id']).sort_index()
+
+
+def _check(actual, expected):
+    pd.testing.assert_series_equal(actual.rename_axis(['date', 'dimension_id']), expected.rename('metric_value'),
+                                   check_exact=False, atol=0.011)
+
+
+def test_overall_inventory_value_matches_groupby(tables):
+    inventory = tables['Inventory'].merge(tables['Product'][['product_id', 'unit_cost']], on='product_id')
+    expected = _expected(inventory, pd.Series('ALL', index=inventory.index),
+                         inventory['quantity_on_hand'] * inventory['unit_cost'])
+    _check(_metric(tables, 'Inventory Value', 'Overall'), expected)
+
+
+def test_category_production_cost_matches_groupby(tables):
+    production = tables['ProductionPlan'].merge(tables['Product'][['product_id', 'product_category']], on='product_id')
+    expected = _expected(production, production['product_category'], production['total_cost'])
+    _check(_metric(tables, 'Production Cost', 'Category'), expected)
+
+
+@pytest.mark.parametrize('dimension_type, column', [('Region', 'region'), ('LocationType', 'location_type')])
+def test_location_carrying_cost_matches_groupby(tables, dimension_type, column):
+    inventory = tables['Inventory'].merge(tables['Location'][['location_id', column]], on='location_id')
+    expected = _expected(inventory, inventory[column], inventory['carrying_cost'])
+    _check(_metric(tables, 'Inventory Carrying Cost', dimension_type), expected)
+
+
+def test_cubes_merge_by_addition(tables):
+    calendar = Calendar.from_time_dimension(tables['TimeDimension'])
+    whole = KpiCube(calendar, tables['Product'], tables['Location'])
+    whole.add_inventory(tables['Inventory'])
+    halves = [KpiCube(calendar, tables['Product'], tables['Location']) for _ in range(2)]
+    middle = len(tables['Inventory']) // 2
+    halves[0].add_inventory(tables['Inventory'].iloc[:middle])
+    halves[1].add_inventory(tables['Inventory'].iloc[middle:])
+    merged = halves[0].merge(halves[1])
+    for name, values in whole.measures.items():
+        np.testing.assert_allclose(merged.measures[name], values)
+
+
+def test_delivery_metrics_follow_the_inventory_simulation(tables):
+    inventory = tables['Inventory']
+    in_stock = (inventory['stockout_quantity'] <= 0).astype(float)
+    overall = pd.Series('ALL', index=inventory.index)
+    rows = _expected(inventory, overall, 1.0)
+    on_time = _expected(inventory, overall, in_stock) / rows
+    _check(_metric(tables, 'On-Time Delivery', 'Overall'), (on_time * 100).round(2))
+    fill_rate = _expected(inventory, overall, inventory['fill_rate']) / rows
+    _check(_metric(tables, 'Perfect Order Rate', 'Overall'), (on_time * fill_rate * 100).round(2))
+    assert in_stock.mean() < 1
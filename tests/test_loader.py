@@ -0,0 +1,120 @@
+import json
+import sqlite3
+
+import pandas as pd
+import pytest
+
+import data_generator
+from loader import SqliteLoader, load_dataset, map_chunk, parse_schema
+from sinks import CsvSink
+
+
+def _scenarios():
+    return pd.DataFrame({
+        'scenario_id': [10, 20, 30, 40],
+        'scenario_name': ['Base', 'Demand +10%', 'Blackout', 'Outage'],
+        'start_date': pd.Timestamp('2024-01-01'),
+        'end_date': pd.Timestamp('2024-12-31'),
+        'description': None,
+        'assumptions': ['{}'] * 4,
+        'created_by': 'tests'
+    })
+
+
+def _disruptions():
+    return pd.DataFrame({
+        'date': pd.to_datetime(['2024-01-05', '2024-02-01', '2024-03-01']),
+        'supplier_id': ['S0000', 'S0001', 'S0002'],
+        'disruption_type': 'Port Delay',
+        'severity_factor': [0.5, 0.7, 0.9],
+        'duration_days': [3, 4, 5]
+    })
+
+
+class RecordingLoader(SqliteLoader):
+    def __init__(self, path):
+        super().__init__(path)
+        self.last_ids = {}
+
+    def finish_table(self, spec, last_id):
+        self.last_ids[spec.name] = last_id
+
+
+def _load(tmp_path, loader_class=SqliteLoader):
+    sink = CsvSink(str(tmp_path / 'data'))
+    sink.write('SOP_Scenario', _scenarios())
+    sink.write('SupplyDisruptions', _disruptions())
+    loader = loader_class(str(tmp_path / 'sop.db'))
+    try:
+        loaded = load_dataset(loader, str(tmp_path / 'data'), chunk_rows=2)
+    finally:
+        loader.close()
+    return loader, loaded
+
+
+def test_explicit_serial_ids_are_kept(tmp_path):
+    _, loaded = _load(tmp_path)
+    assert loaded == {'SupplyDisruptions': 3, 'SOP_Scenario': 4}
+    with sqlite3.connect(tmp_path / 'sop.db') as connection:
+        rows = connection.execute('SELECT scenario_id, scenario_name FROM SOP_Scenario ORDER BY scenario_id')
+        assert rows.fetchall() == [(10, 'Base'), (20, 'Demand +10%'), (30, 'Blackout'), (40, 'Outage')]
+
+
+def test_missing_serial_ids_are_numbered_across_chunks(tmp_path):
+    _load(tmp_path)
+    with sqlite3.connect(tmp_path / 'sop.db') as connection:
+        rows = connection.execute('SELECT disruption_id, supplier_id FROM SupplyDisruptions ORDER BY disruption_id')
+        assert rows.fetchall() == [(1, 'S0000'), (2, 'S0001'), (3, 'S0002')]
+
+
+def test_sequence_follows_largest_id(tmp_path):
+    loader, _ = _load(tmp_path, RecordingLoader)
+    assert loader.last_ids == {'SupplyDisruptions': 3, 'SOP_Scenario': 40}
+
+
+def test_demand_features_load_with_null_lags(tmp_path):
+    sizes = {'num_products': 4, 'num_locations': 3, 'num_forecasts': 10, 'periods': 8, 'num_lanes': 10}
+    data_generator.main(output_dir=str(tmp_path / 'data'), seed=2, sizes=sizes, workers=1, features=True)
+    loader = SqliteLoader(str(tmp_path / 'sop.db'))
+    try:
+        loaded = load_dataset(loader, str(tmp_path / 'data'), tables=['DemandFeatures'])
+    finally:
+        loader.close()
+    features = pd.read_csv(tmp_path / 'data' / 'DemandFeatures.csv')
+    assert loaded == {'DemandFeatures': len(features)}
+    with sqlite3.connect(tmp_path / 'sop.db') as connection:
+        rows = connection.execute('SELECT COUNT(demand_lag_1), COUNT(demand_lag_12) FROM DemandFeatures')
+        assert rows.fetchone() == (features['demand_lag_1'].count(), 0)
+
+
+def test_out_of_range_decimals_are_rejected_not_clipped():
+    spec = next(spec for spec in parse_schema()[0] if spec.name == 'ProductSourcing')
+    chunk = pd.DataFrame({'supplier_id': ['S0000', 'S0001'], 'product_id': ['P0000', 'P0000'],
+                          'location_id': ['L0000', 'L0000'], 'share': [0.25, 12.5]})
+    columns = ['sourcing_id', 'supplier_id', 'product_id', 'location_id', 'share']
+    with pytest.raises(ValueError, match=r'ProductSourcing\.share: 1 rows exceed DECIMAL\(5,4\)'):
+        map_chunk(spec, chunk, columns)
+    assert map_chunk(spec, chunk.iloc[:1], columns)['share'].tolist() == [0.25]
+
+
+def test_production_materials_match_the_plan_json(tmp_path):
+    sizes = {'num_products': 6, 'num_locations': 4, 'num_forecasts': 12, 'periods': 4, 'num_lanes': 10}
+    data_generator.main(output_dir=str(tmp_path / 'data'), seed=6, sizes=sizes, workers=1, materials_table=True)
+    plans = pd.read_csv(tmp_path / 'data' / 'ProductionPlan.csv')
+    materials = pd.read_csv(tmp_path / 'data' / 'ProductionMaterial.csv')
+
+    expected = [
+        (plan.date, plan.product_id, plan.location_id, material['material_id'], material['quantity'])
+        for plan in plans.itertuples()
+        for material in json.loads(plan.resource_requirements)['materials_required']
+    ]
+    actual = list(materials[['date', 'product_id', 'location_id', 'material_id', 'quantity']].itertuples(
+        index=False, name=None))
+    assert sorted(actual) == sorted(expected)
+
+    loader = SqliteLoader(str(tmp_path / 'sop.db'))
+    try:
+        loaded = load_dataset(loader, str(tmp_path / 'data'), tables=['ProductionMaterial'])
+    finally:
+        loader.close()
+    assert loaded == {'ProductionMaterial': len(materials)}
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+import data_generator
+from network import ANY_MODE, ROUTE_MEASURES, TransportNetwork, _all_pairs
+from sinks import NullSink
+
+
+@pytest.fixture(scope='module')
+def network():
+    locations = data_generator.generate_location_data(15, seed=8, sink=NullSink())
+    lanes = data_generator.generate_transport_lanes(locations, num_lanes=80, seed=8, sink=NullSink())
+    return TransportNetwork(lanes, locations)
+
+
+def _floyd_warshall(num_nodes, origins, destinations, weights):
+    dist = np.full((num_nodes, num_nodes), np.inf)
+    np.fill_diagonal(dist, 0)
+    for origin, destination, weight in zip(origins, destinations, weights):
+        dist[origin, destination] = min(dist[origin, destination], weight)
+    for via in range(num_nodes):
+        dist = np.minimum(dist, dist[:, via, None] + dist[None, via, :])
+    return dist
+
+
+def test_all_pairs_matches_floyd_warshall_on_random_graphs():
+    rng = np.random.default_rng(1)
+    for num_nodes, num_edges in [(1, 0), (6, 4), (20, 60), (40, 300)]:
+        origins = rng.integers(0, num_nodes, num_edges)
+        destinations = rng.integers(0, num_nodes, num_edges)
+        weights = rng.uniform(0, 10, num_edges).astype('float32')
+        expected = _floyd_warshall(num_nodes, origins, destinations, weights)
+        # A small batch also exercises the loop over batches of sources
+        result = _all_pairs(num_nodes, origins, destinations, weights, batch_cells=max(1, 3 * num_edges))
+        np.testing.assert_allclose(result, expected, rtol=1e-5)
+
+
+def test_route_tables_match_floyd_warshall(network):
+    routes = network.route_tables()
+    assert routes.modes == [*network.mode_names, ANY_MODE]
+    for mode in routes.modes:
+        rows = network._mode_lanes(mode)
+        for measure, column in ROUTE_MEASURES.items():
+            expected = _floyd_warshall(len(network.location_index), network.origins[rows],
+                                       network.destinations[rows], network.lanes[column].to_numpy()[rows])
+            np.testing.assert_allclose(routes.matrix(mode, measure), expected, rtol=1e-5)
+
+
+def test_lookup_and_cache_round_trip(network, tmp_path):
+    routes = network.route_tables(cache_dir=str(tmp_path))
+    cached = network.route_tables(cache_dir=str(tmp_path))
+    ids = network.location_index
+    origins, destinations = [ids[0], ids[3], 'L9999'], [ids[5], ids[3], ids[1]]
+    values = cached.lookup(origins, destinations, measure='transit')
+    assert values[0] == routes.matrix(ANY_MODE, 'transit')[0, 5]
+    assert values[1] == 0
+    assert np.isnan(values[2])
@@ -0,0 +1,110 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_generator import generate_supply_impact
+from propagation import CellFactors, SourcingMap, supplier_severity
+from sinks import NullSink
+from timeline import Calendar, period_dates
+
+PRODUCTS = ['P0', 'P1']
+LOCATIONS = ['L0', 'L1']
+SUPPLIERS = ['S0', 'S1']
+
+# P0 at L0 splits its supply between both suppliers; S0 and S1 each also
+# source one pair alone, and P1 at L1 has no supplier
+SOURCING = pd.DataFrame({
+    'supplier_id': ['S0', 'S1', 'S0', 'S1'],
+    'product_id': ['P0', 'P0', 'P0', 'P1'],
+    'location_id': ['L0', 'L0', 'L1', 'L0'],
+    'share': [0.5, 0.5, 1.0, 1.0]
+})
+
+
+@pytest.fixture
+def weeks():
+    # Weeks ending Sunday 2024-01-07, -14 and -21
+    return Calendar(period_dates('2024-01-01', 3, 'week'), 'week')
+
+
+def _disruptions(rows):
+    return pd.DataFrame(rows, columns=['date', 'supplier_id', 'disruption_type', 'severity_factor',
+                                       'duration_days'])
+
+
+def test_severity_is_averaged_over_the_period_and_ends_with_the_event(weeks):
+    # Active 2024-01-05 through 2024-01-07: three days of the first week
+    disruptions = _disruptions([('2024-01-05', 'S0', 'Strike', 0.6, 2)])
+    severity = supplier_severity(disruptions, SUPPLIERS, weeks)
+    np.testing.assert_allclose(severity, [[0.6 * 3 / 7, 0, 0], [0, 0, 0]])
+
+
+def test_overlapping_disruptions_take_their_mean_severity(weeks):
+    # S1 is out all of week two at 0.8, and a 0.4 event overlaps it on the 10th and 11th
+    disruptions = _disruptions([('2024-01-08', 'S1', 'Fire', 0.8, 6),
+                                ('2024-01-10', 'S1', 'Strike', 0.4, 1)])
+    severity = supplier_severity(disruptions, SUPPLIERS, weeks)
+    np.testing.assert_allclose(severity[1], [0, (5 * 0.8 + 2 * 0.6) / 7, 0])
+    np.testing.assert_allclose(severity[0], 0)
+
+
+def test_no_disruptions_means_no_severity(weeks):
+    severity = supplier_severity(_disruptions([]), SUPPLIERS, weeks)
+    assert severity.shape == (2, 3)
+    assert not severity.any()
+
+
+def test_impact_weights_shared_suppliers_by_share():
+    sourcing = SourcingMap(SOURCING, PRODUCTS, LOCATIONS, SUPPLIERS)
+    severity = np.array([[0.4, 0.0], [0.8, 1.0]])
+    # Pairs product-major: P0-L0, P0-L1, P1-L0, P1-L1
+    np.testing.assert_allclose(sourcing.impact(severity, 0, 4),
+                               [[0.6, 0.5], [0.4, 0.0], [0.8, 1.0], [0.0, 0.0]])
+    np.testing.assert_allclose(sourcing.impact(severity, 1, 3), [[0.4, 0.0], [0.8, 1.0]])
+
+
+def test_impact_ignores_unknown_ids_and_clips_oversubscribed_pairs():
+    sourcing_df = pd.concat([SOURCING, pd.DataFrame({
+        'supplier_id': ['S1', 'S9'], 'product_id': ['P0', 'P1'], 'location_id': ['L1', 'L1'], 'share': [0.5, 1.0]
+    })], ignore_index=True)
+    sourcing = SourcingMap(sourcing_df, PRODUCTS, LOCATIONS, SUPPLIERS)
+    impact = sourcing.impact(np.array([[1.0], [1.0]]), 0, 4)
+    np.testing.assert_allclose(impact[:, 0], [1.0, 1.0, 1.0, 0.0])
+
+
+def test_cell_factors_default_outside_written_cells(weeks):
+    chunk = pd.DataFrame({
+        'date': ['2024-01-14', '2024-01-07', '2024-01-21'],
+        'product_id': ['P1', 'P0', 'P9'],
+        'location_id': ['L0', 'L1', 'L0'],
+        'capacity_factor': [0.2, 0.6, 0.0],
+        'lead_time_factor': [1.8, 1.4, 2.0]
+    })
+    capacity, lead_time = CellFactors.from_chunks(iter([chunk.iloc[:2], chunk.iloc[2:]]),
+                                                  ['capacity_factor', 'lead_time_factor'],
+                                                  PRODUCTS, LOCATIONS, weeks)
+    # Unknown product P9 is dropped
+    assert len(capacity.cells) == 2
+    np.testing.assert_allclose(capacity.dense(0, 4), [[1, 1, 1], [0.6, 1, 1], [1, 0.2, 1], [1, 1, 1]])
+    np.testing.assert_allclose(lead_time.dense(2, 4), [[1, 1.8, 1], [1, 1, 1]])
+
+    block = capacity.slice(2, 3)
+    np.testing.assert_array_equal(block.cells, [1])
+
+    dates = pd.to_datetime(['2024-01-10', '2024-01-02', '2024-01-10', '2024-02-01'])
+    factors = capacity.lookup(np.array([1, 0, 0, 1]), np.array([0, 1, 0, 0]), dates)
+    np.testing.assert_allclose(factors, [0.2, 0.6, 1.0, 1.0])
+
+
+def test_supply_impact_reaches_every_pair_of_a_disrupted_supplier(weeks):
+    disruptions = _disruptions([('2024-01-08', 'S0', 'Fire', 0.7, 6)])
+    impact = generate_supply_impact(SOURCING, disruptions, pd.DataFrame({'date': weeks.dates}),
+                                    pd.DataFrame({'product_id': PRODUCTS}),
+                                    pd.DataFrame({'location_id': LOCATIONS}),
+                                    pd.DataFrame({'supplier_id': SUPPLIERS}), sink=NullSink())
+    rows = impact.astype({'date': str, 'product_id': str, 'location_id': str}).set_index(
+        ['product_id', 'location_id'])
+    assert set(rows.index) == {('P0', 'L0'), ('P0', 'L1')}
+    assert (rows['date'].str[:10] == '2024-01-14').all()
+    np.testing.assert_allclose(rows.loc[('P0', 'L0'), ['capacity_factor', 'lead_time_factor']], [0.65, 1.35])
+    np.testing.assert_allclose(rows.loc[('P0', 'L1'), ['capacity_factor', 'lead_time_factor']], [0.3, 1.7])
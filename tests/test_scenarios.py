@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import data_generator
+from compact import decode
+from event_index import EventIndex
+from scenarios import Scenario, ScenarioEngine, _promotion_blackout
+from sinks import NullSink
+
+SEED = 11
+SIZES = {'num_products': 12, 'num_locations': 5, 'num_suppliers': 6, 'num_customers': 5, 'num_resources': 5,
+         'periods': 12, 'num_forecasts': 40, 'num_lanes': 10}
+
+
+@pytest.fixture(scope='module')
+def base():
+    return data_generator.main(output_format='null', seed=SEED, sizes=SIZES, workers=1)
+
+
+def _promotions(dates, durations):
+    return pd.DataFrame({
+        'date': pd.to_datetime(dates),
+        'product_id': ['P0000'] * len(dates),
+        'promotion_type': ['Flash Sale'] * len(dates),
+        'discount_factor': [0.2] * len(dates),
+        'duration_days': durations
+    })
+
+
+def test_blackout_blocks_promotion_ending_on_window_start():
+    # Active 2024-03-01 through 2024-03-01 + 9 days = 2024-03-10 inclusive
+    promotions = _promotions(['2024-03-01'], [9])
+    assert len(EventIndex.from_promotions(promotions).active('P0000', '2024-03-10')) == 1
+
+    kept = _promotion_blackout(promotions, {'start_date': '2024-03-10', 'end_date': '2024-03-20'})
+    assert kept.empty
+
+
+def test_blackout_keeps_promotions_outside_window():
+    promotions = _promotions(['2024-02-20', '2024-03-21'], [8, 3])
+    assert EventIndex.from_promotions(promotions).active('P0000', '2024-03-10').size == 0
+
+    kept = _promotion_blackout(promotions, {'start_date': '2024-03-10', 'end_date': '2024-03-20'})
+    assert len(kept) == 2
+
+
+def test_blackout_limited_to_products():
+    promotions = _promotions(['2024-03-12', '2024-03-12'], [2, 2]).assign(product_id=['P0000', 'P0001'])
+    window = {'start_date': '2024-03-10', 'end_date': '2024-03-20', 'product_ids': ['P0001']}
+    assert _promotion_blackout(promotions, window)['product_id'].tolist() == ['P0000']
+
+
+def test_engine_requires_seed(base):
+    with pytest.raises(ValueError):
+        ScenarioEngine(base, seed=None)
+
+
+def test_scenario_repeats_base_draws(base):
+    # An empty scenario recomputes nothing; a neutral multiplier reproduces the base exactly
+    engine = ScenarioEngine(base, SEED, SIZES)
+    assert engine.run(Scenario(1, 'Base')).changed == ()
+    result = engine.run(Scenario(2, 'Neutral', {'external_factors': {'gdp_factor': 1.0}}))
+    pd.testing.assert_frame_equal(result['DemandForecast'], base['DemandForecast'])
+    pd.testing.assert_frame_equal(result['Inventory'], base['Inventory'])
+
+
+def test_demand_multiplier_scales_demand(base):
+    result = ScenarioEngine(base, SEED, SIZES).run(
+        Scenario(1, 'Demand +10%', {'external_factors': {'market_event_factor': 1.1}}))
+    ratio = result['DemandForecast']['forecast_quantity'].sum() / base['DemandForecast']['forecast_quantity'].sum()
+    assert ratio == pytest.approx(1.1, rel=1e-3)
+
+
+def test_lead_times_recompute_only_lead_time_readers(base):
+    result = ScenarioEngine(base, SEED, SIZES).run(Scenario(1, 'Slow', {'lead_times': {'factor': 2}}))
+    assert set(result.changed) == {'Product', 'Inventory', 'KPI_Dashboard'}
+    assert result['DemandForecast'] is base['DemandForecast']
+    assert np.array_equal(result['Product']['lead_time_days'],
+                          np.maximum(1, base['Product']['lead_time_days'] * 2))
+
+
+def test_disruption_recomputes_supply_chain(base):
+    event = {'supplier_id': 'S0000', 'date': decode(base['Inventory']['date']).min(), 'duration_days': 60}
+    result = ScenarioEngine(base, SEED, SIZES).run(Scenario(1, 'Outage', {'disruptions': [event]}))
+    assert set(result.changed) == {'SupplyDisruptions', 'SupplyImpact', 'Inventory', 'ProductionPlan',
+                                   'KPI_Dashboard'}
+
+
+def test_feature_store_follows_the_demand_it_is_built_from():
+    base = data_generator.main(output_format='null', seed=SEED, sizes=SIZES, workers=1, features=True)
+    engine = ScenarioEngine(base, SEED, SIZES, features=True)
+    result = engine.run(Scenario(1, 'Demand +10%', {'external_factors': {'market_event_factor': 1.1}}))
+    assert 'DemandFeatures' in result.changed
+    expected = data_generator.generate_demand_features(
+        *(result[table] for table in ('DemandForecast', 'TimeDimension', 'Product', 'Location', 'ExternalFactors',
+                                      'PromotionCalendar')), seed=SEED, sink=NullSink())
+    pd.testing.assert_frame_equal(result['DemandFeatures'], expected)
+    assert not result['DemandFeatures']['forecast_quantity'].equals(base['DemandFeatures']['forecast_quantity'])
+    assert 'DemandFeatures' not in engine.run(Scenario(2, 'Slow', {'lead_times': {'factor': 2}})).changed
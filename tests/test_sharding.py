@@ -0,0 +1,49 @@
+import filecmp
+import json
+import os
+
+import pandas as pd
+import pytest
+
+import data_generator
+from sharding import MANIFEST_NAME, shard_bounds
+from sources import TableSource
+
+SIZES = {'num_products': 20, 'num_locations': 4, 'num_suppliers': 6, 'num_customers': 5, 'num_resources': 5,
+         'periods': 6, 'num_forecasts': 2500, 'num_lanes': 10}
+
+
+def _generate(output_dir, processes):
+    data_generator.main(output_dir=str(output_dir), seed=3, sizes=SIZES, workers=1, processes=processes)
+    return output_dir
+
+
+def test_shard_bounds_cover_every_item_once():
+    assert shard_bounds(10, 4) == [(0, 4), (4, 8), (8, 10)]
+    assert shard_bounds(0, 4) == []
+
+
+def test_output_is_independent_of_process_count(tmp_path):
+    one = _generate(tmp_path / 'one', 1)
+    two = _generate(tmp_path / 'two', 2)
+    comparison = filecmp.dircmp(one, two)
+    assert not comparison.diff_files and not comparison.left_only and not comparison.right_only
+    for table in data_generator.SHARDED_TABLES:
+        match, mismatch, errors = filecmp.cmpfiles(one / table, two / table, os.listdir(one / table), shallow=False)
+        assert not mismatch and not errors
+
+
+def test_sharded_tables_are_read_downstream(tmp_path):
+    output_dir = _generate(tmp_path, 2)
+    with open(output_dir / 'Inventory' / MANIFEST_NAME) as f:
+        manifest = json.load(f)
+    assert manifest['num_shards'] == len(shard_bounds(SIZES['num_products'], data_generator.DEFAULT_SHARD_PRODUCTS))
+    inventory = pd.concat(TableSource(str(output_dir), 'Inventory').chunks())
+    assert len(inventory) == manifest['rows'] == SIZES['num_products'] * SIZES['num_locations'] * SIZES['periods']
+    kpis = pd.read_csv(output_dir / 'KPI_Dashboard.csv')
+    assert kpis['metric_value'].notna().all()
+
+
+def test_processes_need_a_file_sink(tmp_path):
+    with pytest.raises(ValueError, match='processes'):
+        data_generator.main(output_dir=str(tmp_path), output_format='null', seed=3, sizes=SIZES, processes=2)
@@ -0,0 +1,19 @@
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+import data_generator as dg
+from sinks import make_sink
+
+
+@pytest.mark.parametrize('output_format', ['parquet', 'arrow'])
+def test_time_dimension_keys_round_trip_as_date32(tmp_path, output_format):
+    sink = make_sink(output_format, str(tmp_path))
+    df = dg.generate_time_dimension('2023-01-01', periods=14, granularity='day', sink=sink)
+    path = sink.path('TimeDimension')
+    if output_format == 'parquet':
+        table = pq.read_table(path)
+    else:
+        table = pa.ipc.open_file(path).read_all()
+    assert table.schema.field('date_id').type == pa.date32()
+    assert [str(day) for day in table['date_id'].to_pylist()] == list(df['date_id'].astype(str))
@@ -0,0 +1,47 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_generator import simulate_inventory
+from streaming import EventSource
+
+SIZES = {'num_products': 20, 'num_locations': 5, 'num_suppliers': 6, 'num_forecasts': 60}
+
+
+def test_simulation_state_continues_across_calls():
+    rng = np.random.default_rng(0)
+    demand = rng.uniform(0, 20, (8, 40))
+    reorder_point, order_quantity = np.full(8, 40.0), np.full(8, 60.0)
+    lead_periods, initial = rng.integers(1, 6, 8), np.full(8, 70.0)
+    whole = simulate_inventory(demand, reorder_point, order_quantity, lead_periods, initial)
+
+    first = simulate_inventory(demand[:, :15], reorder_point, order_quantity, lead_periods, initial,
+                               return_state=True)
+    second = simulate_inventory(demand[:, 15:], reorder_point, order_quantity, lead_periods, first[3],
+                                in_transit=first[4])
+    for combined, head, tail in zip(whole, first, second):
+        np.testing.assert_allclose(combined, np.hstack([head, tail]))
+
+
+def test_inventory_events_carry_over_between_windows():
+    source = EventSource(seed=5, sizes=SIZES, window_days=10)
+    events = []
+    for number in range(3):
+        events += [json.loads(line) for line in source.lines(number, len(events)).to_pylist()]
+    inventory = pd.DataFrame([event for event in events if event['event_type'] == 'inventory'])
+    assert inventory['event_time'].str[:10].max() >= '2023-01-21'
+
+    # Every event changes something, and each starts from the pair's previous reported level
+    assert ((inventory['quantity_change'] != 0) | (inventory['stockout_quantity'] > 0)
+            | (inventory.groupby(['product_id', 'location_id'])['quantity_on_order'].diff() != 0)).all()
+    for _, pair in inventory.sort_values('seq').groupby(['product_id', 'location_id']):
+        before = pair['quantity_on_hand'] - pair['quantity_change']
+        np.testing.assert_array_equal(before.to_numpy()[1:], pair['quantity_on_hand'].to_numpy()[:-1])
+
+
+def test_windows_are_generated_in_order():
+    source = EventSource(seed=5, sizes=SIZES, window_days=10)
+    with pytest.raises(ValueError, match='expected window 0'):
+        source.lines(1)
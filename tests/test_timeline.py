@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from timeline import PERIOD_FREQUENCIES, Calendar, period_dates
+
+START, END = '2023-11-15', '2024-04-10'
+
+
+@pytest.mark.parametrize('granularity', ['day', 'week', 'month'])
+def test_period_dates_match_date_range(granularity):
+    expected = pd.date_range(START, END, freq=PERIOD_FREQUENCIES[granularity])
+    pd.testing.assert_index_equal(period_dates(START, end_date=END, granularity=granularity), expected)
+    pd.testing.assert_index_equal(period_dates(START, 5, granularity), expected[:5])
+
+
+@pytest.mark.parametrize('granularity', ['day', 'week', 'month'])
+def test_index_matches_period_lookup(granularity):
+    calendar = Calendar(period_dates(START, end_date=END, granularity=granularity), granularity)
+    days = pd.date_range('2023-10-01', '2024-05-31')
+    # Reference: the first period label on or after each day
+    position = calendar.dates.searchsorted(days)
+    expected = np.where((days >= calendar.days[0]) & (position < len(calendar)), position, -1)
+    np.testing.assert_array_equal(calendar.index(days), expected)
+
+    shuffled = np.random.default_rng(3).permutation(len(days))
+    np.testing.assert_array_equal(calendar.index(days[shuffled]), expected[shuffled])
+    categorical = pd.Categorical(days[shuffled].strftime('%Y-%m-%d'))
+    np.testing.assert_array_equal(calendar.index(categorical), expected[shuffled])
+
+
+@pytest.mark.parametrize('granularity', ['day', 'week', 'month'])
+def test_aggregate_days_matches_resample(granularity):
+    calendar = Calendar(period_dates(START, end_date=END, granularity=granularity), granularity)
+    days = calendar.days
+    values = np.random.default_rng(5).uniform(0, 10, (2, len(days)))
+    for row, totals in zip(values, calendar.aggregate_days(values, 'sum')):
+        expected = pd.Series(row, index=days).resample(PERIOD_FREQUENCIES[granularity]).sum()
+        assert expected.index.equals(calendar.dates)
+        np.testing.assert_allclose(totals, expected.to_numpy())
+    means = pd.Series(values[0], index=days).resample(PERIOD_FREQUENCIES[granularity]).mean()
+    np.testing.assert_allclose(calendar.aggregate_days(values[0]), means.to_numpy())
+
+
+def test_partial_first_period_is_padded_to_its_full_length():
+    calendar = Calendar(period_dates('2024-02-10', 2, 'month'), 'month')
+    assert calendar.days[0] == pd.Timestamp('2024-02-01')
+    np.testing.assert_array_equal(calendar.period_days, [29, 31])
+    np.testing.assert_array_equal(calendar.index(pd.to_datetime(['2024-02-01', '2024-03-31', '2024-04-01'])),
+                                  [0, 1, -1])
+
+
+def test_granularity_is_inferred_from_spacing():
+    for granularity in ['day', 'week', 'month']:
+        assert Calendar(period_dates(START, 6, granularity)).granularity == granularity
@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+from faker import Faker
+
+import vocabulary
+from vocabulary import categorical, company_names, draw, id_strings, pool_size, product_names
+
+
+def _fake(seed=0):
+    fake = Faker()
+    fake.seed_instance(seed)
+    return fake
+
+
+@pytest.mark.parametrize('count, width', [(0, 4), (1, 4), (12, 1), (10050, 4)])
+def test_id_strings_match_formatted_ordinals(count, width):
+    expected = [f'P{i:0{width}d}' for i in range(count)]
+    assert list(id_strings('P', count, width)) == expected
+
+
+def test_id_strings_without_pyarrow(monkeypatch):
+    monkeypatch.setattr(vocabulary, 'pa', None)
+    assert list(id_strings('SUP', 105, 2)) == [f'SUP{i:02d}' for i in range(105)]
+
+
+def test_pool_size_is_bounded():
+    assert [pool_size(n) for n in [0, 1, 40, 1000, 10 ** 6]] == [1, 1, 40, 1000, vocabulary.POOL_SIZE]
+
+
+def test_categorical_draws_follow_the_weights():
+    column = categorical(np.random.default_rng(0), ['A', 'B', 'C'], 20000, p=[0.6, 0.3, 0.1])
+    assert list(column.categories) == ['A', 'B', 'C']
+    shares = pd.Series(column).value_counts(normalize=True)
+    np.testing.assert_allclose(shares[['A', 'B', 'C']], [0.6, 0.3, 0.1], atol=0.02)
+
+
+def test_draw_only_returns_pool_entries():
+    pool = pd.Series(['x', 'y', 'z'], dtype='str')
+    drawn = draw(np.random.default_rng(1), pool, 500)
+    assert len(drawn) == 500 and drawn.index.equals(pd.RangeIndex(500))
+    assert set(drawn) == {'x', 'y', 'z'}
+
+
+def test_names_are_reproducible_for_a_seed():
+    first = product_names(np.random.default_rng(5), _fake(5), 200)
+    second = product_names(np.random.default_rng(5), _fake(5), 200)
+    pd.testing.assert_series_equal(first, second)
+    assert first.str.fullmatch(r'[A-Z][a-z]+ [A-Z][a-z]+').all()
+
+
+def test_company_names_use_fakers_formats():
+    names = company_names(np.random.default_rng(2), _fake(2), 3000)
+    assert len(names) == 3000 and names.notna().all()
+    name = r"[\w' ]+"
+    formats = [rf'{name} [\w.,]+', rf'{name}-{name}', rf'{name}, {name} and {name}']
+    matched = [names.str.fullmatch(pattern) for pattern in formats]
+    assert np.logical_or.reduce(matched).all()
+    # Every format appears in roughly a third of the names
+    for format_matches in (names.str.contains(' and '), names.str.contains('-')):
+        assert 0.25 < format_matches.mean() < 0.42
@@ -0,0 +1,142 @@
+import functools
+
+import numpy as np
+import pandas as pd
+
+# pandas frequencies of the supported time dimension granularities
+PERIOD_FREQUENCIES = {'day': 'D', 'week': 'W-SUN', 'month': pd.offsets.MonthEnd()}
+
+# Meteorological season for months 1-12
+SEASONS = np.array(['Winter', 'Winter', 'Spring', 'Spring', 'Spring', 'Summer',
+                    'Summer', 'Summer', 'Fall', 'Fall', 'Fall', 'Winter'])
+
+
+def period_dates(start_date, periods=36, granularity='month', end_date=None):
+    """Last day of every period from start_date; end_date, when given, bounds the range instead of periods"""
+    if granularity not in PERIOD_FREQUENCIES:
+        raise ValueError(f"Unknown granularity: {granularity} (choose from {', '.join(PERIOD_FREQUENCIES)})")
+    freq = PERIOD_FREQUENCIES[granularity]
+    if end_date is not None:
+        return pd.date_range(start=start_date, end=end_date, freq=freq)
+    return pd.date_range(start=start_date, periods=periods, freq=freq)
+
+
+def holiday_dates(start, end):
+    """US federal holidays (observed) between start and end"""
+    from pandas.tseries.holiday import USFederalHolidayCalendar
+    return USFederalHolidayCalendar().holidays(start, end)
+
+
+def _day_numbers(dates):
+    """Days since the epoch of each date, as int64"""
+    return np.asarray(pd.DatetimeIndex(dates).values.astype('datetime64[D]'), dtype='int64')
+
+
+class Calendar:
+    """The periods of a time dimension, addressed by integer offset
+
+    Period i runs from starts[i] through ends[i] (day numbers, inclusive) and
+    is labelled by its last day, dates[i]. Fact generators map dates to
+    period offsets with one table lookup (index) and aggregate daily arrays
+    to periods with one reduceat (aggregate_days), so nothing is joined by
+    timestamp comparison.
+    """
+
+    def __init__(self, dates, granularity=None):
+        self.dates = pd.DatetimeIndex(dates)
+        self.ends = _day_numbers(self.dates)
+        self.granularity = granularity or self._infer_granularity()
+        if self.granularity == 'day':
+            self.starts = self.ends.copy()
+        elif self.granularity == 'week':
+            self.starts = self.ends - 6
+        else:
+            self.starts = _day_numbers(self.dates.to_period('M').to_timestamp())
+
+    @classmethod
+    def from_time_dimension(cls, time_df):
+        """Calendar of a generated (or reloaded) TimeDimension table"""
+        column = 'date' if 'date' in time_df.columns else 'date_id'
+        return cls(pd.to_datetime(time_df[column]))
+
+    def _infer_granularity(self):
+        if len(self.ends) < 2:
+            return 'day'
+        step = np.median(np.diff(self.ends))
+        return 'day' if step == 1 else 'week' if step == 7 else 'month'
+
+    def __len__(self):
+        return len(self.ends)
+
+    @property
+    def period_days(self):
+        """Number of days in each period"""
+        return self.ends - self.starts + 1
+
+    @property
+    def days(self):
+        """Every day of the horizon, from the first period's start to the last period's end"""
+        if not len(self):
+            return pd.DatetimeIndex([])
+        return pd.date_range(pd.Timestamp(self.starts[0], unit='D'), pd.Timestamp(self.ends[-1], unit='D'))
+
+    @functools.cached_property
+    def _period_of_day(self):
+        """Period offset of every day from the first start to the last end (-1 in gaps)"""
+        lengths = self.period_days
+        first_day = np.cumsum(lengths) - lengths
+        day_offsets = np.repeat(self.starts - self.starts[0], lengths) + np.arange(lengths.sum()) - np.repeat(
+            first_day, lengths)
+        lookup = np.full(self.ends[-1] - self.starts[0] + 1 if len(self) else 0, -1, dtype='int64')
+        lookup[day_offsets] = np.repeat(np.arange(len(self)), lengths)
+        return lookup
+
+    def index(self, dates):
+        """Offset of the period containing each date, -1 outside the calendar
+
+        One gather from a day-to-period table, so unsorted dates cost the
+        same as sorted ones. Categorical dates resolve each category once.
+        """
+        if isinstance(getattr(dates, 'dtype', None), pd.CategoricalDtype):
+            # Surrogate date keys: look up each calendar entry once, then gather by code
+            dates = pd.Series(dates, copy=False)
+            lookup = self.index(dates.cat.categories)
+            codes = dates.cat.codes.to_numpy()
+            return np.where(codes >= 0, lookup[codes], -1)
+        lookup = self._period_of_day
+        offsets = _day_numbers(dates) - (self.starts[0] if len(self) else 0)
+        inside = (offsets >= 0) & (offsets < len(lookup))
+        return np.where(inside, lookup[np.where(inside, offsets, 0)] if len(lookup) else -1, -1)
+
+    def aggregate_days(self, values, how='mean'):
+        """Reduce a (... x days) array over self.days to (... x periods) by sum or mean"""
+        if not len(self):
+            return np.zeros((*np.shape(values)[:-1], 0))
+        offsets = self.starts - self.starts[0]
+        totals = np.add.reduceat(values, offsets, axis=-1)
+        return totals / self.period_days if how == 'mean' else totals
+
+    def table(self):
+        """Calendar attributes of every period
+
+        Holidays are US federal holidays; a week or month is flagged as a
+        holiday period when it contains one, and business_days counts its
+        weekdays that are not holidays.
+        """
+        days = self.days
+        holidays = np.isin(_day_numbers(days), _day_numbers(holiday_dates(days.min(), days.max())))
+        business = (days.dayofweek < 5) & ~holidays
+        month = self.dates.month.to_numpy()
+        return pd.DataFrame({
+            'date_id': self.dates.strftime('%Y-%m-%d'),
+            'year': self.dates.year.to_numpy().astype('int64'),
+            'quarter': self.dates.quarter.to_numpy().astype('int64'),
+            'month': month.astype('int64'),
+            'week': self.dates.isocalendar().week.to_numpy().astype('int64'),
+            'day_of_week': self.dates.dayofweek.to_numpy().astype('int64'),
+            'is_weekend': self.dates.dayofweek.to_numpy() >= 5,
+            'is_holiday': self.aggregate_days(holidays.astype('int64'), 'sum') > 0,
+            'is_business_day': business[self.ends - self.starts[0]],
+            'business_days': self.aggregate_days(business.astype('int64'), 'sum').astype('int64'),
+            'season': SEASONS[month - 1]
+        })
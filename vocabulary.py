@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+except ImportError:  # pyarrow only speeds up building string columns
+    pa = None
+
+# Most entries drawn from Faker for each vocabulary pool; names combine several
+# entries, so the number of distinct names grows with a power of this
+POOL_SIZE = 1000
+
+
+def pool_size(size):
+    """Entries worth drawing for a column of size values: small tables need fewer Faker calls than rows"""
+    return max(1, min(POOL_SIZE, size))
+
+
+def _text_array(blocks):
+    """pandas str array from (rows x width) matrices of ASCII bytes, concatenated"""
+    if pa is None:
+        return pd.array(np.concatenate([chars.view(f'S{chars.shape[1]}').ravel().astype('U') for chars in blocks]),
+                        dtype='str')
+    # Hand the bytes to Arrow without creating a Python object per string
+    arrays = [
+        pa.FixedSizeBinaryArray.from_buffers(pa.binary(chars.shape[1]), len(chars), [None, pa.py_buffer(chars)])
+        .cast(pa.string())
+        for chars in blocks
+    ]
+    return pd.array(pa.concat_arrays(arrays), dtype='str')
+
+
+def id_strings(prefix, count, width=4):
+    """Keys prefix + f'{i:0{width}d}' for i in range(count), built without a Python loop
+
+    Ordinals are written digit by digit into a byte matrix, one block per
+    number of digits, so keys past 10**width simply get longer.
+    """
+    prefix_bytes = np.frombuffer(prefix.encode('ascii'), dtype=np.uint8)
+    blocks = []
+    start, digits = 0, width
+    while start < count or not blocks:
+        stop = min(count, 10 ** digits)
+        chars = np.empty((stop - start, len(prefix_bytes) + digits), dtype=np.uint8)
+        chars[:, :len(prefix_bytes)] = prefix_bytes
+        remaining = np.arange(start, stop, dtype=np.uint64)
+        for place in range(digits):
+            remaining, digit = np.divmod(remaining, 10)
+            chars[:, -1 - place] = digit + ord('0')
+        blocks.append(chars)
+        start, digits = stop, digits + 1
+    return _text_array(blocks)
+
+
+def categorical(rng, categories, size, p=None):
+    """Column of size draws from categories, stored as a pandas Categorical"""
+    codes = rng.choice(len(categories), size=size, p=p)
+    return pd.Categorical.from_codes(codes, categories=categories)
+
+
+def faker_pool(fake, provider, size=POOL_SIZE):
+    """size values of one Faker provider (e.g. 'city'), the only per-value Faker calls"""
+    method = getattr(fake, provider)
+    return pd.Series([method() for _ in range(size)], dtype='str')
+
+
+def draw(rng, pool, size):
+    """size entries drawn from a pool with replacement"""
+    return pool.take(rng.integers(0, len(pool), size)).reset_index(drop=True)
+
+
+def product_names(rng, fake, size):
+    """Two title-cased lorem words per product, e.g. 'Rise Safe'"""
+    words = pd.Series([word.title() for word in fake.words(pool_size(size))], dtype='str')
+    return draw(rng, words, size) + ' ' + draw(rng, words, size)
+
+
+def company_names(rng, fake, size):
+    """Names in Faker's company formats assembled from surname and suffix pools
+
+    Like fake.company(): 'Smith LLC', 'Smith-Jones' or 'Smith, Jones and Brown'.
+    Each format's middle part comes from its own block of one pool, so every
+    name is three takes and two concatenations regardless of its format.
+    """
+    last_names = faker_pool(fake, 'last_name', pool_size(size))
+    suffixes = faker_pool(fake, 'company_suffix', min(50, pool_size(size)))
+    formats = rng.integers(0, 3, size)
+
+    middles = [' ' + suffixes, '-' + last_names, ', ' + last_names]
+    offsets = np.cumsum([0] + [len(block) for block in middles[:-1]])
+    lengths = np.array([len(block) for block in middles])
+    middle = offsets[formats] + (rng.random(size) * lengths[formats]).astype(np.int64)
+    ends = pd.concat([pd.Series([''], dtype='str'), ' and ' + last_names], ignore_index=True)
+    end = np.where(formats == 2, rng.integers(1, len(ends), size), 0)
+
+    first = draw(rng, last_names, size).array
+    return pd.Series(first + pd.concat(middles, ignore_index=True).array.take(middle) + ends.array.take(end))